@@ -3,21 +3,41 @@
 import asyncio
 import sqlite3
 import json
-import re
 from typing import List
 
 from pydantic_ai import Agent, RunContext
-from pydantic_ai.models.openai import OpenAIModel
-from pydantic_ai.providers.openai import OpenAIProvider
 
-from rich.console import Console
+from rich.console import Console, Group
+from rich.live import Live
 from rich.panel import Panel
 from rich.prompt import Prompt
+from rich.spinner import Spinner
 from rich.syntax import Syntax
 from rich.table import Table
 from rich.text import Text
 from pydantic import BaseModel
 
+from salary_agent import balances
+from salary_agent.analytics import get_analytics
+from salary_agent.db import get_pool, init_db
+from salary_agent.directory import PersonsDirectory
+from salary_agent.encoding import encode_result, encode_rows
+from salary_agent.executor import get_executor
+from salary_agent.guardrails import execute_guarded
+from salary_agent.memory import ConversationMemory
+from salary_agent.prompts import get_system_prompt
+from salary_agent.providers import get_model
+from salary_agent.repository import NewTransfer, insert_transfer
+from salary_agent.response_cache import ResponseCache
+from salary_agent.response_parser import ResponseParser, parse_response
+from salary_agent.results import ResultSink, continue_query, result_sink, run_query
+from salary_agent.router import FastPathRouter
+from salary_agent.sql_plans import SqlPlanCache
+from salary_agent.streaming import stream_run
+from salary_agent.tool_calls import tool_call, tool_stats, tool_turn
+from salary_agent.tracing import MAX_SQL_CHARS, TracedModel, hotspots, slow_queries, span
+from salary_agent.transfers import TransferRequest, transfer_batch
+
 # --- Configuration ---
 DB_FILE = "salary_agent.db"
 USDT_TOKEN_ADDRESS = "Es9vMFrzaCERmJfrF4H2FYD4KCoNkY11McCe8BenwNYB"
@@ -38,29 +58,17 @@ ASCII_ART = """
 """
 
 # --- Database Setup ---
-def init_db():
-    """Initializes the SQLite database and creates tables if they don't exist."""
-    with sqlite3.connect(DB_FILE) as conn:
-        cursor = conn.cursor()
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS persons (
-                name TEXT PRIMARY KEY,
-                address TEXT NOT NULL UNIQUE
-            )
-        ''')
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS transfers (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                from_person TEXT NOT NULL,
-                to_person TEXT NOT NULL,
-                amount REAL NOT NULL,
-                token TEXT NOT NULL,
-                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (from_person) REFERENCES persons (name),
-                FOREIGN KEY (to_person) REFERENCES persons (name)
-            )
-        ''')
-        conn.commit()
+# All tools share one pool of tuned, persistent connections instead of connecting per call.
+db_pool = get_pool(DB_FILE)
+# Reads (analytics SELECTs included) use read-only connections, so they never hold up payroll writes.
+db_read_pool = get_pool(DB_FILE, read_only=True)
+# Blocking sqlite3 work runs on a writer thread / reader pool, never on the event loop.
+db_executor = get_executor(db_pool, read_pool=db_read_pool)
+# Migrated up front: the system prompt below is introspected from the schema.
+init_db(db_pool)
+# Aggregates over transfers from a columnar copy, when SALARY_AGENT_ANALYTICS=1; None otherwise.
+analytics = get_analytics(db_executor)
+persons_directory = PersonsDirectory(db_executor)
 
 
 class TransferUSDCResponse(BaseModel):
@@ -71,146 +79,139 @@ class TransferUSDCResponse(BaseModel):
 
 # --- Agent and Tools ---
 
-model = OpenAIModel(
-    model_name='Qwen/Qwen3-235B-A22B-FP8',
-    provider=OpenAIProvider(base_url=IO_BASE_URL, api_key=IO_API_KEY),
-)
+# Shared, keep-alive HTTP client per process instead of a new connection per request.
+model = TracedModel(get_model('Qwen/Qwen3-235B-A22B-FP8', IO_BASE_URL, IO_API_KEY))
+
+# Introspected from the live schema once per process, so it cannot drift from the migrations.
+SYSTEM_PROMPT = get_system_prompt(db_pool)
 
 novel_salary_agent = Agent(
     model=model,
     deps_type=str,
     auto_execute_tools=True,
-    system_prompt=(
-        '''
-        YOU are a world-class Novel Salary Agent, an expert in managing Solana wallets and executing SQL queries.
-
-        **Your Response Structure:**
-        1.  **Think Step-by-Step:** First, analyze the user's request. Enclose your reasoning in <think> and </think> tags. Inside, explain which tool you will use. If using the SQL tool, write the exact SQL query you will execute.
-        2.  **Provide a Final, Clean Answer:** After the </think> tag, give the user the final answer.
-
-        **Available Tools:**
-        - You have simple tools for common tasks: `add_person`, `show_wallet_address`, `list_persons_with_addresses`, `transfer_sol`.
-        - **For any other database questions, you MUST use the `execute_sql_query` tool.** This is your primary tool for custom data retrieval and analysis.
-
-        **Database Schema for SQL Queries:**
-        You have access to the following two tables. Use this schema to construct your queries for the `execute_sql_query` tool.
-
-        ```sql
-        CREATE TABLE persons (
-            name TEXT PRIMARY KEY,
-            address TEXT NOT NULL UNIQUE
-        );
-
-        CREATE TABLE transfers (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            from_person TEXT NOT NULL,
-            to_person TEXT NOT NULL,
-            amount REAL NOT NULL,
-            token TEXT NOT NULL,
-            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
-        );
-        ```
-
-        **Example Query:** If the user asks "How many transfers has guru made?", you should think:
-        "<think>The user wants to count transfers from 'guru'. I will use the `execute_sql_query` tool. The query is: `SELECT COUNT(*) FROM transfers WHERE from_person = 'guru';`</think>"
-        Then, after the tool executes, you will present the result to the user. 
-        
-        Important : for transfer_usdc tool which returns json, make sure to show the json response in a formatted way in output along with your response.
-        '''
-    ),
+    system_prompt=SYSTEM_PROMPT,
 )
 
 
 # --- All Tools ---
 
+def _run_write(conn: sqlite3.Connection, query: str) -> str:
+    """Runs a non-SELECT statement on the writer thread, under the guardrails, and reports the affected rows."""
+    cursor = execute_guarded(conn, query)
+    return f"Query executed successfully. {cursor.rowcount} rows affected."
+
+
+class ConsoleResultSink(ResultSink):
+    """Prints each page of a SELECT result to the terminal as soon as it is fetched."""
+
+    def begin(self, columns, offset):
+        self.columns = columns
+        self.first_page = True
+
+    def add_rows(self, rows):
+        with span("render", what="result page", rows=len(rows)):
+            self._print_page(rows)
+
+    def _print_page(self, rows):
+        table = Table(
+            title="SQL Query Results" if self.first_page else None,
+            show_header=self.first_page, style="cyan", expand=True,
+        )
+        for col in self.columns:
+            table.add_column(col, style="magenta")
+        for row in rows:
+            table.add_row(*[str(item) for item in row])
+        console.print(table)
+        self.first_page = False
+
+    def end(self, result):
+        if result.truncated:
+            console.print(f"[dim]More rows available (continuation token {result.continuation}).[/dim]")
+
+
 @novel_salary_agent.tool_plain
+@tool_call(read_only=lambda query: query.strip().upper().startswith("SELECT"))
 async def execute_sql_query(query: str) -> str:
     """
     Executes a given SQL query on the database.
     Use this for any custom data requests that simple tools cannot handle.
-    Returns a formatted table for SELECT queries or a success message for other operations.
+    Returns a compact CSV summary (row count, column stats, rows) for SELECT queries or a success message for other operations.
+    Large SELECT results are capped; the reply then includes a continuation token for `fetch_more_results`.
+    Queries whose plan would scan too much are rejected with advice, and a SELECT without LIMIT gets one.
     """
     try:
-        with sqlite3.connect(DB_FILE) as conn:
-            cursor = conn.cursor()
-            cursor.execute(query)
-
-            # For SELECT statements, fetch and format the results
-            if query.strip().upper().startswith("SELECT"):
-                columns = [description[0] for description in cursor.description]
-                rows = cursor.fetchall()
-                conn.commit() # Commit is safe even for SELECT
-
-                if not rows:
-                    return "Query executed successfully, but returned no results."
-
-                table = Table(title="SQL Query Results", style="cyan", expand=True)
-                for col in columns:
-                    table.add_column(col, style="magenta")
-                for row in rows:
-                    table.add_row(*[str(item) for item in row])
-
-                from io import StringIO
-                string_io = StringIO()
-                temp_console = Console(file=string_io)
-                temp_console.print(table)
-                return string_io.getvalue()
-            
-            # For other statements (INSERT, UPDATE, DELETE), return status
-            else:
-                row_count = cursor.rowcount
-                conn.commit()
-                return f"Query executed successfully. {row_count} rows affected."
+        if query.strip().upper().startswith("SELECT"):
+            result = await analytics.run(query) if analytics else None
+            return encode_result(result or await run_query(db_executor, query))
+        with span("sql", sql=query[:MAX_SQL_CHARS], write=True):
+            return await db_executor.write(_run_write, query)
+    except sqlite3.Error as e:
+        return f"Database Error: {e}"
 
+
+@novel_salary_agent.tool_plain
+@tool_call(read_only=True)
+async def fetch_more_results(continuation_token: str) -> str:
+    """Returns the next rows of a capped `execute_sql_query` result, given its continuation token."""
+    try:
+        result = await continue_query(db_executor, continuation_token)
     except sqlite3.Error as e:
         return f"Database Error: {e}"
+    if result is None:
+        return f"Continuation token '{continuation_token}' is unknown or expired; run the query again."
+    return encode_result(result)
+
 
+def _format_persons(persons) -> str:
+    if not persons:
+        return "Query executed successfully, but returned no results."
+    return encode_rows(["name", "address"], persons, summary=f"{len(persons)} persons", stats=False)
 
 @novel_salary_agent.tool_plain
-def list_persons_with_addresses() -> str:
+@tool_call(read_only=True)
+async def list_persons_with_addresses() -> str:
     """Lists all persons and their wallet addresses from the database."""
-    return asyncio.run(execute_sql_query("SELECT name, address FROM persons ORDER BY name"))
+    try:
+        return await persons_directory.render(_format_persons)
+    except sqlite3.Error as e:
+        return f"Database error: {e}"
 
 @novel_salary_agent.tool_plain
+@tool_call(read_only=True)
 async def show_wallet_address(person: str) -> str:
     """Shows the wallet address of a specific person from the database."""
     try:
-        with sqlite3.connect(DB_FILE) as conn:
-            cursor = conn.cursor()
-            cursor.execute("SELECT address FROM persons WHERE name = ?", (person.lower(),))
-            result = cursor.fetchone()
-            if result:
-                return result[0]
-            else:
-                return f"Person '{person}' not found in the system."
+        address = await persons_directory.get_address(person)
+        if address:
+            return address
+        else:
+            return f"Person '{person}' not found in the system."
     except sqlite3.Error as e:
         return f"Database error: {e}"
 
 @novel_salary_agent.tool_plain
+@tool_call(read_only=False)
 async def add_person(person: str, address: str) -> str:
     """Adds a new person with their wallet address to the database if not already present."""
     try:
-        with sqlite3.connect(DB_FILE) as conn:
-            cursor = conn.cursor()
-            # Check if person or address already exists
-            cursor.execute("SELECT 1 FROM persons WHERE name = ? OR address = ?", (person.lower(), address))
-            if cursor.fetchone():
-                return f"Person '{person}' or address '{address}' already exists."
-            cursor.execute("INSERT INTO persons (name, address) VALUES (?, ?)", (person.lower(), address))
-            conn.commit()
-            return f"Action successful: Added '{person}' with address {address}."
+        if not await persons_directory.add(person, address):
+            return f"Person '{person}' or address '{address}' already exists."
+        return f"Action successful: Added '{person}' with address {address}."
     except sqlite3.Error as e:
         return f"Database error: {e}"
 
 @novel_salary_agent.tool_plain
+@tool_call(read_only=False)
 async def transfer_usdt(from_person: str, to_person: str, amount: float) -> str:
     """
     Transfers only usdt by recording the transaction and returns a JSON object confirming the details.
     """
-    # Insert the transfer into the database
-    insert_result = await execute_sql_query(
-        f"INSERT INTO transfers (from_person, to_person, amount, token) VALUES ('{from_person.lower()}', '{to_person.lower()}', {amount}, '{USDT_TOKEN_ADDRESS}');"
-    )
+    # Insert the transfer into the database with the prepared, parameterized statement
+    transfer = NewTransfer(from_person.lower(), to_person.lower(), amount, USDT_TOKEN_ADDRESS)
+    try:
+        await db_executor.write(insert_transfer, transfer)
+    except sqlite3.Error as e:
+        return f"Database Error: {e}"
     # Prepare the response JSON
     response = TransferUSDCResponse(
         sender=from_person,
@@ -221,6 +222,36 @@ async def transfer_usdt(from_person: str, to_person: str, amount: float) -> str:
     return response.model_dump_json(indent=2)
 
 @novel_salary_agent.tool_plain
+@tool_call(read_only=False)
+async def transfer_usdt_batch(transfers: List[TransferRequest]) -> str:
+    """
+    Records many usdt transfers (e.g. a payroll run) in one call and one transaction.
+    The batch is all-or-nothing: if any row names an unknown person or an invalid amount, nothing is recorded.
+    Returns a compact JSON summary instead of one confirmation per transfer.
+    """
+    try:
+        summary = await transfer_batch(db_executor, transfers, USDT_TOKEN_ADDRESS)
+    except sqlite3.Error as e:
+        return f"Database Error: {e}"
+    return summary.model_dump_json(exclude_none=True)
+
+@novel_salary_agent.tool_plain
+@tool_call(read_only=True)
+async def get_balance_summary(person: str) -> str:
+    """
+    Returns a person's sent/received totals and counts, net balance and last activity as JSON.
+    Served from maintained aggregate tables, so prefer it over SUM/COUNT queries on transfers for per-person totals.
+    """
+    try:
+        summary = await db_executor.read(balances.get_balance_summary, person)
+    except sqlite3.Error as e:
+        return f"Database Error: {e}"
+    if summary is None:
+        return f"Person '{person}' not found in the system."
+    return summary.model_dump_json()
+
+@novel_salary_agent.tool_plain
+@tool_call(read_only=True)
 async def format_json_response(data: dict) -> str:
     """Formats a dictionary as a JSON string with syntax highlighting."""
     try:
@@ -228,42 +259,183 @@ async def format_json_response(data: dict) -> str:
         return Syntax(json_str, "json", theme="solarized-dark", line_numbers=True).render()
     except Exception as e:
         return f"Error formatting JSON: {e}"
-# --- Main Application Logic ---
+# --- Fast Path ---
+# Simple commands are dispatched straight to these tools without a model round-trip.
+fast_router = FastPathRouter({
+    "list_persons_with_addresses": list_persons_with_addresses,
+    "show_wallet_address": show_wallet_address,
+    "add_person": add_person,
+    "transfer_usdt": transfer_usdt,
+    "get_balance_summary": get_balance_summary,
+})
+
+# --- Response Cache ---
+# Read-only questions are answered from here until the tables they read change.
+response_cache = ResponseCache(db_executor)
+
+# --- SQL Plans ---
+# Questions shaped like one the agent already answered with SQL reuse that SQL with new values.
+sql_plans = SqlPlanCache(db_executor, persons_directory)
+
+# Prior turns of this terminal session, compacted under a token budget and sent as message history.
+memory = ConversationMemory(SYSTEM_PROMPT)
 
-def parse_and_display_response(raw_output: str):
-    """Parses agent output to separate thinking from the final response."""
-    think_pattern = re.compile(r"<think>(.*?)</think>", re.DOTALL)
-    think_match = think_pattern.search(raw_output)
+# --- Main Application Logic ---
 
-    if think_match:
-        thinking_text = think_match.group(1).strip()
-        console.print(Panel(
-            f"[yellow]{thinking_text}[/yellow]",
+def render_response(parsed: ResponseParser):
+    """Builds the thinking panel and final answer for (possibly partial) parsed agent output."""
+    parts = []
+    if parsed.thinking:
+        parts.append(Panel(
+            Text(parsed.thinking, style="yellow"),
             title="🤔 Agent Thinking",
             border_style="yellow",
             expand=False
         ))
-        final_output = think_pattern.sub("", raw_output).strip()
-    else:
-        final_output = raw_output
 
+    final_output = parsed.answer
     if not final_output:
-        console.print("[dim]Agent provided thoughts but no final answer.[/dim]")
-        return
-        
-    console.print(f"[bold green]Agent:[/bold green]")
-    try:
-        if final_output.strip().startswith('{') and final_output.strip().endswith('}'):
-             console.print(Syntax(final_output, "json", theme="solarized-dark", line_numbers=True))
+        if parsed.thinking:
+            parts.append(Text("Agent provided thoughts but no final answer.", style="dim"))
+        return Group(*parts)
+
+    parts.append(Text("Agent:", style="bold green"))
+    if parsed.looks_like_json:
+        parts.append(Syntax(final_output, "json", theme="solarized-dark", line_numbers=True))
+    else:
+        parts.append(Text(f" {final_output}"))
+    return Group(*parts)
+
+
+class LiveResponse:
+    """Renders the parser's current state whenever rich.Live refreshes, not on every token."""
+
+    def __init__(self, parsed: ResponseParser):
+        self.parsed = parsed
+
+    def __rich__(self):
+        if not self.parsed.thinking and not self.parsed.answer:
+            return Spinner("dots", text="[bold green]Agent is processing...[/bold green]")
+        return render_response(self.parsed)
+
+
+def parse_and_display_response(raw_output: str):
+    """Parses agent output to separate thinking from the final response."""
+    with span("render", what="response"):
+        console.print(render_response(parse_response(raw_output)))
+
+
+async def run_agent_streaming(prompt: str):
+    """Runs the agent with the conversation so far, redrawing the thinking panel and answer live as tokens arrive."""
+    parsed = ResponseParser()
+    async with tool_turn() as turn:
+        with Live(LiveResponse(parsed), console=console, refresh_per_second=12,
+                  vertical_overflow="visible") as live:
+            result = await stream_run(novel_salary_agent, prompt, parsed.feed,
+                                      message_history=memory.history())
+            # The streamed text spans every model request; settle on the final answer.
+            with span("render", what="response"):
+                live.update(render_response(parse_response(result.output)), refresh=True)
+    if turn.timings:
+        console.print(f"[dim]🔧 {turn.summary()}[/dim]")
+    return result
+
+
+def display_stats():
+    """Prints fast-path, cache, connection pool and tool timing metrics, then traced hotspots."""
+    router_stats = fast_router.stats()
+    table = Table(title="Session Stats", style="cyan")
+    table.add_column("metric", style="magenta")
+    table.add_column("value")
+    table.add_row("fast path hit rate", f"{router_stats.hit_rate:.0%}")
+    table.add_row("fast path answers", str(router_stats.routed))
+    table.add_row("agent fallbacks", str(router_stats.fallbacks))
+    for intent, count in router_stats.by_intent.most_common():
+        table.add_row(f"  {intent}", str(count))
+    cache_stats = response_cache.stats()
+    table.add_row("response cache hit rate", f"{cache_stats.hit_rate:.0%}")
+    table.add_row("response cache hits / misses", f"{cache_stats.hits} / {cache_stats.misses}")
+    table.add_row("response cache invalidations", str(cache_stats.invalidations))
+    plan_stats = sql_plans.stats()
+    table.add_row("saved SQL plans (answers)", f"{len(sql_plans.plans())} ({plan_stats.hits})")
+    table.add_row("history turns (~tokens)", f"{len(memory)} (~{memory.tokens})")
+    table.add_row("history compacted / dropped", f"{memory.compacted} / {memory.dropped}")
+    for label, pool in (("db", db_pool), ("db read-only", db_read_pool)):
+        pool_stats = pool.stats()
+        table.add_row(f"{label} connections (idle/in use)", f"{pool_stats.idle}/{pool_stats.in_use}")
+        table.add_row(f"{label} checkouts (reused)", f"{pool_stats.checkouts} ({pool_stats.reused})")
+        table.add_row(f"{label} pool waits / timeouts", f"{pool_stats.waits} / {pool_stats.timeouts}")
+    if analytics:
+        analytics_stats = analytics.stats()
+        table.add_row("columnar answers / fallbacks", f"{analytics_stats.served} / {analytics_stats.fallbacks}")
+        table.add_row("columnar rows (segments)", f"{analytics_stats.rows} ({analytics_stats.segments})")
+    table.add_row("model http clients created", str(model.clients_created))
+    for tool, (calls, mean_seconds) in sorted(tool_stats().items()):
+        table.add_row(f"tool {tool} (calls, mean)", f"{calls}, {mean_seconds * 1000:.1f} ms")
+    console.print(table)
+
+    spans = Table(title="Hotspots (time by span)", style="cyan")
+    for column in ("span", "calls", "total ms", "mean ms", "p95 ms", "max ms", "errors"):
+        spans.add_column(column, style="magenta" if column == "span" else None, no_wrap=column == "span")
+    for h in hotspots():
+        spans.add_row(h.name, str(h.calls), f"{h.total_seconds * 1000:.1f}", f"{h.mean_seconds * 1000:.1f}",
+                      f"{h.p95_seconds * 1000:.1f}", f"{h.max_seconds * 1000:.1f}", str(h.errors))
+    console.print(spans)
+
+    queries = slow_queries()
+    if queries:
+        slow = Table(title="Slowest SQL (total time)", style="cyan")
+        slow.add_column("sql", style="magenta", overflow="fold")
+        slow.add_column("calls")
+        slow.add_column("total ms")
+        slow.add_column("max ms")
+        for q in queries:
+            slow.add_row(q.name, str(q.calls), f"{q.total_seconds * 1000:.1f}", f"{q.max_seconds * 1000:.1f}")
+        console.print(slow)
+
+
+async def answer_turn(user_input: str):
+    """One turn: fast path, saved SQL plan, response cache, then the streaming agent."""
+    with span("turn", prompt=user_input) as turn:
+        routed = await fast_router.route(user_input)
+        if routed is not None:
+            turn.set(source="fast_path")
+            console.rule(style="dim white")
+            console.print(f"[dim]⚡ Answered directly by {routed.tool} (no model call).[/dim]")
+            parse_and_display_response(routed.output)
+            memory.add_exchange(user_input, routed.output)
+            console.rule(style="dim white")
+            return
+
+        planned = await sql_plans.answer(user_input)
+        if planned is not None:
+            turn.set(source="sql_plan")
+            console.print(f"[dim]⚡ {planned.summary}[/dim]")
+            memory.add_exchange(user_input, planned.output)
+            console.rule(style="dim white")
+            return
+
+        console.rule(style="dim white")
+        follow_up = memory.depends_on_history(user_input)
+        agent_response = await response_cache.run(user_input, run_agent_streaming, memory.cache_context(user_input))
+        if agent_response.cached:
+            turn.set(source="cache")
+            console.print("[dim]♻ Answered from the response cache (data unchanged).[/dim]")
+            parse_and_display_response(agent_response.output)
+            memory.add_exchange(user_input, agent_response.output)
         else:
-            console.print(f" {final_output}")
-    except Exception:
-         console.print(f" {final_output}")
+            turn.set(source="agent")
+            memory.add_run(agent_response.result.new_messages())
+            # SQL written for a follow-up may depend on earlier turns; only learn standalone questions.
+            if not follow_up:
+                await sql_plans.learn(user_input, agent_response.result.all_messages())
+        console.rule(style="dim white")
 
 
 async def main():
     """Main function to run the interactive terminal agent."""
-    init_db()
+    # SELECT results stream to the terminal page by page while the agent works.
+    result_sink.set(ConsoleResultSink())
     person_address = {
         'guru': '3N2k1z5Z7g8d9f4e2b6c3a1b2d4e5f6g7h8i9j0k1l2m3n4o5p6q7r8s9t0u1v2',
         'madhur': '1A2b3C4d5E6f7G8h9I0j1K2l3M4n5O6p7Q8r9S0t1U2v3W4x5Y6z7A8b9C0d1E2',
@@ -282,7 +454,7 @@ async def main():
         style="blue"
     ))
     console.print("[bold green] Powered by IO Intelligence API and Pydantic AI[/bold green]")
-    console.print("Type [bold red]exit[/bold red] or [bold red]quit[/bold red] to end the session.")
+    console.print("Type [bold red]exit[/bold red] or [bold red]quit[/bold red] to end the session, [bold]/stats[/bold] for session metrics, [bold]/clear[/bold] to forget the conversation.")
     
     while True:
         try:
@@ -294,12 +466,16 @@ async def main():
             if not user_input.strip():
                 continue
 
-            with console.status("[bold green]Agent is processing...[/bold green]", spinner="dots"):
-                agent_response = await novel_salary_agent.run(user_input)
+            if user_input.strip() == "/stats":
+                display_stats()
+                continue
 
-            console.rule(style="dim white")
-            parse_and_display_response(agent_response.output)
-            console.rule(style="dim white")
+            if user_input.strip() == "/clear":
+                memory.clear()
+                console.print("[dim]Conversation history cleared.[/dim]")
+                continue
+
+            await answer_turn(user_input)
 
         except Exception as e:
             console.print(f"[bold red]An error occurred: {e}[/bold red]")
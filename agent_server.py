@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+HTTP server hosting ``novel_salary_agent`` for many concurrent sessions.
+
+    python agent_server.py --port 8000 --max-concurrent 8
+
+    POST   /sessions                     -> {"session_id": ...}
+    POST   /sessions/{id}/messages       {"prompt": "..."} -> answer, thinking, source, results
+    DELETE /sessions/{id}
+    GET    /stats, /health
+
+Messages within a session are answered in order, with its earlier turns as
+context; sessions run concurrently.
+Model calls go through a bounded FIFO scheduler (503 + Retry-After when its
+queue is full) and each session accepts only a few queued messages (429).
+All sessions share the process-wide ``DBExecutor``: reads use its reader
+pool and every write goes through its single writer thread, so run one
+server process per database file.
+"""
+
+import argparse
+import asyncio
+import dataclasses
+import sqlite3
+from contextlib import asynccontextmanager
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+
+from agent_cli import (
+    SYSTEM_PROMPT, analytics, db_executor, db_pool, db_read_pool, fast_router, novel_salary_agent, response_cache,
+    sql_plans,
+)
+from salary_agent.db import init_db
+from salary_agent.memory import ConversationMemory
+from salary_agent.response_parser import parse_response
+from salary_agent.results import ResultSink, result_sink
+from salary_agent.scheduler import DEFAULT_MAX_CONCURRENT, DEFAULT_MAX_WAITING, ModelScheduler, Overloaded
+from salary_agent.sessions import (
+    DEFAULT_IDLE_TTL, DEFAULT_MAX_PENDING, DEFAULT_MAX_SESSIONS, Session, SessionBusy, SessionManager,
+    TooManySessions,
+)
+from salary_agent.tool_calls import ToolTurn, tool_stats, tool_turn
+from salary_agent.tracing import hotspots, run_attributes, slow_queries, span
+
+# How often idle sessions are reaped.
+REAP_INTERVAL = 60.0
+
+
+class CollectingResultSink(ResultSink):
+    """Keeps each SELECT result of a turn so it can be returned alongside the answer."""
+
+    def __init__(self):
+        self.results = []
+
+    def begin(self, columns, offset):
+        self.results.append({"columns": list(columns), "rows": [], "offset": offset})
+
+    def add_rows(self, rows):
+        self.results[-1]["rows"].extend(list(row) for row in rows)
+
+    def end(self, result):
+        self.results[-1]["truncated"] = result.truncated
+        if result.continuation:
+            self.results[-1]["continuation"] = result.continuation
+
+
+def _ping(conn: sqlite3.Connection):
+    conn.execute("SELECT 1").fetchone()
+
+
+def _reply(output: str, source: str, sink: CollectingResultSink, turn: ToolTurn) -> dict:
+    parsed = parse_response(output)
+    reply = {"answer": parsed.answer, "thinking": parsed.thinking, "source": source, "results": sink.results}
+    if turn.timings:
+        reply["tools"] = {
+            "wall_ms": round(turn.wall_seconds * 1000, 1),
+            "calls": [{"name": t.name, "read_only": t.read_only, "ms": round(t.seconds * 1000, 1), "ok": t.ok}
+                      for t in turn.timings],
+        }
+    return reply
+
+
+def create_app(max_concurrent: int = DEFAULT_MAX_CONCURRENT, max_waiting: int = DEFAULT_MAX_WAITING,
+               max_sessions: int = DEFAULT_MAX_SESSIONS, max_pending: int = DEFAULT_MAX_PENDING,
+               idle_ttl: float = DEFAULT_IDLE_TTL) -> Starlette:
+    scheduler = ModelScheduler(max_concurrent, max_waiting)
+
+    async def run_agent(prompt: str, memory: ConversationMemory):
+        with span("agent run", prompt=prompt, streamed=False) as s:
+            result = await scheduler.run(novel_salary_agent.run, prompt, message_history=memory.history())
+            s.set(**run_attributes(result))
+            return result
+
+    async def answer(session: Session, prompt: str) -> dict:
+        """One turn: fast path, saved SQL plan, response cache, then the (scheduled) agent with the session's history."""
+        memory = session.state.setdefault("memory", ConversationMemory(SYSTEM_PROMPT))
+        sink = CollectingResultSink()
+        sink_token = result_sink.set(sink)
+        try:
+            with span("turn", prompt=prompt, session=session.id) as traced:
+                async with tool_turn() as turn:
+                    routed = await fast_router.route(prompt)
+                    if routed is not None:
+                        traced.set(source="fast_path")
+                        memory.add_exchange(prompt, routed.output)
+                        return _reply(routed.output, "fast_path", sink, turn)
+                    planned = await sql_plans.answer(prompt)
+                    if planned is not None:
+                        traced.set(source="sql_plan")
+                        memory.add_exchange(prompt, planned.output)
+                        return _reply(planned.output, "sql_plan", sink, turn)
+                    follow_up = memory.depends_on_history(prompt)
+                    response = await response_cache.run(prompt, lambda p: run_agent(p, memory), memory.cache_context(prompt))
+                    if response.cached:
+                        traced.set(source="cache")
+                        memory.add_exchange(prompt, response.output)
+                        return _reply(response.output, "cache", sink, turn)
+                    traced.set(source="agent")
+                    memory.add_run(response.result.new_messages())
+                    # SQL written for a follow-up may depend on earlier turns; only learn standalone questions.
+                    if not follow_up:
+                        await sql_plans.learn(prompt, response.result.all_messages())
+                    return _reply(response.output, "agent", sink, turn)
+        finally:
+            result_sink.reset(sink_token)
+
+    sessions = SessionManager(answer, max_sessions, max_pending, idle_ttl)
+
+    async def create_session(request: Request):
+        try:
+            session = sessions.create()
+        except TooManySessions as e:
+            return JSONResponse({"error": str(e)}, status_code=503, headers={"Retry-After": "30"})
+        return JSONResponse({"session_id": session.id}, status_code=201)
+
+    async def post_message(request: Request):
+        session = sessions.get(request.path_params["session_id"])
+        if session is None:
+            return JSONResponse({"error": "Unknown or expired session."}, status_code=404)
+        try:
+            body = await request.json()
+        except ValueError:
+            body = None
+        prompt = body.get("prompt") if isinstance(body, dict) else None
+        if not isinstance(prompt, str) or not prompt.strip():
+            return JSONResponse({"error": "Body must be JSON with a non-empty 'prompt'."}, status_code=400)
+        try:
+            return JSONResponse(await sessions.submit(session, prompt))
+        except SessionBusy as e:
+            return JSONResponse({"error": str(e)}, status_code=429, headers={"Retry-After": "1"})
+        except Overloaded as e:
+            return JSONResponse({"error": str(e)}, status_code=503,
+                                headers={"Retry-After": str(round(e.retry_after))})
+        except Exception as e:
+            return JSONResponse({"error": f"An error occurred: {e}"}, status_code=500)
+
+    async def delete_session(request: Request):
+        closed = await sessions.close(request.path_params["session_id"])
+        return Response(status_code=204 if closed else 404)
+
+    async def stats(request: Request):
+        router_stats = fast_router.stats()
+        return JSONResponse({
+            "scheduler": dataclasses.asdict(scheduler.stats()),
+            "sessions": dataclasses.asdict(sessions.stats()),
+            "fast_path": {"routed": router_stats.routed, "fallbacks": router_stats.fallbacks,
+                          "hit_rate": router_stats.hit_rate},
+            "response_cache": dataclasses.asdict(response_cache.stats()),
+            "sql_plans": dataclasses.asdict(sql_plans.stats()),
+            "db_pool": dataclasses.asdict(db_pool.stats()),
+            "db_read_pool": dataclasses.asdict(db_read_pool.stats()),
+            "analytics": dataclasses.asdict(analytics.stats()) if analytics else None,
+            "tools": {name: {"calls": calls, "mean_ms": round(mean * 1000, 2)}
+                      for name, (calls, mean) in tool_stats().items()},
+            "hotspots": [dataclasses.asdict(h) for h in hotspots()],
+            "slow_queries": [dataclasses.asdict(q) for q in slow_queries()],
+        })
+
+    async def health(request: Request):
+        try:
+            await db_executor.read(_ping)
+        except sqlite3.Error as e:
+            return JSONResponse({"status": "error", "error": str(e)}, status_code=503)
+        return JSONResponse({"status": "ok"})
+
+    @asynccontextmanager
+    async def lifespan(app: Starlette):
+        init_db(db_pool)
+
+        async def reap():
+            while True:
+                await asyncio.sleep(REAP_INTERVAL)
+                sessions.reap_idle()
+
+        reaper = asyncio.create_task(reap())
+        try:
+            yield
+        finally:
+            reaper.cancel()
+            await sessions.close_all()
+
+    return Starlette(routes=[
+        Route("/sessions", create_session, methods=["POST"]),
+        Route("/sessions/{session_id}/messages", post_message, methods=["POST"]),
+        Route("/sessions/{session_id}", delete_session, methods=["DELETE"]),
+        Route("/stats", stats, methods=["GET"]),
+        Route("/health", health, methods=["GET"]),
+    ], lifespan=lifespan)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--max-concurrent", type=int, default=DEFAULT_MAX_CONCURRENT,
+                        help="model runs in flight at once")
+    parser.add_argument("--max-waiting", type=int, default=DEFAULT_MAX_WAITING,
+                        help="model runs allowed to queue before requests get 503")
+    parser.add_argument("--max-sessions", type=int, default=DEFAULT_MAX_SESSIONS)
+    parser.add_argument("--max-pending", type=int, default=DEFAULT_MAX_PENDING,
+                        help="queued messages per session before requests get 429")
+    args = parser.parse_args()
+    app = create_app(args.max_concurrent, args.max_waiting, args.max_sessions, args.max_pending)
+    # One worker: every write must go through this process's single SQLite writer.
+    uvicorn.run(app, host=args.host, port=args.port, workers=1)
+
+
+if __name__ == "__main__":
+    main()
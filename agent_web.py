@@ -1,21 +1,46 @@
 #!/usr/bin/env python3
 
-import asyncio
 import sqlite3
 import json
-import re
+import queue
+import time
 from typing import List
 
+import pandas as pd
+
 from pydantic_ai import Agent
-from pydantic_ai.models.openai import OpenAIModel
-from pydantic_ai.providers.openai import OpenAIProvider
 from pydantic import BaseModel
 import streamlit as st
 st.set_page_config(page_title="Novel Salary Agent Chat", page_icon="💸", layout="wide")
 
+from salary_agent import balances
+from salary_agent.analytics import get_analytics
+from salary_agent.background import BackgroundLoop
+from salary_agent.db import get_pool, init_db
+from salary_agent.directory import PersonsDirectory
+from salary_agent.encoding import encode_result, encode_rows
+from salary_agent.executor import get_executor
+from salary_agent.guardrails import execute_guarded
+from salary_agent.memory import ConversationMemory
+from salary_agent.prompts import get_system_prompt
+from salary_agent.providers import get_model
+from salary_agent.repository import NewTransfer, insert_transfer
+from salary_agent.response_cache import ResponseCache
+from salary_agent.response_parser import ResponseParser, parse_response
+from salary_agent.results import ResultSink, continue_query, result_sink, run_query
+from salary_agent.router import FastPathRouter, RouterStats
+from salary_agent.sql_plans import SqlPlanCache
+from salary_agent.streaming import stream_run
+from salary_agent.tool_calls import tool_call, tool_turn
+from salary_agent.tracing import MAX_SQL_CHARS, TracedModel, span
+from salary_agent.transfers import TransferRequest, transfer_batch
+
 # --- Configuration & Setup ---
 # Ensures both CLI and Streamlit app use the same database file
 DB_FILE = "salary_agent.db"
+# Chat messages kept per browser session, and how many of the latest are drawn on each rerun.
+MAX_STORED_MESSAGES = 200
+RENDERED_MESSAGES = 20
 USDT_TOKEN_ADDRESS = "Es9vMFrzaCERmJfrF4H2FYD4KCoNkY11McCe8BenwNYB"
 
 # IO Intelligence API configuration
@@ -31,29 +56,35 @@ ASCII_ART = """
 """
 
 # --- Database Setup ---
-def init_db():
-    """Initializes the SQLite database and creates tables if they don't exist."""
-    with sqlite3.connect(DB_FILE) as conn:
-        cursor = conn.cursor()
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS persons (
-                name TEXT PRIMARY KEY,
-                address TEXT NOT NULL UNIQUE
-            )
-        ''')
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS transfers (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                from_person TEXT NOT NULL,
-                to_person TEXT NOT NULL,
-                amount REAL NOT NULL,
-                token TEXT NOT NULL,
-                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (from_person) REFERENCES persons (name),
-                FOREIGN KEY (to_person) REFERENCES persons (name)
-            )
-        ''')
-        conn.commit()
+# All tools share one pool of tuned, persistent connections instead of connecting per call.
+db_pool = get_pool(DB_FILE)
+# Reads (analytics SELECTs included) use read-only connections, so they never hold up payroll writes.
+db_read_pool = get_pool(DB_FILE, read_only=True)
+# Blocking sqlite3 work runs on a writer thread / reader pool, never on the event loop.
+db_executor = get_executor(db_pool, read_pool=db_read_pool)
+# Migrated up front: the system prompt is introspected from the schema.
+init_db(db_pool)
+# Aggregates over transfers from a columnar copy, when SALARY_AGENT_ANALYTICS=1; None otherwise.
+analytics = get_analytics(db_executor)
+
+@st.cache_resource
+def get_persons_directory():
+    """One cached persons view per server process, shared by all reruns and sessions."""
+    return PersonsDirectory(db_executor)
+
+persons_directory = get_persons_directory()
+
+
+@st.cache_resource
+def get_agent_loop():
+    """
+    One event loop thread per server process for all agent and database coroutines, so pooled
+    HTTP connections, caches and in-flight tasks survive across messages and reruns.
+    """
+    return BackgroundLoop("agent-loop")
+
+agent_loop = get_agent_loop()
+
 
 class TransferUSDCResponse(BaseModel):
     sender: str
@@ -61,84 +92,152 @@ class TransferUSDCResponse(BaseModel):
     amount: float
     token: str = USDT_TOKEN_ADDRESS
 
+# --- All Tools (Identical to CLI, but adapted for Streamlit's async context) ---
+def _run_write(conn: sqlite3.Connection, query: str) -> str:
+    return f"Query executed successfully. {execute_guarded(conn, query).rowcount} rows affected."
+
+@tool_call(read_only=lambda query: query.strip().upper().startswith("SELECT"))
+async def execute_sql_query(query: str) -> str:
+    """
+    Executes a SQL query. For SELECT, returns a compact CSV summary (row count, column stats, rows); the full
+    result is shown to the user separately. For others, a status message.
+    Large SELECT results are capped; the summary then includes a continuation token for `fetch_more_results`.
+    Queries whose plan would scan too much are rejected with advice, and a SELECT without LIMIT gets one.
+    """
+    try:
+        if query.strip().upper().startswith("SELECT"):
+            result = await analytics.run(query) if analytics else None
+            return encode_result(result or await run_query(db_executor, query))
+        with span("sql", sql=query[:MAX_SQL_CHARS], write=True):
+            return await db_executor.write(_run_write, query)
+    except sqlite3.Error as e: return f"Database Error: {e}"
+
+@tool_call(read_only=True)
+async def fetch_more_results(continuation_token: str) -> str:
+    """Returns the next rows of a capped `execute_sql_query` result, given its continuation token."""
+    try:
+        result = await continue_query(db_executor, continuation_token)
+    except sqlite3.Error as e: return f"Database Error: {e}"
+    if result is None:
+        return f"Continuation token '{continuation_token}' is unknown or expired; run the query again."
+    return encode_result(result)
+
+def _format_persons(persons) -> str:
+    if not persons: return "Query executed, but returned no results."
+    return encode_rows(["name", "address"], persons, summary=f"{len(persons)} persons", stats=False)
+
+@tool_call(read_only=True)
+async def list_persons_with_addresses() -> str:
+    """Lists all persons and their wallet addresses from the database."""
+    try:
+        return await persons_directory.render(_format_persons)
+    except sqlite3.Error as e: return f"Database Error: {e}"
+
+@tool_call(read_only=False)
+async def add_person(person: str, address: str) -> str:
+    """Adds a new person with their wallet address to the database if not already present."""
+    try:
+        if not await persons_directory.add(person, address):
+            return f"Person '{person}' or address '{address}' already exists."
+        return f"Action successful: Added '{person}' with address {address}."
+    except sqlite3.Error as e: return f"Database Error: {e}"
+
+@tool_call(read_only=False)
+async def transfer_usdt(from_person: str, to_person: str, amount: float) -> str:
+    """Transfers only usdt by recording the transaction and returns a JSON object confirming the details."""
+    transfer = NewTransfer(from_person.lower(), to_person.lower(), amount, USDT_TOKEN_ADDRESS)
+    try:
+        await db_executor.write(insert_transfer, transfer)
+    except sqlite3.Error as e: return f"Database Error: {e}"
+    response = TransferUSDCResponse(sender=from_person, receiver=to_person, amount=amount)
+    return response.model_dump_json(indent=2)
+
+@tool_call(read_only=False)
+async def transfer_usdt_batch(transfers: List[TransferRequest]) -> str:
+    """
+    Records many usdt transfers (e.g. a payroll run) in one call and one transaction.
+    The batch is all-or-nothing: if any row names an unknown person or an invalid amount, nothing is recorded.
+    Returns a compact JSON summary instead of one confirmation per transfer.
+    """
+    try:
+        summary = await transfer_batch(db_executor, transfers, USDT_TOKEN_ADDRESS)
+    except sqlite3.Error as e:
+        return f"Database Error: {e}"
+    return summary.model_dump_json(exclude_none=True)
+
+@tool_call(read_only=True)
+async def get_balance_summary(person: str) -> str:
+    """
+    Returns a person's sent/received totals and counts, net balance and last activity as JSON.
+    Served from maintained aggregate tables, so prefer it over SUM/COUNT queries on transfers for per-person totals.
+    """
+    try:
+        summary = await db_executor.read(balances.get_balance_summary, person)
+    except sqlite3.Error as e: return f"Database Error: {e}"
+    if summary is None:
+        return f"Person '{person}' not found in the system."
+    return summary.model_dump_json()
+
+
 # --- Agent Definition (Identical to CLI) ---
-# @st.cache_resource
+# Introspected from the live schema once per process, so it cannot drift from the migrations.
+SYSTEM_PROMPT = get_system_prompt(db_pool)
+
+@st.cache_resource
 def get_agent():
-    """Caches the agent for performance across reruns."""
-    model = OpenAIModel(
-        model_name='Qwen/Qwen3-235B-A22B-FP8',
-        provider=OpenAIProvider(base_url=IO_BASE_URL, api_key=IO_API_KEY),
-    )
+    """Builds the agent once per server process; reruns reuse it along with its pooled HTTP client."""
+    # Tools are passed at construction: decorating a cached agent would re-register them on every rerun.
     return Agent(
-        model=model,
+        model=TracedModel(get_model('Qwen/Qwen3-235B-A22B-FP8', IO_BASE_URL, IO_API_KEY)),
+        tools=[
+            execute_sql_query, fetch_more_results, list_persons_with_addresses, add_person,
+            transfer_usdt, transfer_usdt_batch, get_balance_summary,
+        ],
         deps_type=str,
         auto_execute_tools=True,
-        system_prompt=(
-            '''
-            YOU are a world-class Novel Salary Agent, an expert in managing Solana wallets and executing SQL queries.
-
-            **Your Response Structure:**
-            1.  **Think Step-by-Step:** First, analyze the user's request. Enclose your reasoning in <think> and </think> tags. Inside, explain which tool you will use. If using the SQL tool, write the exact SQL query you will execute.
-            2.  **Provide a Final, Clean Answer:** After the </think> tag, give the user the final answer.
-
-            **Database Schema for SQL Queries:**
-            You have access to the following two tables. Use this schema to construct your queries for the `execute_sql_query` tool.
-
-            ```sql
-            CREATE TABLE persons (name TEXT PRIMARY KEY, address TEXT NOT NULL UNIQUE);
-            CREATE TABLE transfers (id INTEGER PRIMARY KEY, from_person TEXT, to_person TEXT, amount REAL, token TEXT, timestamp DATETIME);
-            ```
-            Important : for transfer_usdt tool which returns json, make sure to show the json response in a formatted way in output along with your response.
-            '''
-        ),
+        system_prompt=SYSTEM_PROMPT,
     )
 
 novel_salary_agent = get_agent()
 
-# --- All Tools (Identical to CLI, but adapted for Streamlit's async context) ---
-@novel_salary_agent.tool_plain
-async def execute_sql_query(query: str) -> str:
-    """Executes a SQL query. For SELECT, returns a JSON string with columns and data. For others, a status message."""
-    try:
-        with sqlite3.connect(DB_FILE) as conn:
-            cursor = conn.cursor()
-            cursor.execute(query)
-            if query.strip().upper().startswith("SELECT"):
-                columns = [desc[0] for desc in cursor.description]
-                rows = cursor.fetchall()
-                conn.commit()
-                if not rows: return "Query executed, but returned no results."
-                # Return a JSON string for the agent and for the UI to parse
-                return json.dumps({"type": "dataframe", "columns": columns, "data": rows})
-            else:
-                rc = cursor.rowcount
-                conn.commit()
-                return f"Query executed successfully. {rc} rows affected."
-    except sqlite3.Error as e: return f"Database Error: {e}"
 
-# (Other tools remain the same, as they ultimately call execute_sql_query or return specific formats)
-@novel_salary_agent.tool_plain
-def list_persons_with_addresses() -> str:
-    return asyncio.run(execute_sql_query("SELECT name, address FROM persons ORDER BY name"))
+# --- Fast Path ---
+@st.cache_resource
+def get_router_stats():
+    """Fast-path hit/miss counters shared by every session of this server process."""
+    return RouterStats()
 
-@novel_salary_agent.tool_plain
-async def add_person(person: str, address: str) -> str:
-    return await execute_sql_query(f"INSERT OR IGNORE INTO persons (name, address) VALUES ('{person.lower()}', '{address}')")
+# Simple commands are dispatched straight to these tools without a model round-trip.
+fast_router = FastPathRouter({
+    "list_persons_with_addresses": list_persons_with_addresses,
+    "add_person": add_person,
+    "transfer_usdt": transfer_usdt,
+    "get_balance_summary": get_balance_summary,
+}, stats=get_router_stats())
 
-@novel_salary_agent.tool_plain
-async def transfer_usdt(from_person: str, to_person: str, amount: float) -> str:
-    await execute_sql_query(
-        f"INSERT INTO transfers (from_person, to_person, amount, token) VALUES ('{from_person.lower()}', '{to_person.lower()}', {amount}, '{USDT_TOKEN_ADDRESS}');"
-    )
-    response = TransferUSDCResponse(sender=from_person, receiver=to_person, amount=amount)
-    return response.model_dump_json(indent=2)
+
+# --- Response Cache ---
+@st.cache_resource
+def get_response_cache():
+    """Answers to read-only questions, shared by every session until the data they read changes."""
+    return ResponseCache(db_executor)
+
+response_cache = get_response_cache()
+
+
+# --- SQL Plans ---
+@st.cache_resource
+def get_sql_plans():
+    """SQL learned from earlier agent answers, reused for questions of the same shape."""
+    return SqlPlanCache(db_executor, persons_directory)
+
+sql_plans = get_sql_plans()
 
 
 # --- Streamlit Application UI ---
 
 
-# Run DB initialization and seeding once
-init_db()
+# Seed the database once per session
 if 'db_seeded' not in st.session_state:
     with st.spinner("Seeding initial database..."):
         initial_persons = {
@@ -150,7 +249,7 @@ if 'db_seeded' not in st.session_state:
         for person, address in initial_persons.items():
             try:
                 # Use a synchronous connection for setup
-                with sqlite3.connect(DB_FILE) as conn:
+                with db_pool.connection() as conn:
                     conn.execute("INSERT OR IGNORE INTO persons (name, address) VALUES (?, ?)", (person, address))
             except Exception:
                 pass # Ignore if already exists
@@ -161,57 +260,181 @@ st.title("💸 Novel Salary Agent")
 st.code(ASCII_ART, language=None)
 st.caption("I can manage Solana wallets, transfer USDT, and answer complex questions about the data via SQL.")
 st.caption("Powered by IO Intelligence API and Pydantic AI.")
-# Initialize chat history
+# Initialize chat history and the compacted conversation sent to the agent
 if "messages" not in st.session_state:
     st.session_state.messages = []
+if "memory" not in st.session_state:
+    st.session_state.memory = ConversationMemory(SYSTEM_PROMPT)
+memory = st.session_state.memory
 
-def display_agent_response(raw_output: str):
-    """Parses raw agent output and displays it in the Streamlit UI."""
-    think_pattern = re.compile(r"<think>(.*?)</think>", re.DOTALL)
-    think_match = think_pattern.search(raw_output)
-
-    if think_match:
-        thinking_text = think_match.group(1).strip()
-        with st.expander("🤔 Agent's Thoughts"):
-            st.info(thinking_text)
-        final_output = think_pattern.sub("", raw_output).strip()
-    else:
-        final_output = raw_output.strip()
+def display_parsed_response(parsed: ResponseParser, streaming: bool = False):
+    """Displays parsed (or still-streaming) agent output in the Streamlit UI."""
+    if parsed.thinking:
+        with st.expander("🤔 Agent's Thoughts", expanded=streaming and not parsed.answer):
+            st.info(parsed.thinking)
 
-    if final_output:
+    final_output = parsed.answer
+    if not final_output:
+        return
+    if parsed.is_json and not streaming:
         try:
-            # Check if the output is JSON and display it nicely
-            json_data = json.loads(final_output)
-            st.json(json_data)
-        except (json.JSONDecodeError, TypeError):
-            # Otherwise, display as code/markdown for tables and text
-            st.code(final_output, language=None)
-
-# Display past messages
-for message in st.session_state.messages:
+            # Display complete JSON answers nicely
+            st.json(json.loads(final_output))
+            return
+        except json.JSONDecodeError:
+            pass
+    # Otherwise, display as code for tables and text (highlighted while a JSON answer streams in)
+    st.code(final_output, language="json" if parsed.looks_like_json else None)
+
+class DataframeResultSink(ResultSink):
+    """
+    Streams each page of a SELECT result into a live dataframe and keeps the rows for re-rendering.
+    Called from the agent loop thread; ``post`` hands the Streamlit calls back to the script thread.
+    """
+
+    def __init__(self, container, post):
+        self.container = container
+        self.post = post
+        self.results = []
+
+    def begin(self, columns, offset):
+        self.post(lambda: self._begin(list(columns)))
+
+    def _begin(self, columns):
+        self.columns = columns
+        with span("render", what="result frame"):
+            self.frame = self.container.dataframe(pd.DataFrame(columns=self.columns), use_container_width=True)
+        self.results.append({"columns": self.columns, "data": []})
+
+    def add_rows(self, rows):
+        self.post(lambda: self._add_rows(rows))
+
+    def _add_rows(self, rows):
+        with span("render", what="result page", rows=len(rows)):
+            self.frame.add_rows(pd.DataFrame(rows, columns=self.columns))
+        self.results[-1]["data"].extend(rows)
+
+class StreamingResponse:
+    """
+    Redraws the partial agent output in a placeholder as tokens arrive.
+    Tokens arrive on the agent loop thread; parsing and drawing happen on the script thread via ``post``.
+    """
+
+    # Each redraw is a websocket message; a few per second reads as live text.
+    REDRAW_INTERVAL = 0.1
+
+    def __init__(self, placeholder, post, history):
+        self.placeholder = placeholder
+        self.post = post
+        # Captured on the script thread; session state is not available on the agent loop thread.
+        self.history = history
+        self.parsed = ResponseParser()
+        self.last_redraw = 0.0
+
+    def on_text(self, chunk: str):
+        self.post(lambda: self._redraw(chunk))
+
+    def _redraw(self, chunk: str):
+        self.parsed.feed(chunk)
+        now = time.monotonic()
+        if now - self.last_redraw >= self.REDRAW_INTERVAL:
+            self.last_redraw = now
+            with span("render", what="stream redraw"), self.placeholder.container():
+                display_parsed_response(self.parsed, streaming=True)
+
+    async def run(self, prompt: str):
+        async with tool_turn() as turn:
+            result = await stream_run(novel_salary_agent, prompt, self.on_text, message_history=self.history)
+        # The final answer is drawn below like every other response.
+        self.post(self.placeholder.empty)
+        if turn.timings:
+            self.post(lambda: st.caption(f"🔧 {turn.summary()}"))
+        return result
+
+def add_message(message: dict):
+    """Appends to the chat history, forgetting the oldest messages past ``MAX_STORED_MESSAGES``."""
+    st.session_state.messages.append(message)
+    del st.session_state.messages[:-MAX_STORED_MESSAGES]
+
+# Display past messages; only the latest are redrawn on each rerun unless asked for.
+past_messages = st.session_state.messages
+hidden = len(past_messages) - RENDERED_MESSAGES
+if hidden > 0 and not st.toggle(f"Show {hidden} earlier messages"):
+    past_messages = past_messages[hidden:]
+for message in past_messages:
     with st.chat_message(message["role"]):
         if message["role"] == "user":
             st.markdown(message["content"])
         else:
-            # Re-render the complex agent response
-            display_agent_response(message["content"])
+            for result in message.get("results", []):
+                st.dataframe(pd.DataFrame(result["data"], columns=result["columns"]), use_container_width=True)
+            # Responses are stored parsed, so reruns only redraw them
+            display_parsed_response(message["parsed"])
 
 # Main chat input
 if prompt := st.chat_input("Ask 'list persons' or 'transfer 100 from guru to shivam'"):
-    st.session_state.messages.append({"role": "user", "content": prompt})
+    add_message({"role": "user", "content": prompt})
     with st.chat_message("user"):
         st.markdown(prompt)
 
-    with st.chat_message("assistant"):
+    with st.chat_message("assistant"), span("turn", prompt=prompt) as turn:
+        # Streamlit calls posted by the agent loop thread, executed here while we wait.
+        ui_calls = queue.Queue()
+        # SQL results appear here page by page while the agent is still working.
+        sink = DataframeResultSink(st.container(), ui_calls.put)
+        sink_token = result_sink.set(sink)
         with st.spinner("Thinking..."):
             try:
-                # Run async agent code within Streamlit's sync flow
-                agent_response = asyncio.run(novel_salary_agent.run(prompt))
-                response_text = agent_response.output
+                # Run async agent code on the app's persistent loop
+                routed = agent_loop.run(fast_router.route(prompt), ui_calls)
+                if routed is not None:
+                    response_text = routed.output
+                    turn.set(source="fast_path")
+                    st.caption(f"⚡ Answered directly by {routed.tool} (no model call).")
+                    memory.add_exchange(prompt, response_text)
+                elif (planned := agent_loop.run(sql_plans.answer(prompt), ui_calls)) is not None:
+                    response_text = planned.output
+                    turn.set(source="sql_plan")
+                    st.caption(f"⚡ {planned.summary}")
+                    memory.add_exchange(prompt, response_text)
+                else:
+                    follow_up = memory.depends_on_history(prompt)
+                    streaming = StreamingResponse(st.empty(), ui_calls.put, memory.history())
+                    agent_response = agent_loop.run(
+                        response_cache.run(prompt, streaming.run, memory.cache_context(prompt)), ui_calls
+                    )
+                    response_text = agent_response.output
+                    turn.set(source="cache" if agent_response.cached else "agent")
+                    if agent_response.cached:
+                        st.caption("♻ Answered from the response cache (data unchanged).")
+                        memory.add_exchange(prompt, response_text)
+                    else:
+                        memory.add_run(agent_response.result.new_messages())
+                        # SQL written for a follow-up may depend on earlier turns; only learn standalone questions.
+                        if not follow_up:
+                            agent_loop.run(sql_plans.learn(prompt, agent_response.result.all_messages()))
             except Exception as e:
                 response_text = f"An error occurred: {e}"
+            finally:
+                result_sink.reset(sink_token)
 
-        display_agent_response(response_text)
+        parsed = parse_response(response_text)
+        with span("render", what="response"):
+            display_parsed_response(parsed)
 
-    # Add raw agent response to history for consistent re-rendering
-    st.session_state.messages.append({"role": "assistant", "content": response_text})
\ No newline at end of file
+    add_message({"role": "assistant", "content": response_text, "parsed": parsed, "results": sink.results})
+router_stats = fast_router.stats()
+st.sidebar.metric("Fast path hit rate", f"{router_stats.hit_rate:.0%}",
+                  help=f"{router_stats.routed} answered directly, {router_stats.fallbacks} sent to the agent")
+cache_stats = response_cache.stats()
+st.sidebar.metric("Response cache hit rate", f"{cache_stats.hit_rate:.0%}",
+                  help=f"{cache_stats.hits} cached answers, {cache_stats.invalidations} invalidated by data changes")
+plan_stats = sql_plans.stats()
+st.sidebar.metric("Saved SQL plans", len(sql_plans.plans()),
+                  help=f"{plan_stats.hits} questions answered by reusing SQL from earlier answers")
+st.sidebar.metric("Conversation history", f"~{memory.tokens} tokens",
+                  help=f"{len(memory)} turns sent to the agent; {memory.compacted} compacted, {memory.dropped} dropped")
+if st.sidebar.button("Clear conversation"):
+    st.session_state.messages = []
+    memory.clear()
+    st.rerun()
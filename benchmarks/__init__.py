@@ -0,0 +1 @@
+"""Offline benchmarks for the Novel Salary Agent. Run modules with ``python -m benchmarks.<name>``."""
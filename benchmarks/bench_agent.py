@@ -0,0 +1,209 @@
+"""
+End-to-end latency and throughput of ``novel_salary_agent`` against a local mock LLM.
+
+    python -m benchmarks.bench_agent --rows 1000000 --requests 60 --concurrency 4 --latency 0.2
+
+Builds a synthetic ``salary_agent.db`` (10k-10M transfers; ``--data-dir`` keeps
+built datasets for reuse), points the agent at ``benchmarks.mock_llm`` and
+replays the mock's scripted questions through three paths:
+
+* tools: the raw tool functions, ``--concurrency`` at a time, no model.
+* cli:   ``agent_cli.run_agent_streaming``, one request at a time like a
+         terminal user, with Rich rendering to a muted console.
+* web:   the Streamlit app's shape: ``--concurrency`` session threads sharing
+         one ``BackgroundLoop``, each streaming tokens back to its own thread.
+         Streamlit rendering itself is not included.
+
+The fast path, response cache and SQL plans are bypassed so every request
+reaches the model. Model time is measured around each model request and
+tool time is the sum of the individual tool calls, both as a share of the
+summed request latency.
+"""
+
+import argparse
+import asyncio
+import importlib
+import os
+import queue
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Callable, List, NamedTuple
+
+from pydantic_ai.models.wrapper import WrapperModel
+
+from salary_agent.background import BackgroundLoop
+from salary_agent.providers import get_model
+from salary_agent.response_parser import ResponseParser
+from salary_agent.streaming import stream_run
+from salary_agent.tool_calls import tool_stats, tool_turn
+
+from .mock_llm import MODEL_NAME, SCRIPTS, MockLLMServer
+from .synthetic import build_database
+
+# agent_cli lives at the repository root and opens ``salary_agent.db`` in the working directory.
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROMPTS = list(SCRIPTS)
+
+
+class TimedModel(WrapperModel):
+    """Adds up the time spent inside model requests, streamed or not."""
+
+    def __init__(self, wrapped):
+        super().__init__(wrapped)
+        self.seconds = 0.0
+
+    async def request(self, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return await super().request(*args, **kwargs)
+        finally:
+            self.seconds += time.perf_counter() - started
+
+    @asynccontextmanager
+    async def request_stream(self, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            async with super().request_stream(*args, **kwargs) as stream:
+                yield stream
+        finally:
+            self.seconds += time.perf_counter() - started
+
+
+class PathResult(NamedTuple):
+    path: str
+    latencies: List[float]
+    wall: float
+    model_seconds: float
+    tool_seconds: float
+
+
+def _tool_seconds() -> float:
+    return sum(calls * mean for calls, mean in tool_stats().values())
+
+
+def _measure(path: str, model: TimedModel, run: Callable[[], List[float]]) -> PathResult:
+    model_before, tools_before = model.seconds, _tool_seconds()
+    started = time.perf_counter()
+    latencies = run()
+    return PathResult(path, latencies, time.perf_counter() - started,
+                      model.seconds - model_before, _tool_seconds() - tools_before)
+
+
+def bench_tools(cli, requests: int, concurrency: int) -> List[float]:
+    calls = [call for prompt in PROMPTS for call in SCRIPTS[prompt]]
+
+    async def run() -> List[float]:
+        slots = asyncio.Semaphore(concurrency)
+
+        async def one(i: int) -> float:
+            name, args = calls[i % len(calls)]
+            async with slots:
+                started = time.perf_counter()
+                await getattr(cli, name)(**args)
+                return time.perf_counter() - started
+
+        return list(await asyncio.gather(*(one(i) for i in range(requests))))
+
+    return asyncio.run(run())
+
+
+def bench_cli(cli, requests: int) -> List[float]:
+    async def run() -> List[float]:
+        latencies = []
+        for i in range(requests):
+            started = time.perf_counter()
+            await cli.run_agent_streaming(PROMPTS[i % len(PROMPTS)])
+            latencies.append(time.perf_counter() - started)
+        return latencies
+
+    return asyncio.run(run())
+
+
+def bench_web(cli, requests: int, concurrency: int) -> List[float]:
+    agent_loop = BackgroundLoop("bench-agent-loop")
+
+    async def turn(prompt: str, post):
+        parsed = ResponseParser()
+        async with tool_turn():
+            return await stream_run(cli.novel_salary_agent, prompt, lambda chunk: post(lambda: parsed.feed(chunk)))
+
+    def session(i: int) -> float:
+        # Like a Streamlit script thread: the run happens on the shared loop, UI work comes back here.
+        ui_calls = queue.Queue()
+        started = time.perf_counter()
+        agent_loop.run(turn(PROMPTS[i % len(PROMPTS)], ui_calls.put), ui_calls)
+        return time.perf_counter() - started
+
+    try:
+        with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="bench-session") as sessions:
+            return list(sessions.map(session, range(requests)))
+    finally:
+        agent_loop.stop()
+
+
+def _report(results: List[PathResult]):
+    print(f"{'path':<6} {'requests':>8} {'req/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} "
+          f"{'model':>7} {'tools':>7} {'other':>7}")
+    for r in results:
+        p = statistics.quantiles(r.latencies, n=100, method="inclusive")
+        busy = sum(r.latencies)
+        model, tools = r.model_seconds / busy, r.tool_seconds / busy
+        print(f"{r.path:<6} {len(r.latencies):>8} {len(r.latencies) / r.wall:>8.1f} "
+              f"{p[49] * 1000:>9.1f} {p[94] * 1000:>9.1f} {p[98] * 1000:>9.1f} "
+              f"{model:>7.0%} {tools:>7.0%} {max(0.0, 1 - model - tools):>7.0%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10_000, help="number of transfers (10k-10M)")
+    parser.add_argument("--persons", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=30, help="requests per path")
+    parser.add_argument("--concurrency", type=int, default=4, help="parallel sessions for the tools and web paths")
+    parser.add_argument("--latency", type=float, default=0.2, help="mock model seconds before each response")
+    parser.add_argument("--chunk-delay", type=float, default=0.005, help="mock model seconds between chunks")
+    parser.add_argument("--paths", nargs="+", choices=["tools", "cli", "web"], default=["tools", "cli", "web"])
+    parser.add_argument("--data-dir", help="keep built datasets here and reuse them on later runs")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = os.path.join(args.data_dir, f"transfers-{args.rows}") if args.data_dir else tmp
+        os.makedirs(workdir, exist_ok=True)
+        path = os.path.join(workdir, "salary_agent.db")
+        if os.path.exists(path):
+            print(f"Reusing {path}")
+        else:
+            started = time.perf_counter()
+            build_database(path, args.rows, args.persons).close()
+            print(f"Built {args.rows:,} transfers in {time.perf_counter() - started:.1f}s")
+
+        sys.path.insert(0, ROOT)
+        cwd = os.getcwd()
+        os.chdir(workdir)
+        cli = importlib.import_module("agent_cli")
+        cli.console.quiet = True
+
+        with MockLLMServer(args.latency, args.chunk_delay) as llm:
+            model = TimedModel(get_model(MODEL_NAME, llm.base_url, "benchmark"))
+            results = []
+            with cli.novel_salary_agent.override(model=model):
+                runs = {
+                    "tools": lambda: bench_tools(cli, args.requests, args.concurrency),
+                    "cli": lambda: bench_cli(cli, args.requests),
+                    "web": lambda: bench_web(cli, args.requests, args.concurrency),
+                }
+                for name in args.paths:
+                    results.append(_measure(name, model, runs[name]))
+            print(f"Mock model: {llm.requests} requests, {args.latency * 1000:.0f} ms to first byte\n")
+        cli.db_executor.shutdown()
+        cli.db_pool.close()
+        cli.db_read_pool.close()
+        os.chdir(cwd)
+    _report(results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Aggregate query latency on ``transfers``: SQLite vs the columnar copy.
+
+    python -m benchmarks.bench_analytics --rows 10000000
+
+Builds a synthetic database, times the initial Arrow copy and an
+incremental append, then runs each aggregate shape on both engines and
+checks they return the same rows.
+"""
+
+import argparse
+import asyncio
+import math
+import os
+import statistics
+import tempfile
+import time
+
+from salary_agent.analytics import AnalyticsEngine, ColumnarStore, execute, parse_aggregate
+from salary_agent.db import get_pool
+from salary_agent.executor import get_executor
+
+from .synthetic import build_database
+
+# Shapes that scan transfers in SQLite; index lookups are left to SQLite by the engine.
+QUERIES = {
+    "count all": "SELECT COUNT(*) FROM transfers",
+    "top senders": "SELECT from_person, SUM(amount) AS total FROM transfers "
+                   "GROUP BY from_person ORDER BY total DESC LIMIT 10",
+    "large transfers by recipient": "SELECT to_person, COUNT(*) AS n FROM transfers WHERE amount > 400 "
+                                    "GROUP BY to_person ORDER BY n DESC LIMIT 10",
+    "daily totals": "SELECT date(timestamp) AS day, COUNT(*), SUM(amount) FROM transfers "
+                    "GROUP BY day ORDER BY day DESC LIMIT 30",
+    "monthly senders": "SELECT strftime('%Y-%m', timestamp) AS month, COUNT(DISTINCT from_person) "
+                       "FROM transfers GROUP BY month",
+    "busiest pairs": "SELECT from_person, to_person, COUNT(*) AS n FROM transfers "
+                     "GROUP BY from_person, to_person ORDER BY n DESC LIMIT 5",
+}
+
+
+def _same(a, b) -> bool:
+    # Arrow sums pairwise, SQLite left to right; totals can differ in the last bits.
+    return len(a) == len(b) and all(
+        math.isclose(u, v, rel_tol=1e-9) if isinstance(u, float) and isinstance(v, float) else u == v
+        for x, y in zip(a, b) for u, v in zip(x, y)
+    )
+
+
+def _median(fn, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000, help="number of transfers")
+    parser.add_argument("--persons", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=3, help="runs per query; the median is reported")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        started = time.perf_counter()
+        conn = build_database(path, args.rows, args.persons)
+        print(f"Built {args.rows:,} transfers in {time.perf_counter() - started:.1f}s")
+
+        store = ColumnarStore(os.path.join(tmp, "bench.db.columnar"))
+        started = time.perf_counter()
+        store.sync(conn)
+        print(f"Columnar copy in {time.perf_counter() - started:.1f}s")
+        conn.execute("INSERT INTO transfers (from_person, to_person, amount, token, timestamp) "
+                     "VALUES ('guru', 'madhur', 1, 'USDT', '2026-01-01 00:00:00')")
+        conn.commit()
+        started = time.perf_counter()
+        store.sync(conn)
+        print(f"Incremental append of 1 transfer in {(time.perf_counter() - started) * 1000:.1f} ms\n")
+
+        print(f"{'query':<30} {'sqlite ms':>10} {'arrow ms':>10} {'speedup':>9}  same")
+        for name, sql in QUERIES.items():
+            query = parse_aggregate(sql)
+            expected = conn.execute(sql).fetchall()
+            _, rows = execute(store.table, query)
+            sqlite_seconds = _median(lambda: conn.execute(sql).fetchall(), args.repeat)
+            arrow_seconds = _median(lambda: execute(store.table, query), args.repeat)
+            print(f"{name:<30} {sqlite_seconds * 1000:>10.1f} {arrow_seconds * 1000:>10.1f} "
+                  f"{sqlite_seconds / arrow_seconds:>8.0f}x  {'yes' if _same(rows, expected) else 'NO'}")
+
+        # The whole path a tool call takes: plan check, sync check, compute, on a reader thread.
+        executor = get_executor(get_pool(path), read_pool=get_pool(path, read_only=True))
+        engine = AnalyticsEngine(executor, store.directory)
+        sql = QUERIES["top senders"]
+        seconds = _median(lambda: asyncio.run(engine.run(sql)), args.repeat)
+        print(f"\nAnalyticsEngine.run (top senders), end to end: {seconds * 1000:.1f} ms")
+        executor.shutdown()
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Query latency on ``transfers`` before and after the index migration.
+
+    python -m benchmarks.bench_transfer_indexes --rows 1000000
+"""
+
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+from salary_agent.migrations import LATEST_VERSION, migrate
+
+from .synthetic import build_database
+
+# The shapes the system prompt steers the model towards.
+QUERIES = {
+    "count sent by person": ("SELECT COUNT(*) FROM transfers WHERE from_person = ?", ("guru",)),
+    "total sent by person": ("SELECT SUM(amount) FROM transfers WHERE from_person = ?", ("madhur",)),
+    "total received by person": ("SELECT SUM(amount) FROM transfers WHERE to_person = ?", ("shivam",)),
+    "transfers to person": ("SELECT id, amount FROM transfers WHERE to_person = ? LIMIT 20", ("gaurav",)),
+    "last 3 recipients": ("SELECT to_person FROM transfers ORDER BY timestamp DESC LIMIT 3", ()),
+    "transfers in a day": (
+        "SELECT COUNT(*) FROM transfers WHERE timestamp >= ? AND timestamp < ?",
+        ("2025-06-01", "2025-06-02"),
+    ),
+}
+
+
+def _time_queries(conn, repeat: int):
+    results = {}
+    for name, (sql, params) in QUERIES.items():
+        samples = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            conn.execute(sql, params).fetchall()
+            samples.append(time.perf_counter() - started)
+        plan = " / ".join(row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + sql, params))
+        results[name] = (statistics.median(samples), plan)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000, help="number of transfers")
+    parser.add_argument("--persons", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=5, help="runs per query; the median is reported")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        started = time.perf_counter()
+        conn = build_database(path, args.rows, args.persons, schema_version=1)
+        print(f"Built {args.rows:,} transfers in {time.perf_counter() - started:.1f}s")
+
+        before = _time_queries(conn, args.repeat)
+        started = time.perf_counter()
+        migrate(conn, target=LATEST_VERSION)
+        print(f"Migrated to schema v{LATEST_VERSION} in {time.perf_counter() - started:.1f}s\n")
+        after = _time_queries(conn, args.repeat)
+        conn.close()
+
+    print(f"{'query':<26} {'before ms':>10} {'after ms':>10} {'speedup':>9}  plan after")
+    for name in QUERIES:
+        b, a = before[name][0], after[name][0]
+        print(f"{name:<26} {b * 1000:>10.2f} {a * 1000:>10.3f} {b / a:>8.0f}x  {after[name][1]}")
+
+
+if __name__ == "__main__":
+    main()
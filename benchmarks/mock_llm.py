@@ -0,0 +1,174 @@
+"""
+A local, OpenAI-compatible stand-in for the IO Intelligence endpoint.
+
+    python -m benchmarks.mock_llm --port 8001 --latency 0.3
+
+Serves ``POST /chat/completions`` (plain and streamed). A known prompt is
+answered with its scripted tool calls; once the tool results come back, or
+for any other prompt, it replies with a canned ``<think>`` block followed by
+the first line of the last tool result. ``latency`` is the delay before the
+first byte of every response and ``chunk_delay`` the gap between streamed
+chunks, so model time in a benchmark is known and repeatable.
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import threading
+import time
+from typing import Dict, List, NamedTuple, Tuple
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route
+
+MODEL_NAME = "Qwen/Qwen3-235B-A22B-FP8"
+THINKING = "<think>The user wants data from the salary database. I will call the matching tool and report what it returns.</think>"
+
+
+class ToolCall(NamedTuple):
+    name: str
+    args: Dict[str, object]
+
+
+# Prompt -> the tool calls a model would make for it. Shapes follow the system prompt's guidance.
+SCRIPTS: Dict[str, List[ToolCall]] = {
+    "how many transfers has guru made?": [
+        ToolCall("execute_sql_query", {"query": "SELECT COUNT(*) FROM transfers WHERE from_person = 'guru'"}),
+    ],
+    "how much has madhur sent in total?": [
+        ToolCall("get_balance_summary", {"person": "madhur"}),
+    ],
+    "who received the last 3 transfers?": [
+        ToolCall("execute_sql_query", {"query": "SELECT to_person FROM transfers ORDER BY timestamp DESC LIMIT 3"}),
+    ],
+    "who are the top 10 senders by amount?": [
+        ToolCall("execute_sql_query", {"query": "SELECT name, sent_total FROM person_balances "
+                                                "ORDER BY sent_total DESC LIMIT 10"}),
+    ],
+    "how many transfers happened on 2025-06-01?": [
+        ToolCall("execute_sql_query", {"query": "SELECT transfer_count FROM daily_transfer_totals "
+                                                "WHERE day = '2025-06-01'"}),
+    ],
+    "show the wallet addresses and balances of guru and shivam": [
+        ToolCall("show_wallet_address", {"person": "guru"}),
+        ToolCall("show_wallet_address", {"person": "shivam"}),
+        ToolCall("get_balance_summary", {"person": "guru"}),
+        ToolCall("get_balance_summary", {"person": "shivam"}),
+    ],
+}
+
+
+def _tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+def _reply(messages: List[dict]) -> Tuple[str, List[ToolCall]]:
+    """What the scripted model says next: tool calls for a fresh known prompt, otherwise a final answer."""
+    last = messages[-1]
+    if last.get("role") == "user":
+        calls = SCRIPTS.get(str(last.get("content", "")).strip().lower())
+        if calls:
+            return "", calls
+        return f"{THINKING}I can only answer the benchmark's scripted questions.", []
+    results = [str(m.get("content", "")) for m in messages if m.get("role") == "tool"]
+    summary = results[-1].splitlines()[0] if results and results[-1] else "Done."
+    return f"{THINKING}{summary}", []
+
+
+class MockLLMServer:
+    """Runs the mock endpoint on a background thread; use as a context manager for ``base_url``."""
+
+    def __init__(self, latency: float = 0.2, chunk_delay: float = 0.01, host: str = "127.0.0.1", port: int = 0):
+        self.latency = latency
+        self.chunk_delay = chunk_delay
+        self.requests = 0
+        self._ids = itertools.count(1)
+        app = Starlette(routes=[Route("/chat/completions", self._completions, methods=["POST"])])
+        self._server = uvicorn.Server(uvicorn.Config(app, host=host, port=port, log_level="warning"))
+        self._thread = threading.Thread(target=self._server.run, name="mock-llm", daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.servers[0].sockets[0].getsockname()[:2]
+        return f"http://{host}:{port}"
+
+    def __enter__(self) -> "MockLLMServer":
+        self._thread.start()
+        while not self._server.started:
+            if not self._thread.is_alive():
+                raise RuntimeError("Mock LLM server failed to start.")
+            time.sleep(0.01)
+        return self
+
+    def __exit__(self, *exc):
+        self._server.should_exit = True
+        self._thread.join()
+
+    async def _completions(self, request: Request):
+        body = await request.json()
+        self.requests += 1
+        content, calls = _reply(body["messages"])
+        response_id = f"chatcmpl-{next(self._ids)}"
+        tool_calls = [
+            {"id": f"call_{next(self._ids)}", "type": "function",
+             "function": {"name": call.name, "arguments": json.dumps(call.args)}}
+            for call in calls
+        ]
+        finish_reason = "tool_calls" if calls else "stop"
+        usage = {"prompt_tokens": _tokens(json.dumps(body["messages"])),
+                 "completion_tokens": _tokens(content + json.dumps(tool_calls))}
+        usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+        await asyncio.sleep(self.latency)
+        if not body.get("stream"):
+            message = {"role": "assistant", "content": content or None}
+            if tool_calls:
+                message["tool_calls"] = tool_calls
+            return JSONResponse({
+                "id": response_id, "object": "chat.completion", "created": int(time.time()), "model": body["model"],
+                "choices": [{"index": 0, "message": message, "finish_reason": finish_reason}],
+                "usage": usage,
+            })
+
+        def chunk(delta: dict, finish=None, **extra) -> str:
+            payload = {"id": response_id, "object": "chat.completion.chunk", "created": int(time.time()),
+                       "model": body["model"], "choices": [{"index": 0, "delta": delta, "finish_reason": finish}],
+                       **extra}
+            return f"data: {json.dumps(payload)}\n\n"
+
+        async def events():
+            yield chunk({"role": "assistant", "content": ""})
+            # Word-sized pieces, roughly what a real endpoint streams.
+            for piece in (content.split(" ") if content else []):
+                await asyncio.sleep(self.chunk_delay)
+                yield chunk({"content": piece + " "})
+            for index, call in enumerate(tool_calls):
+                await asyncio.sleep(self.chunk_delay)
+                yield chunk({"tool_calls": [{"index": index, **call}]})
+            yield chunk({}, finish_reason, usage=usage)
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--latency", type=float, default=0.2, help="seconds before the first byte of each response")
+    parser.add_argument("--chunk-delay", type=float, default=0.01, help="seconds between streamed chunks")
+    args = parser.parse_args()
+    with MockLLMServer(args.latency, args.chunk_delay, args.host, args.port) as server:
+        print(f"Mock LLM listening on {server.base_url} (use it as the OpenAI base URL)")
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
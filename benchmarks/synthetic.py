@@ -0,0 +1,59 @@
+"""Synthetic ``salary_agent.db`` datasets for benchmarks."""
+
+import random
+import sqlite3
+from datetime import datetime, timedelta
+from typing import Iterator, List, Optional, Tuple
+
+from salary_agent.migrations import migrate
+
+USDT_TOKEN_ADDRESS = "Es9vMFrzaCERmJfrF4H2FYD4KCoNkY11McCe8BenwNYB"
+INSERT_BATCH = 50_000
+
+
+def person_names(count: int) -> List[str]:
+    return ["guru", "madhur", "shivam", "gaurav"][:count] + [f"person{i:05d}" for i in range(4, count)]
+
+
+def _transfers(names: List[str], count: int, seed: int) -> Iterator[Tuple[str, str, float, str, str]]:
+    rng = random.Random(seed)
+    start = datetime(2025, 1, 1)
+    span = 365 * 24 * 3600
+    # A few heavy hitters, like a real payroll: the first names send most transfers.
+    weights = [1.0 / (i + 1) for i in range(len(names))]
+    senders = rng.choices(names, weights=weights, k=count)
+    for i, sender in enumerate(senders):
+        receiver = rng.choice(names)
+        while receiver == sender:
+            receiver = rng.choice(names)
+        ts = start + timedelta(seconds=span * i // count)
+        yield sender, receiver, round(rng.uniform(1, 500), 2), USDT_TOKEN_ADDRESS, ts.strftime("%Y-%m-%d %H:%M:%S")
+
+
+def build_database(path: str, transfers: int, persons: int = 200, seed: int = 7,
+                   schema_version: Optional[int] = None) -> sqlite3.Connection:
+    """
+    Creates (or extends) a database at ``path`` with ``persons`` people and ``transfers``
+    transfers, migrated to ``schema_version`` (default: latest). Returns an open connection.
+    """
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("PRAGMA synchronous = OFF")
+    migrate(conn, target=schema_version)
+    names = person_names(persons)
+    conn.executemany(
+        "INSERT OR IGNORE INTO persons (name, address) VALUES (?, ?)",
+        [(name, f"addr-{name}-{i:040d}") for i, name in enumerate(names)],
+    )
+    conn.commit()
+    rows = _transfers(names, transfers, seed)
+    while True:
+        batch = [row for _, row in zip(range(INSERT_BATCH), rows)]
+        if not batch:
+            break
+        conn.executemany(
+            "INSERT INTO transfers (from_person, to_person, amount, token, timestamp) VALUES (?, ?, ?, ?, ?)",
+            batch,
+        )
+        conn.commit()
+    return conn
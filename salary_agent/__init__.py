@@ -0,0 +1 @@
+"""Shared building blocks for the Novel Salary Agent CLI and Streamlit app."""
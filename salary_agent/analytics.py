@@ -0,0 +1,732 @@
+"""
+Columnar copy of ``transfers`` for aggregate questions.
+
+Per-person totals, day/month buckets and top-N over tens of millions of
+transfers mean a full pass over row-oriented pages in SQLite. With
+``SALARY_AGENT_ANALYTICS=1`` (and pyarrow installed), ``ColumnarStore``
+keeps ``transfers`` as Arrow IPC segment files next to the database,
+memory-mapped, and ``AnalyticsEngine`` answers aggregate SELECTs from
+``execute_sql_query`` with pyarrow's vectorized kernels.
+
+The copy is brought up to date before every query. ``table_versions``
+counts one change per inserted, updated or deleted row, so when the
+counter moved by exactly the number of new ids only appends happened and
+just those rows are copied into a new segment; anything else rebuilds
+the copy. Small segments are merged like a binary counter, so there are
+O(log n) of them.
+
+Only a narrow, exact subset of SQL is served: one SELECT over
+``transfers`` with COUNT/SUM/AVG/MIN/MAX, AND-ed comparisons, GROUP BY on
+columns or ``date()`` / ``strftime()`` / ``substr()`` buckets, ORDER BY
+and LIMIT. Anything else returns None and goes to SQLite as before, and
+so do statements whose SQLite plan is an index search rather than a scan
+of ``transfers``: a covering index already answers those faster.
+"""
+
+import importlib.util
+import json
+import os
+import re
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, List, NamedTuple, Optional, Tuple, Union
+
+from .db import table_version
+from .executor import DBExecutor
+from .guardrails import analyze
+from .results import DEFAULT_ROW_CAP, QueryResult, ResultSink, result_sink
+from .tracing import MAX_SQL_CHARS, span
+
+# --- Configuration ---
+ARROW = importlib.util.find_spec("pyarrow") is not None
+ANALYTICS_ENV = "SALARY_AGENT_ANALYTICS"
+# Rows per record batch when copying from SQLite and when merging segments.
+BATCH_ROWS = 256 * 1024
+STATE_FILE = "state.json"
+STATE_FORMAT = 1
+
+if ARROW:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.ipc as ipc
+
+    SCHEMA = pa.schema([
+        ("id", pa.int64()),
+        ("from_person", pa.string()),
+        ("to_person", pa.string()),
+        ("amount", pa.float64()),
+        ("token", pa.string()),
+        ("timestamp", pa.string()),
+    ])
+
+# CASTs keep SQLite's dynamic typing from leaking into the fixed Arrow schema.
+_SELECT_TRANSFERS = ("SELECT id, from_person, to_person, CAST(amount AS REAL), token, CAST(timestamp AS TEXT) "
+                     "FROM transfers WHERE id > ? ORDER BY id")
+# Timestamps where date()/strftime() agree with slicing the text.
+_ISO_TIMESTAMP = r"^\d{4}-\d{2}-\d{2}([ T]\d{2}:\d{2}(:\d{2}(\.\d+)?)?)?$"
+
+TEXT_COLUMNS = {"from_person", "to_person", "token", "timestamp"}
+NUMERIC_COLUMNS = {"id", "amount"}
+
+
+class UnsupportedQuery(ValueError):
+    """The statement is outside the subset the columnar engine answers exactly."""
+
+
+# --- Parsing ---
+class Column(NamedTuple):
+    name: str
+
+
+class Bucket(NamedTuple):
+    column: str
+    length: int       # leading characters kept
+    needs_iso: bool   # date()/strftime() only match slicing on ISO-8601 text
+
+
+class Aggregate(NamedTuple):
+    func: str                                   # COUNT, SUM, AVG, MIN, MAX
+    arg: Optional[Union[Column, Bucket]]        # None for COUNT(*)
+    distinct: bool = False
+
+
+Operand = Union[Column, Bucket]
+Expr = Union[Column, Bucket, Aggregate]
+
+
+class Item(NamedTuple):
+    expr: Expr
+    name: str  # result column name, as SQLite would report it
+
+
+class Condition(NamedTuple):
+    operand: Operand
+    op: str                # =, !=, <, <=, >, >=, IN, NOT IN, BETWEEN, IS NULL, IS NOT NULL
+    values: Tuple = ()
+
+
+@dataclass
+class AggregateQuery:
+    items: List[Item]
+    where: List[Condition] = field(default_factory=list)
+    group_by: List[Operand] = field(default_factory=list)
+    order_by: List[Tuple[int, bool]] = field(default_factory=list)  # (item index, descending)
+    limit: Optional[int] = None
+    offset: int = 0
+
+    @property
+    def needs_iso(self) -> bool:
+        operands = [c.operand for c in self.where] + list(self.group_by)
+        operands += [i.expr.arg if isinstance(i.expr, Aggregate) else i.expr for i in self.items]
+        return any(isinstance(o, Bucket) and o.needs_iso for o in operands)
+
+
+class _Token(NamedTuple):
+    kind: str  # name, str, num, op
+    text: str
+    start: int
+    end: int
+
+
+_TOKEN = re.compile(r"""
+    (?P<space>\s+|--[^\n]*|/\*.*?\*/)
+  | (?P<str>'(?:[^']|'')*')
+  | (?P<qname>"(?:[^"]|"")*")
+  | (?P<num>\d+(?:\.\d*)?(?:[eE][-+]?\d+)?|\.\d+)
+  | (?P<name>[A-Za-z_]\w*)
+  | (?P<op><=|>=|<>|!=|==|[(),*;.=<>+-])
+""", re.VERBOSE | re.DOTALL)
+
+_AGGREGATES = {"COUNT", "SUM", "AVG", "MIN", "MAX"}
+_STRFTIME_LENGTHS = {"%Y-%m-%d": 10, "%Y-%m": 7, "%Y": 4}
+_COMPARISONS = {"=": "=", "==": "=", "!=": "!=", "<>": "!=", "<": "<", "<=": "<=", ">": ">", ">=": ">="}
+_RESERVED = {"FROM", "WHERE", "GROUP", "ORDER", "LIMIT", "HAVING", "AS", "JOIN", "INNER", "LEFT", "CROSS",
+             "NATURAL", "ON", "USING", "UNION", "EXCEPT", "INTERSECT", "WINDOW", "OFFSET", "AND", "OR"}
+
+
+def _tokenize(sql: str) -> List[_Token]:
+    tokens, pos = [], 0
+    while pos < len(sql):
+        m = _TOKEN.match(sql, pos)
+        if m is None:
+            raise UnsupportedQuery(f"unexpected character {sql[pos]!r}")
+        if m.lastgroup != "space":
+            kind = "name" if m.lastgroup == "qname" else m.lastgroup
+            text = m.group()[1:-1].replace('""', '"') if m.lastgroup == "qname" else m.group()
+            tokens.append(_Token(kind, text, m.start(), m.end()))
+        pos = m.end()
+    return tokens
+
+
+class _Parser:
+    def __init__(self, sql: str):
+        self.sql = sql
+        self.tokens = _tokenize(sql)
+        self.pos = 0
+        self.table_alias = "transfers"
+        self.qualifiers: List[str] = []
+        self.aliases: Dict[str, int] = {}
+
+    def peek(self, offset: int = 0) -> Optional[_Token]:
+        i = self.pos + offset
+        return self.tokens[i] if i < len(self.tokens) else None
+
+    def next(self) -> _Token:
+        token = self.peek()
+        if token is None:
+            raise UnsupportedQuery("unexpected end of statement")
+        self.pos += 1
+        return token
+
+    def accept(self, *words: str) -> bool:
+        """Consumes the given keywords / operators if they come next, in order."""
+        for i, word in enumerate(words):
+            token = self.peek(i)
+            if token is None or token.kind in ("str", "num") or token.text.upper() != word:
+                return False
+        self.pos += len(words)
+        return True
+
+    def expect(self, *words: str):
+        if not self.accept(*words):
+            raise UnsupportedQuery(f"expected {' '.join(words)}")
+
+    # -- grammar --
+    def parse(self) -> AggregateQuery:
+        self.expect("SELECT")
+        if self.accept("DISTINCT") or self.accept("ALL"):
+            raise UnsupportedQuery("SELECT DISTINCT/ALL")
+        items = [self.item()]
+        while self.accept(","):
+            items.append(self.item())
+        self.expect("FROM")
+        table = self.next()
+        if table.kind != "name" or table.text.lower() != "transfers":
+            raise UnsupportedQuery("only transfers is stored in columnar form")
+        if self.accept("AS"):
+            self.table_alias = self.next().text.lower()
+        elif self.peek() and self.peek().kind == "name" and self.peek().text.upper() not in _RESERVED:
+            self.table_alias = self.next().text.lower()
+        for i, item in enumerate(items):
+            self.aliases.setdefault(item.name.lower(), i)
+        query = AggregateQuery(items)
+        if self.accept("WHERE"):
+            query.where.append(self.condition())
+            while self.accept("AND"):
+                query.where.append(self.condition())
+        if self.accept("GROUP", "BY"):
+            query.group_by.append(self.group_key(items))
+            while self.accept(","):
+                query.group_by.append(self.group_key(items))
+        if self.accept("ORDER", "BY"):
+            query.order_by.append(self.order_key(items))
+            while self.accept(","):
+                query.order_by.append(self.order_key(items))
+        if self.accept("LIMIT"):
+            query.limit = self.integer()
+            if self.accept("OFFSET"):
+                query.offset = self.integer()
+            elif self.accept(","):
+                query.offset, query.limit = query.limit, self.integer()
+        self.accept(";")
+        if self.peek() is not None:
+            raise UnsupportedQuery(f"unsupported clause at {self.peek().text!r}")
+        # The select list is parsed before the FROM clause names the alias, so qualifiers are checked last.
+        unknown = set(self.qualifiers) - {self.table_alias, "transfers"}
+        if unknown:
+            raise UnsupportedQuery(f"unknown table {', '.join(sorted(unknown))}")
+        return query
+
+    def item(self) -> Item:
+        start = self.peek().start if self.peek() else len(self.sql)
+        expr = self.expression()
+        end = self.tokens[self.pos - 1].end
+        if self.accept("AS"):
+            name = self.next().text
+        elif self.peek() and self.peek().kind == "name" and self.peek().text.upper() not in _RESERVED:
+            name = self.next().text
+        elif isinstance(expr, Column):
+            name = expr.name  # SQLite reports the declared name, whatever the case or qualifier
+        else:
+            name = self.sql[start:end]
+        return Item(expr, name)
+
+    def column(self) -> Column:
+        token = self.next()
+        if token.kind != "name":
+            raise UnsupportedQuery(f"expected a column, got {token.text!r}")
+        name = token.text
+        if self.accept("."):
+            self.qualifiers.append(name.lower())
+            name = self.next().text
+        if name.lower() not in TEXT_COLUMNS | NUMERIC_COLUMNS:
+            raise UnsupportedQuery(f"unknown column {name}")
+        return Column(name.lower())
+
+    def operand(self) -> Operand:
+        token = self.peek()
+        following = self.peek(1)
+        if token is None or token.kind != "name" or following is None or following.text != "(":
+            return self.column()
+        func = self.next().text.upper()
+        self.expect("(")
+        if func == "DATE":
+            column = self.column()
+            bucket = Bucket(column.name, 10, True)
+        elif func == "STRFTIME":
+            fmt = self.next()
+            length = _STRFTIME_LENGTHS.get(fmt.text[1:-1]) if fmt.kind == "str" else None
+            if length is None:
+                raise UnsupportedQuery(f"strftime format {fmt.text}")
+            self.expect(",")
+            bucket = Bucket(self.column().name, length, True)
+        elif func in ("SUBSTR", "SUBSTRING"):
+            column = self.column()
+            self.expect(",")
+            if self.integer() != 1:
+                raise UnsupportedQuery("substr must start at 1")
+            self.expect(",")
+            bucket = Bucket(column.name, self.integer(), False)
+        else:
+            raise UnsupportedQuery(f"function {func}")
+        self.expect(")")
+        if bucket.column not in TEXT_COLUMNS or (bucket.needs_iso and bucket.column != "timestamp"):
+            raise UnsupportedQuery(f"{func} of {bucket.column}")
+        return bucket
+
+    def expression(self) -> Expr:
+        token = self.peek()
+        if token is not None and token.kind == "name" and token.text.upper() in _AGGREGATES \
+                and self.peek(1) is not None and self.peek(1).text == "(":
+            func = self.next().text.upper()
+            self.expect("(")
+            if func == "COUNT" and self.accept("*"):
+                self.expect(")")
+                return Aggregate("COUNT", None)
+            distinct = self.accept("DISTINCT")
+            if distinct and func != "COUNT":
+                raise UnsupportedQuery(f"{func}(DISTINCT ...)")
+            arg = self.operand()
+            self.expect(")")
+            if func in ("SUM", "AVG") and not (isinstance(arg, Column) and arg.name in NUMERIC_COLUMNS):
+                raise UnsupportedQuery(f"{func} of text")
+            return Aggregate(func, arg, distinct)
+        return self.operand()
+
+    def literal(self, operand: Operand):
+        negative = self.accept("-")
+        token = self.next()
+        text_operand = isinstance(operand, Bucket) or operand.name in TEXT_COLUMNS
+        if token.kind == "str" and text_operand and not negative:
+            return token.text[1:-1].replace("''", "'")
+        if token.kind == "num" and not text_operand:
+            value = float(token.text) if re.search(r"[.eE]", token.text) else int(token.text)
+            return -value if negative else value
+        # Mixed types follow SQLite's affinity rules, which are not worth mirroring.
+        raise UnsupportedQuery(f"literal {token.text} for {operand}")
+
+    def condition(self) -> Condition:
+        operand = self.operand()
+        token = self.next()
+        op = token.text.upper()
+        if op in _COMPARISONS and token.kind == "op":
+            return Condition(operand, _COMPARISONS[op], (self.literal(operand),))
+        if op == "IS":
+            negated = self.accept("NOT")
+            self.expect("NULL")
+            return Condition(operand, "IS NOT NULL" if negated else "IS NULL")
+        negated = op == "NOT"
+        if negated:
+            op = self.next().text.upper()
+        if op == "IN":
+            self.expect("(")
+            values = [self.literal(operand)]
+            while self.accept(","):
+                values.append(self.literal(operand))
+            self.expect(")")
+            return Condition(operand, "NOT IN" if negated else "IN", tuple(values))
+        if op == "BETWEEN" and not negated:
+            low = self.literal(operand)
+            self.expect("AND")
+            return Condition(operand, "BETWEEN", (low, self.literal(operand)))
+        raise UnsupportedQuery(f"condition {op}")
+
+    def integer(self) -> int:
+        token = self.next()
+        if token.kind != "num" or not token.text.isdigit():
+            raise UnsupportedQuery(f"expected an integer, got {token.text!r}")
+        return int(token.text)
+
+    def _alias(self) -> Optional[int]:
+        token, following = self.peek(), self.peek(1)
+        if token is not None and token.kind == "name" and token.text.lower() in self.aliases \
+                and (following is None or following.text not in ("(", ".")):
+            self.pos += 1
+            return self.aliases[token.text.lower()]
+        return None
+
+    def group_key(self, items: List[Item]) -> Operand:
+        # Unlike ORDER BY, GROUP BY resolves a name to a column before trying the aliases.
+        token = self.peek()
+        is_column = token is not None and token.kind == "name" and token.text.lower() in TEXT_COLUMNS | NUMERIC_COLUMNS
+        index = None if is_column else self._alias()
+        if index is not None:
+            expr = items[index].expr
+            if isinstance(expr, Aggregate):
+                raise UnsupportedQuery("GROUP BY an aggregate")
+            return expr
+        if self.peek() is not None and self.peek().kind == "num":
+            index = self.integer() - 1
+            if not 0 <= index < len(items):
+                raise UnsupportedQuery("GROUP BY position out of range")
+            expr = items[index].expr
+            if isinstance(expr, Aggregate):
+                raise UnsupportedQuery("GROUP BY an aggregate")
+            return expr
+        return self.operand()
+
+    def order_key(self, items: List[Item]) -> Tuple[int, bool]:
+        index = self._alias()
+        if index is None and self.peek() is not None and self.peek().kind == "num":
+            index = self.integer() - 1
+            if not 0 <= index < len(items):
+                raise UnsupportedQuery("ORDER BY position out of range")
+        if index is None:
+            expr = self.expression()
+            matches = [i for i, item in enumerate(items) if item.expr == expr]
+            if not matches:
+                raise UnsupportedQuery("ORDER BY an expression that is not selected")
+            index = matches[0]
+        descending = self.accept("DESC")
+        if not descending:
+            self.accept("ASC")
+        if self.accept("NULLS"):
+            raise UnsupportedQuery("NULLS FIRST/LAST")
+        return index, descending
+
+
+def parse_aggregate(sql: str) -> AggregateQuery:
+    """The aggregate query in ``sql``; raises ``UnsupportedQuery`` outside the served subset."""
+    query = _Parser(sql).parse()
+    aggregates = [item for item in query.items if isinstance(item.expr, Aggregate)]
+    if not aggregates and not query.group_by:
+        raise UnsupportedQuery("not an aggregate; row listings stay in SQLite")
+    for item in query.items:
+        if not isinstance(item.expr, Aggregate) and item.expr not in query.group_by:
+            raise UnsupportedQuery(f"{item.name} is neither aggregated nor grouped")
+    return query
+
+
+# --- Execution ---
+def _values(table: "pa.Table", operand: Operand):
+    values = table[operand.column if isinstance(operand, Bucket) else operand.name]
+    if isinstance(operand, Bucket):
+        values = pc.utf8_slice_codeunits(values, 0, operand.length)
+    return values
+
+
+def _mask(table: "pa.Table", conditions: List[Condition]):
+    mask = None
+    for condition in conditions:
+        values = _values(table, condition.operand)
+        op, args = condition.op, condition.values
+        if op == "IS NULL":
+            test = pc.is_null(values)
+        elif op == "IS NOT NULL":
+            test = pc.is_valid(values)
+        elif op in ("IN", "NOT IN"):
+            test = pc.is_in(values, value_set=pa.array(args, type=values.type))
+            if op == "NOT IN":
+                # In SQLite NULL NOT IN (...) is NULL, so the row is dropped.
+                test = pc.and_(pc.invert(test), pc.is_valid(values))
+        elif op == "BETWEEN":
+            test = pc.and_(pc.greater_equal(values, args[0]), pc.less_equal(values, args[1]))
+        else:
+            compare = {"=": pc.equal, "!=": pc.not_equal, "<": pc.less, "<=": pc.less_equal,
+                       ">": pc.greater, ">=": pc.greater_equal}[op]
+            test = compare(values, args[0])
+        mask = test if mask is None else pc.and_(mask, test)
+    return mask
+
+
+_KERNELS = {"SUM": "sum", "AVG": "mean", "MIN": "min", "MAX": "max"}
+
+
+def _scalar(table: "pa.Table", aggregate: Aggregate):
+    if aggregate.arg is None:
+        return table.num_rows
+    values = _values(table, aggregate.arg)
+    if aggregate.func == "COUNT":
+        return (pc.count_distinct(values) if aggregate.distinct else pc.count(values)).as_py()
+    if len(values) == 0 or values.null_count == len(values):
+        return None
+    return getattr(pc, _KERNELS[aggregate.func])(values).as_py()
+
+
+def execute(table: "pa.Table", query: AggregateQuery) -> Tuple[List[str], List[tuple]]:
+    """Result column names and rows of ``query`` over the columnar ``table``."""
+    if query.where:
+        table = table.filter(_mask(table, query.where))
+    columns = [item.name for item in query.items]
+    if not query.group_by:
+        rows = [tuple(_scalar(table, item.expr) for item in query.items)]
+        end = None if query.limit is None else query.offset + query.limit
+        return columns, rows[query.offset:end]
+
+    work = {f"k{i}": _values(table, key) for i, key in enumerate(query.group_by)}
+    specs, outputs = [], []
+    for j, item in enumerate(query.items):
+        if not isinstance(item.expr, Aggregate):
+            outputs.append(f"k{query.group_by.index(item.expr)}")
+        elif item.expr.arg is None:
+            specs.append(([], "count_all"))
+            outputs.append("count_all")
+        else:
+            work[f"a{j}"] = _values(table, item.expr.arg)
+            kernel = "count_distinct" if item.expr.distinct else _KERNELS.get(item.expr.func, "count")
+            specs.append((f"a{j}", kernel))
+            outputs.append(f"a{j}_{kernel}")
+    keys = [f"k{i}" for i in range(len(query.group_by))]
+    grouped = pa.table(work).group_by(keys).aggregate(specs)
+    # Without ORDER BY, SQLite hands groups back sorted by key; NULL sorts first.
+    grouped = grouped.sort_by([(key, "ascending") for key in keys], null_placement="at_start")
+    result = pa.table({f"c{i}": grouped[name] for i, name in enumerate(outputs)})
+    if query.order_by:
+        # SQLite puts NULL first ascending and last descending; pyarrow takes one placement for all keys.
+        placement = "at_end" if query.order_by[0][1] else "at_start"
+        result = result.sort_by([(f"c{i}", "descending" if desc else "ascending") for i, desc in query.order_by],
+                                null_placement=placement)
+    if query.offset or query.limit is not None:
+        result = result.slice(query.offset, query.limit)
+    return columns, list(zip(*(column.to_pylist() for column in result.columns)))
+
+
+# --- Storage ---
+class Segment(NamedTuple):
+    name: str
+    first_id: int
+    last_id: int
+    rows: int
+
+
+class ColumnarStore:
+    """``transfers`` as memory-mapped Arrow IPC segments in ``directory``, synced from SQLite on demand."""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.version = -1
+        self.last_id = 0
+        self.iso_timestamps = True
+        self.segments: List[Segment] = []
+        self.syncs = 0
+        self.appends = 0
+        self.rebuilds = 0
+        self._tables: Dict[str, "pa.Table"] = {}
+        self.table = SCHEMA.empty_table()
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self._load_state()
+
+    @property
+    def rows(self) -> int:
+        return self.table.num_rows
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def _load_state(self):
+        try:
+            with open(self._path(STATE_FILE), encoding="utf-8") as f:
+                state = json.load(f)
+            if state.get("format") != STATE_FORMAT:
+                return
+            segments = [Segment(*segment) for segment in state["segments"]]
+            tables = {s.name: ipc.open_file(pa.memory_map(self._path(s.name))).read_all() for s in segments}
+        except (OSError, ValueError, KeyError, TypeError, pa.ArrowException):
+            return  # missing or damaged: the first sync rebuilds
+        self.segments, self._tables = segments, tables
+        self.version, self.last_id = state["version"], state["last_id"]
+        self.iso_timestamps = state["iso_timestamps"]
+        self._assemble()
+
+    def _save_state(self):
+        state = {"format": STATE_FORMAT, "version": self.version, "last_id": self.last_id,
+                 "iso_timestamps": self.iso_timestamps, "segments": [list(s) for s in self.segments]}
+        tmp = self._path(f"{STATE_FILE}.{os.getpid()}.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+        os.replace(tmp, self._path(STATE_FILE))
+
+    def _assemble(self):
+        tables = [self._tables[s.name] for s in self.segments]
+        self.table = pa.concat_tables(tables) if tables else SCHEMA.empty_table()
+
+    def _write(self, batches) -> Optional[Segment]:
+        """Writes ``batches`` to a new segment file and maps it; None if there were no rows."""
+        tmp = self._path(f"segment-{os.getpid()}.tmp")
+        rows, first_id, last_id = 0, None, None
+        with pa.OSFile(tmp, "wb") as sink, ipc.new_file(sink, SCHEMA) as writer:
+            for batch in batches:
+                if batch.num_rows:
+                    first_id = batch["id"][0].as_py() if first_id is None else first_id
+                    last_id = batch["id"][-1].as_py()
+                    rows += batch.num_rows
+                    writer.write_batch(batch)
+        if not rows:
+            os.remove(tmp)
+            return None
+        segment = Segment(f"transfers-{first_id:012d}-{last_id:012d}.arrow", first_id, last_id, rows)
+        os.replace(tmp, self._path(segment.name))
+        self._tables[segment.name] = ipc.open_file(pa.memory_map(self._path(segment.name))).read_all()
+        return segment
+
+    def _copy(self, conn, after_id: int):
+        """Record batches of the transfers with ``id > after_id``, checking timestamps on the way."""
+        cursor = conn.execute(_SELECT_TRANSFERS, (after_id,))
+        while True:
+            rows = cursor.fetchmany(BATCH_ROWS)
+            if not rows:
+                return
+            batch = pa.RecordBatch.from_arrays(
+                [pa.array(values, type=f.type) for values, f in zip(zip(*rows), SCHEMA)], schema=SCHEMA)
+            timestamps = batch["timestamp"]
+            if timestamps.null_count < len(timestamps) and \
+                    not pc.all(pc.match_substring_regex(timestamps, _ISO_TIMESTAMP)).as_py():
+                self.iso_timestamps = False
+            yield batch
+
+    def _merge_tail(self):
+        # Like a binary counter: merge the newest segment into the previous one while it is at least as big.
+        while len(self.segments) > 1 and self.segments[-1].rows >= self.segments[-2].rows:
+            older, newer = self.segments[-2], self.segments[-1]
+            merged = pa.concat_tables([self._tables[older.name], self._tables[newer.name]])
+            segment = self._write(merged.to_batches(max_chunksize=BATCH_ROWS))
+            self.segments[-2:] = [segment]
+
+    def _remove_unused(self):
+        keep = {s.name for s in self.segments}
+        for name in list(self._tables):
+            if name not in keep:
+                del self._tables[name]
+                try:
+                    os.remove(self._path(name))
+                except OSError:
+                    pass
+
+    def sync(self, conn) -> "pa.Table":
+        """Brings the copy up to date with ``conn``'s database and returns it."""
+        with self._lock:
+            self.syncs += 1
+            # One read snapshot for the version, the new-row count and the copy itself.
+            conn.execute("BEGIN")
+            try:
+                version = table_version(conn, "transfers")
+                if version == self.version:
+                    return self.table
+                new_rows = conn.execute("SELECT COUNT(*) FROM transfers WHERE id > ?", (self.last_id,)).fetchone()[0]
+                if self.version >= 0 and version - self.version == new_rows:
+                    segment = self._write(self._copy(conn, self.last_id))
+                    if segment is not None:
+                        self.segments.append(segment)
+                        self.appends += 1
+                        self._merge_tail()
+                else:
+                    self.rebuilds += 1
+                    self.segments, self.iso_timestamps = [], True
+                    segment = self._write(self._copy(conn, 0))
+                    if segment is not None:
+                        self.segments.append(segment)
+            finally:
+                conn.commit()
+            self.version = version
+            self.last_id = self.segments[-1].last_id if self.segments else 0
+            self._save_state()
+            self._remove_unused()
+            self._assemble()
+            return self.table
+
+
+# --- Engine ---
+@dataclass
+class AnalyticsStats:
+    served: int = 0
+    fallbacks: int = 0
+    rows: int = 0
+    segments: int = 0
+    syncs: int = 0
+    appends: int = 0
+    rebuilds: int = 0
+
+
+class AnalyticsEngine:
+    """Answers aggregate SELECTs over ``transfers`` from a ``ColumnarStore``, or declines with None."""
+
+    def __init__(self, executor: DBExecutor, directory: str):
+        self._executor = executor
+        self.store = ColumnarStore(directory)
+        self._served = 0
+        self._fallbacks = 0
+
+    def _answer(self, conn, sql: str, query: AggregateQuery) -> Tuple[List[str], List[tuple]]:
+        plan = analyze(conn, sql)
+        if "transfers" not in plan.full_scans + plan.index_scans:
+            raise UnsupportedQuery("SQLite answers this from an index")
+        self.store.sync(conn)
+        if query.needs_iso and not self.store.iso_timestamps:
+            raise UnsupportedQuery("date()/strftime() over non-ISO timestamps")
+        return execute(self.store.table, query)
+
+    async def run(self, sql: str, sink: Optional[ResultSink] = None,
+                  row_cap: int = DEFAULT_ROW_CAP) -> Optional[QueryResult]:
+        """The result of ``sql`` from the columnar copy, fed to ``sink`` like ``run_query``; None to fall back."""
+        try:
+            query = parse_aggregate(sql)
+        except UnsupportedQuery:
+            return None
+        with span("sql", sql=sql[:MAX_SQL_CHARS], engine="arrow") as s:
+            try:
+                columns, rows = await self._executor.read(self._answer, sql, query)
+            except UnsupportedQuery as e:
+                self._fallbacks += 1
+                s.set(fallback=str(e))
+                return None
+            if len(rows) > row_cap:
+                # Big groupings use SQLite's paging and continuation tokens instead.
+                self._fallbacks += 1
+                s.set(fallback=f"{len(rows)} rows")
+                return None
+            s.set(rows=len(rows), table_rows=self.store.rows)
+        self._served += 1
+        sink = sink or result_sink.get() or ResultSink()
+        result = QueryResult(columns=columns, rows=rows)
+        sink.begin(columns, 0)
+        sink.add_rows(rows)
+        sink.end(result)
+        return result
+
+    def stats(self) -> AnalyticsStats:
+        store = self.store
+        return AnalyticsStats(self._served, self._fallbacks, store.rows, len(store.segments),
+                              store.syncs, store.appends, store.rebuilds)
+
+
+# --- Process-wide registry ---
+_engines: Dict[str, AnalyticsEngine] = {}
+_engines_lock = threading.Lock()
+
+
+def analytics_enabled() -> bool:
+    return ARROW and os.environ.get(ANALYTICS_ENV, "").strip().lower() in ("1", "true", "yes", "on")
+
+
+def get_analytics(executor: DBExecutor, directory: Optional[str] = None) -> Optional[AnalyticsEngine]:
+    """The shared engine for ``executor``'s database (copy in ``<db>.columnar/``), or None when disabled."""
+    if not analytics_enabled():
+        return None
+    key = os.path.abspath(executor.pool.db_file)
+    with _engines_lock:
+        engine = _engines.get(key)
+        if engine is None:
+            engine = _engines[key] = AnalyticsEngine(executor, directory or key + ".columnar")
+        return engine
+
@@ -0,0 +1,87 @@
+"""
+A long-lived asyncio event loop on a background thread, for sync front ends.
+
+Streamlit runs the script synchronously, and ``asyncio.run`` per message
+creates and tears down a loop each time, taking every pooled HTTP connection
+and in-flight task with it. ``BackgroundLoop`` owns one loop for the life of
+the process; the script thread submits coroutines to it and waits.
+
+Streamlit elements may only be touched from the script thread, so ``run``
+can pump a queue of callables posted by the coroutine (result pages, streamed
+tokens) and execute them on the calling thread while it waits.
+"""
+
+import asyncio
+import concurrent.futures
+import contextvars
+import queue
+import threading
+from typing import Any, Callable, Coroutine, Optional
+
+# How often the waiting thread wakes up to check for posted UI work.
+POLL_INTERVAL = 0.05
+
+
+def _transfer(task: asyncio.Task, future: concurrent.futures.Future):
+    if task.cancelled():
+        future.cancel()
+    elif task.exception() is not None:
+        future.set_exception(task.exception())
+    else:
+        future.set_result(task.result())
+
+
+class BackgroundLoop:
+    """One event loop on a daemon thread; coroutines from any thread run on it."""
+
+    def __init__(self, name: str = "background-loop"):
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def submit(self, coro: Coroutine) -> concurrent.futures.Future:
+        """
+        Schedules ``coro`` on the loop and returns a thread-safe future.
+        The task runs in a copy of the caller's context, so ContextVars set by
+        the caller (e.g. ``result_sink``) are visible to it.
+        """
+        context = contextvars.copy_context()
+        future: concurrent.futures.Future = concurrent.futures.Future()
+
+        def start():
+            if not future.set_running_or_notify_cancel():
+                coro.close()
+                return
+            task = context.run(self.loop.create_task, coro)
+            task.add_done_callback(lambda t: _transfer(t, future))
+
+        self.loop.call_soon_threadsafe(start)
+        return future
+
+    def run(self, coro: Coroutine, calls: Optional["queue.Queue[Callable[[], Any]]"] = None):
+        """
+        Runs ``coro`` on the loop and returns its result. Callables the coroutine
+        puts on ``calls`` are executed on this thread, in order, while waiting.
+        """
+        future = self.submit(coro)
+        if calls is None:
+            return future.result()
+        while not future.done():
+            try:
+                calls.get(timeout=POLL_INTERVAL)()
+            except queue.Empty:
+                pass
+        while True:
+            try:
+                calls.get_nowait()()
+            except queue.Empty:
+                break
+        return future.result()
+
+    def stop(self):
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join()
@@ -0,0 +1,47 @@
+"""
+O(1) analytics served from the trigger-maintained aggregate tables.
+
+``person_balances`` and ``daily_transfer_totals`` are kept current by the
+migration-3 triggers on ``transfers``, so per-person totals no longer need a
+``SUM`` over the whole transfers table.
+"""
+
+import sqlite3
+from typing import Optional
+
+from pydantic import BaseModel
+
+SELECT_BALANCE = '''
+    SELECT name, sent_total, sent_count, received_total, received_count, last_activity
+    FROM person_balances WHERE name = ?
+'''
+
+
+class BalanceSummary(BaseModel):
+    name: str
+    sent_total: float = 0.0
+    sent_count: int = 0
+    received_total: float = 0.0
+    received_count: int = 0
+    net: float = 0.0
+    last_activity: Optional[str] = None
+
+
+def get_balance_summary(conn: sqlite3.Connection, name: str) -> Optional[BalanceSummary]:
+    """Totals for ``name``; a known person with no transfers gets zeroes, an unknown one None."""
+    name = name.lower()
+    row = conn.execute(SELECT_BALANCE, (name,)).fetchone()
+    if row is None:
+        exists = conn.execute("SELECT 1 FROM persons WHERE name = ?", (name,)).fetchone()
+        return BalanceSummary(name=name) if exists else None
+    name, sent_total, sent_count, received_total, received_count, last_activity = row
+    return BalanceSummary(
+        name=name,
+        sent_total=sent_total,
+        sent_count=sent_count,
+        received_total=received_total,
+        received_count=received_count,
+        net=received_total - sent_total,
+        last_activity=last_activity,
+    )
+
@@ -0,0 +1,263 @@
+"""
+Pooled, persistent SQLite connections shared by every agent tool.
+
+Opening a fresh ``sqlite3.connect`` per tool call pays for the connect,
+the pragma setup and a cold page cache every time. The pool keeps a small
+set of tuned connections alive and hands them out per thread / per asyncio
+task, so short lookups only pay for the query itself.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass
+from typing import Dict, Iterator, Optional
+from urllib.parse import quote
+
+from .migrations import migrate
+
+# --- Configuration ---
+DEFAULT_POOL_SIZE = 8
+DEFAULT_CHECKOUT_TIMEOUT = 10.0
+# Per-connection prepared statement cache; the repository's constant SQL stays compiled.
+STATEMENT_CACHE_SIZE = 256
+
+# Applied to every new connection, in order. WAL lets readers run alongside
+# the single writer; NORMAL sync is durable across application crashes in
+# WAL mode and avoids an fsync per commit.
+DEFAULT_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "busy_timeout": 5000,
+    "mmap_size": 256 * 1024 * 1024,
+    "cache_size": -64000,  # negative means KiB, so ~64 MB per connection
+    "temp_store": "MEMORY",
+}
+
+# For read-only pools. The journal mode is persistent and left to the writer's
+# pool; query_only also refuses writes to temp objects and ATTACHed files.
+READ_ONLY_PRAGMAS = {
+    **{name: value for name, value in DEFAULT_PRAGMAS.items() if name != "journal_mode"},
+    "query_only": "ON",
+}
+
+
+class PoolTimeout(sqlite3.OperationalError):
+    """Raised when no pooled connection became free within the checkout timeout."""
+
+
+@dataclass
+class PoolStats:
+    """Health metrics for a connection pool."""
+    db_file: str
+    max_size: int
+    created: int = 0
+    closed: int = 0
+    checkouts: int = 0
+    reused: int = 0
+    waits: int = 0
+    wait_seconds: float = 0.0
+    timeouts: int = 0
+    errors: int = 0
+    in_use: int = 0
+    idle: int = 0
+
+
+class ConnectionPool:
+    """
+    A bounded pool of tuned SQLite connections for a single database file.
+    With ``read_only`` the file is opened with ``mode=ro`` and ``query_only``, so
+    the connections can never take the write lock; the database must already exist.
+    """
+
+    def __init__(self, db_file: str, max_size: int = DEFAULT_POOL_SIZE,
+                 timeout: float = DEFAULT_CHECKOUT_TIMEOUT,
+                 pragmas: Optional[Dict[str, object]] = None, read_only: bool = False):
+        self.db_file = db_file
+        self.max_size = max_size
+        self.timeout = timeout
+        self.read_only = read_only
+        self.pragmas = dict((READ_ONLY_PRAGMAS if read_only else DEFAULT_PRAGMAS) if pragmas is None else pragmas)
+        self._idle = []
+        self._size = 0
+        self._cond = threading.Condition()
+        self._stats = PoolStats(db_file=db_file, max_size=max_size)
+        # The connection currently checked out by this thread / asyncio task,
+        # so nested helpers reuse it instead of taking a second one.
+        self._current: ContextVar[Optional[sqlite3.Connection]] = ContextVar(
+            f"sqlite_pool_{id(self)}", default=None
+        )
+
+    def _connect(self) -> sqlite3.Connection:
+        if self.read_only:
+            uri = f"file:{quote(os.path.abspath(self.db_file))}?mode=ro"
+            conn = sqlite3.connect(uri, uri=True, check_same_thread=False,
+                                   cached_statements=STATEMENT_CACHE_SIZE)
+        else:
+            conn = sqlite3.connect(self.db_file, check_same_thread=False,
+                                   cached_statements=STATEMENT_CACHE_SIZE)
+        for name, value in self.pragmas.items():
+            conn.execute(f"PRAGMA {name} = {value}")
+        return conn
+
+    def _acquire(self) -> sqlite3.Connection:
+        deadline = time.monotonic() + self.timeout
+        waited = False
+        with self._cond:
+            while True:
+                if self._idle:
+                    self._stats.reused += 1
+                    conn = self._idle.pop()
+                    break
+                if self._size < self.max_size:
+                    self._size += 1
+                    conn = None
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._stats.timeouts += 1
+                    raise PoolTimeout(
+                        f"No free connection to {self.db_file} after {self.timeout:.1f}s"
+                    )
+                if not waited:
+                    waited = True
+                    self._stats.waits += 1
+                started = time.monotonic()
+                self._cond.wait(remaining)
+                self._stats.wait_seconds += time.monotonic() - started
+            self._stats.checkouts += 1
+            self._stats.in_use += 1
+
+        if conn is None:
+            try:
+                conn = self._connect()
+            except sqlite3.Error:
+                with self._cond:
+                    self._size -= 1
+                    self._stats.in_use -= 1
+                    self._stats.errors += 1
+                    self._cond.notify()
+                raise
+            with self._cond:
+                self._stats.created += 1
+        return conn
+
+    def _release(self, conn: sqlite3.Connection, broken: bool = False):
+        if not broken and conn.in_transaction:
+            try:
+                conn.rollback()
+            except sqlite3.Error:
+                broken = True
+        with self._cond:
+            self._stats.in_use -= 1
+            if broken:
+                self._size -= 1
+                self._stats.closed += 1
+                self._stats.errors += 1
+            else:
+                self._idle.append(conn)
+            self._cond.notify()
+        if broken:
+            conn.close()
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        """
+        Checks out a connection for the current thread / asyncio task.
+        Commits on a clean exit and rolls back on error, like ``with sqlite3.connect(...)``.
+        Nested calls reuse the outer connection and leave the transaction to it.
+        """
+        current = self._current.get()
+        if current is not None:
+            yield current
+            return
+
+        conn = self._acquire()
+        token = self._current.set(conn)
+        broken = False
+        try:
+            yield conn
+            if conn.in_transaction:
+                conn.commit()
+        except BaseException as e:
+            # A bare DatabaseError (e.g. "file is not a database") or an
+            # InterfaceError means the handle itself is unusable.
+            broken = type(e) in (sqlite3.DatabaseError, sqlite3.InterfaceError)
+            if not broken and conn.in_transaction:
+                conn.rollback()
+            raise
+        finally:
+            self._current.reset(token)
+            self._release(conn, broken=broken)
+
+    def health_check(self) -> PoolStats:
+        """Pings every idle connection, drops the broken ones and returns the current stats."""
+        with self._cond:
+            idle, self._idle = self._idle, []
+        healthy = []
+        for conn in idle:
+            try:
+                conn.execute("SELECT 1").fetchone()
+                healthy.append(conn)
+            except sqlite3.Error:
+                conn.close()
+                with self._cond:
+                    self._size -= 1
+                    self._stats.closed += 1
+                    self._stats.errors += 1
+        with self._cond:
+            self._idle.extend(healthy)
+            self._cond.notify_all()
+        return self.stats()
+
+    def stats(self) -> PoolStats:
+        """Returns a snapshot of the pool metrics."""
+        with self._cond:
+            snapshot = PoolStats(**asdict(self._stats))
+            snapshot.idle = len(self._idle)
+        return snapshot
+
+    def close(self):
+        """Closes all idle connections. Checked-out connections are closed on release."""
+        with self._cond:
+            idle, self._idle = self._idle, []
+            self._size -= len(idle)
+            self._stats.closed += len(idle)
+        for conn in idle:
+            conn.close()
+
+
+# --- Process-wide registry ---
+_pools: Dict[str, ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(db_file: str, read_only: bool = False, **kwargs) -> ConnectionPool:
+    """Returns the shared pool (read-write, or read-only) for ``db_file``, creating it on first use."""
+    key = os.path.abspath(db_file) + ("?mode=ro" if read_only else "")
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = _pools[key] = ConnectionPool(db_file, read_only=read_only, **kwargs)
+        return pool
+
+
+# --- Database Setup ---
+def init_db(pool: ConnectionPool):
+    """Initializes the SQLite database, applying any pending schema migrations."""
+    with pool.connection() as conn:
+        migrate(conn)
+
+
+def table_version(conn: sqlite3.Connection, table: str) -> int:
+    """Returns the trigger-maintained change counter for ``table``."""
+    row = conn.execute("SELECT version FROM table_versions WHERE name = ?", (table,)).fetchone()
+    return row[0] if row else 0
+
+
+def table_versions(conn: sqlite3.Connection) -> Dict[str, int]:
+    """Returns every trigger-maintained change counter, keyed by table name."""
+    return dict(conn.execute("SELECT name, version FROM table_versions"))
@@ -0,0 +1,91 @@
+"""
+Async-native persons directory with a cached in-memory view of ``persons``.
+
+The view is stamped with the trigger-maintained ``table_versions`` counter.
+Listing only costs a version lookup while nothing changed; writes made
+through the directory are applied to the view in place, and changes from
+anywhere else (other processes, model-written SQL) trigger a single reload.
+"""
+
+import bisect
+import sqlite3
+from typing import Callable, Dict, List, Optional, Tuple
+
+from . import repository
+from .db import table_version
+from .executor import DBExecutor
+from .repository import Person
+
+
+def _load(conn: sqlite3.Connection) -> Tuple[int, List[Person]]:
+    # Version and rows come from the same read transaction, so they agree.
+    conn.execute("BEGIN")
+    try:
+        version = table_version(conn, "persons")
+        persons = repository.list_persons(conn)
+    finally:
+        conn.rollback()
+    return version, persons
+
+
+def _insert(conn: sqlite3.Connection, name: str, address: str) -> Optional[int]:
+    if not repository.insert_person(conn, name, address):
+        return None
+    return table_version(conn, "persons")
+
+
+class PersonsDirectory:
+    """Cached, versioned view of the ``persons`` table."""
+
+    def __init__(self, executor: DBExecutor):
+        self._executor = executor
+        self._version: Optional[int] = None
+        self._persons: List[Person] = []
+        self._by_name: Dict[str, str] = {}
+        self._rendered: Dict[Tuple[str, str], str] = {}
+        self.reloads = 0
+
+    def _replace(self, version: int, persons: List[Person]):
+        self._version = version
+        self._persons = persons
+        self._by_name = {p.name: p.address for p in persons}
+        self._rendered.clear()
+
+    async def _refresh(self):
+        current = await self._executor.read(table_version, "persons")
+        if current != self._version:
+            self._replace(*await self._executor.read(_load))
+            self.reloads += 1
+
+    async def list(self) -> List[Person]:
+        """All persons ordered by name."""
+        await self._refresh()
+        return list(self._persons)
+
+    async def render(self, formatter: Callable[[List[Person]], str]) -> str:
+        """``formatter(persons)``, memoized until the table changes."""
+        await self._refresh()
+        # Keyed by name rather than identity: Streamlit re-creates functions on every rerun.
+        key = (formatter.__module__, formatter.__qualname__)
+        rendered = self._rendered.get(key)
+        if rendered is None:
+            rendered = self._rendered[key] = formatter(self._persons)
+        return rendered
+
+    async def get_address(self, name: str) -> Optional[str]:
+        await self._refresh()
+        return self._by_name.get(name.lower())
+
+    async def add(self, name: str, address: str) -> bool:
+        """Adds a person unless the name or address is taken. Returns False if it was."""
+        name = name.lower()
+        version = await self._executor.write(_insert, name, address)
+        if version is None:
+            return False
+        if self._version is not None and version == self._version + 1:
+            # Ours was the only change since the view was built: patch it in place.
+            bisect.insort(self._persons, Person(name, address))
+            self._by_name[name] = address
+            self._rendered.clear()
+            self._version = version
+        return True
@@ -0,0 +1,123 @@
+"""
+Compact, token-budgeted encoding of SQL results for the model.
+
+Whatever a tool returns is fed verbatim into the next model turn, so a
+box-drawn rich table or a JSON dump of every row costs far more prompt
+tokens than the information in it. ``encode_result`` emits a row count,
+per-column stats and CSV rows, keeping a head/tail sample when the rows do
+not fit the budget. The full result still reaches the UI through the
+``ResultSink``.
+"""
+
+import csv
+import io
+import math
+from collections import Counter
+from typing import List, Optional, Sequence
+
+from .results import QueryResult
+
+# --- Configuration ---
+DEFAULT_TOKEN_BUDGET = 1500
+MAX_CELL_CHARS = 80
+# Rough chars-per-token for CSV-ish text; Qwen's tokenizer is not available offline.
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def _cell(value) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, float):
+        text = f"{value:.6g}" if abs(value) < 1e15 else repr(value)
+    else:
+        text = str(value)
+    if len(text) > MAX_CELL_CHARS:
+        text = text[:MAX_CELL_CHARS - 1] + "…"
+    return text
+
+
+def _csv_line(values: Sequence) -> str:
+    buffer = io.StringIO()
+    csv.writer(buffer, lineterminator="").writerow([_cell(v) for v in values])
+    return buffer.getvalue()
+
+
+def column_stats(columns: Sequence[str], rows: Sequence[tuple]) -> List[str]:
+    """One line per column: min/max/mean/sum for numbers, distinct count and top value otherwise."""
+    lines = []
+    for i, name in enumerate(columns):
+        values = [row[i] for row in rows if row[i] is not None]
+        nulls = len(rows) - len(values)
+        null_note = f" nulls={nulls}" if nulls else ""
+        if values and all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in values):
+            total = sum(values)
+            lines.append(
+                f"{name}: min={_cell(min(values))} max={_cell(max(values))} "
+                f"mean={_cell(total / len(values))} sum={_cell(total)}{null_note}"
+            )
+        elif values:
+            counts = Counter(values)
+            top, top_count = counts.most_common(1)[0]
+            if len(counts) == len(values):
+                lines.append(f"{name}: all {len(values)} distinct{null_note}")
+            else:
+                lines.append(f"{name}: {len(counts)} distinct, top={_cell(top)} ({top_count}){null_note}")
+        else:
+            lines.append(f"{name}: all null")
+    return lines
+
+
+def encode_rows(columns: Sequence[str], rows: Sequence[tuple], budget: int = DEFAULT_TOKEN_BUDGET,
+                summary: Optional[str] = None, stats: bool = True) -> str:
+    """CSV header plus as many rows as fit ``budget``; a head/tail sample if they do not all fit."""
+    header = [summary or f"{len(rows)} rows"]
+    if stats and len(rows) > 1:
+        header.append("stats: " + "; ".join(column_stats(columns, rows)))
+    header.append(_csv_line(columns))
+    remaining = budget - estimate_tokens("\n".join(header))
+
+    lines = [_csv_line(row) for row in rows]
+    if sum(estimate_tokens(line) + 1 for line in lines) <= remaining:
+        return "\n".join(header + lines)
+
+    # Alternate between head and tail so both ends of an ordered result are visible.
+    head, tail = [], []
+    lo, hi = 0, len(lines) - 1
+    remaining -= estimate_tokens("... 0000000 rows omitted ...")
+    while lo <= hi:
+        line = lines[lo] if len(head) <= len(tail) else lines[hi]
+        cost = estimate_tokens(line) + 1
+        if cost > remaining:
+            break
+        remaining -= cost
+        if len(head) <= len(tail):
+            head.append(line)
+            lo += 1
+        else:
+            tail.append(line)
+            hi -= 1
+    omitted = len(lines) - len(head) - len(tail)
+    return "\n".join(header + head + [f"... {omitted} rows omitted ..."] + tail[::-1])
+
+
+def encode_result(result: QueryResult, budget: int = DEFAULT_TOKEN_BUDGET) -> str:
+    """Token-budgeted text for a (possibly capped) ``QueryResult``."""
+    if not result.rows:
+        return "Query executed successfully, but returned no results."
+    first, last = result.offset + 1, result.offset + len(result.rows)
+    if result.truncated:
+        summary = (
+            f"rows {first}-{last} of more (capped); call `fetch_more_results` with "
+            f"continuation token '{result.continuation}' for the rest"
+        )
+    elif result.offset:
+        summary = f"rows {first}-{last} (final slice)"
+    else:
+        summary = f"{len(result.rows)} rows"
+    if not result.truncated and result.row_limit and last >= result.row_limit:
+        summary += f"; stopped at the automatic LIMIT {result.row_limit}, add filters or an explicit LIMIT"
+    return encode_rows(result.columns, result.rows, budget, summary=summary)
@@ -0,0 +1,129 @@
+"""
+Runs SQLite work off the asyncio event loop.
+
+The agent tools are ``async def`` but ``sqlite3`` is blocking, so calling it
+directly stalls every other agent run sharing the loop. ``DBExecutor`` pushes
+reads onto a bounded thread pool and funnels all writes through one dedicated
+writer thread (SQLite allows a single writer at a time anyway), exposing both
+as awaitables. Given a separate ``read_pool`` (normally a read-only pool on
+the same file), reads never touch the connections the writer uses.
+"""
+
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Callable, Dict, Iterator, Optional, TypeVar
+
+from .db import ConnectionPool
+
+T = TypeVar("T")
+
+DEFAULT_READERS = 4
+
+
+class DBExecutor:
+    """Awaitable access to a ``ConnectionPool`` via a writer thread plus a reader pool."""
+
+    def __init__(self, pool: ConnectionPool, readers: int = DEFAULT_READERS,
+                 read_pool: Optional[ConnectionPool] = None):
+        read_pool = read_pool or pool
+        needed = readers + 1 if read_pool is pool else readers
+        if needed > read_pool.max_size:
+            raise ValueError(
+                f"Pool for {read_pool.db_file} has {read_pool.max_size} connections, "
+                f"need at least {needed} for {readers} readers{' and the writer' if read_pool is pool else ''}"
+            )
+        self.pool = pool
+        self.read_pool = read_pool
+        self._readers = ThreadPoolExecutor(max_workers=readers, thread_name_prefix="sqlite-reader")
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sqlite-writer")
+
+    def _run(self, pool: ConnectionPool, fn: Callable[..., T], args, kwargs) -> T:
+        with pool.connection() as conn:
+            return fn(conn, *args, **kwargs)
+
+    async def _submit(self, executor: ThreadPoolExecutor, pool: ConnectionPool, fn, args, kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(executor, functools.partial(self._run, pool, fn, args, kwargs))
+
+    async def read(self, fn: Callable[..., T], *args, **kwargs) -> T:
+        """Runs ``fn(conn, *args, **kwargs)`` on a reader thread, with a ``read_pool`` connection, and returns its result."""
+        return await self._submit(self._readers, self.read_pool, fn, args, kwargs)
+
+    async def write(self, fn: Callable[..., T], *args, **kwargs) -> T:
+        """
+        Runs ``fn(conn, *args, **kwargs)`` on the single writer thread.
+        The transaction is committed when ``fn`` returns and rolled back if it raises.
+        """
+        return await self._submit(self._writer, self.pool, fn, args, kwargs)
+
+    async def read_stream(self, fn: Callable[..., Iterator[T]], *args, maxsize: int = 2, **kwargs) -> AsyncIterator[T]:
+        """
+        Iterates ``fn(conn, *args, **kwargs)`` on a reader thread, yielding its items on the loop.
+        At most ``maxsize`` items are buffered, so a slow consumer throttles the producer;
+        leaving the ``async for`` early stops the producer and releases its connection.
+        """
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue(maxsize)
+        stopped = threading.Event()
+
+        def put(item):
+            asyncio.run_coroutine_threadsafe(queue.put(item), loop).result()
+
+        def produce():
+            try:
+                with self.read_pool.connection() as conn:
+                    for item in fn(conn, *args, **kwargs):
+                        if stopped.is_set():
+                            return
+                        put((True, item))
+            except BaseException as e:
+                put((False, e))
+                return
+            put((False, None))
+
+        producer = loop.run_in_executor(self._readers, produce)
+        try:
+            while True:
+                ok, item = await queue.get()
+                if ok:
+                    yield item
+                elif item is None:
+                    break
+                else:
+                    raise item
+        finally:
+            stopped.set()
+            # Unblock a producer waiting on a full queue, then wait for it to let go of its connection.
+            while not producer.done():
+                getter = asyncio.ensure_future(queue.get())
+                await asyncio.wait({getter, producer}, return_when=asyncio.FIRST_COMPLETED)
+                getter.cancel()
+
+    def read_sync(self, fn: Callable[..., T], *args, **kwargs) -> T:
+        """Blocking variant of ``read`` for callers that are not on an event loop."""
+        return self._readers.submit(self._run, self.read_pool, fn, args, kwargs).result()
+
+    def write_sync(self, fn: Callable[..., T], *args, **kwargs) -> T:
+        """Blocking variant of ``write`` for callers that are not on an event loop."""
+        return self._writer.submit(self._run, self.pool, fn, args, kwargs).result()
+
+    def shutdown(self, wait: bool = True):
+        self._readers.shutdown(wait=wait)
+        self._writer.shutdown(wait=wait)
+
+
+# --- Process-wide registry ---
+_executors: Dict[int, DBExecutor] = {}
+_executors_lock = threading.Lock()
+
+
+def get_executor(pool: ConnectionPool, **kwargs) -> DBExecutor:
+    """Returns the shared executor for ``pool``, creating it on first use."""
+    with _executors_lock:
+        executor = _executors.get(id(pool))
+        if executor is None:
+            executor = _executors[id(pool)] = DBExecutor(pool, **kwargs)
+        return executor
+
@@ -0,0 +1,280 @@
+"""
+Pre-execution checks and run-time budgets for model-written SQL.
+
+``execute_sql_query`` runs whatever the model writes against the shared
+database, so one cross join of ``transfers`` with itself can pin a reader
+(or the single writer) for minutes. Before a statement runs, ``check``
+reads its ``EXPLAIN QUERY PLAN``, classifies each loop as a full scan,
+an index scan or an index search, and estimates the rows it will visit
+from the table sizes. Statements over ``max_estimated_rows`` are rejected
+with advice, and a SELECT without a ``LIMIT`` gets one appended.
+
+Estimates miss things (correlated subqueries over large ranges, big
+``LIKE`` filters), so execution also runs under ``budget``: a progress
+handler that interrupts the statement once it exceeds its time or VM-step
+allowance. Both failures are ``sqlite3.OperationalError`` subclasses, so
+the tools report them to the model like any other database error.
+"""
+
+import re
+import sqlite3
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional, Sequence, Union
+
+# --- Configuration ---
+# The progress handler runs every this many VM instructions; it also counts them for tracing.
+VM_STEP_GRANULARITY = 1000
+# Rows SQLite itself assumes an equality lookup or a range returns without statistics.
+EQUALITY_ROWS = 10
+RANGE_FRACTION = 4
+
+
+@dataclass(frozen=True)
+class GuardrailPolicy:
+    # Rows the plan may visit (summed over loops, multiplied through joins) before it is rejected.
+    max_estimated_rows: int = 50_000_000
+    # Appended as LIMIT to SELECTs that have none; continuations stop there.
+    max_result_rows: int = 10_000
+    timeout: float = 5.0
+    max_vm_steps: Optional[int] = 2_000_000_000
+
+
+DEFAULT_POLICY = GuardrailPolicy()
+
+
+class QueryRejected(sqlite3.OperationalError):
+    """Raised before execution when a statement's plan is too expensive."""
+
+
+class QueryBudgetExceeded(sqlite3.OperationalError):
+    """Raised when a running statement is interrupted for exceeding its budget."""
+
+
+@dataclass
+class QueryAnalysis:
+    plan: List[str] = field(default_factory=list)
+    full_scans: List[str] = field(default_factory=list)   # tables read row by row without an index
+    index_scans: List[str] = field(default_factory=list)  # tables read in full through an index
+    searches: List[str] = field(default_factory=list)     # tables reached through index lookups
+    temp_btrees: int = 0                                  # sorts / groupings that need a temporary b-tree
+    estimated_rows: int = 0
+
+    @property
+    def uses_index(self) -> bool:
+        return bool(self.searches or self.index_scans)
+
+
+@dataclass
+class Checked:
+    sql: str
+    analysis: QueryAnalysis
+    row_limit: Optional[int] = None  # set when the LIMIT was added by ``check``
+
+
+_LOOP = re.compile(r"^(SCAN|SEARCH) (?:TABLE )?(\w+)(?: AS (\w+))?(?: USING (.*))?$")
+_SOURCE = re.compile(r"\b(?:FROM|JOIN|UPDATE|INTO)\s+[\"`\[]?(\w+)[\"`\]]?(?:\s+(?:AS\s+)?(\w+))?|,\s*(\w+)(?:\s+(?:AS\s+)?(\w+))?",
+                     re.IGNORECASE)
+# Literals, comments and separators, so the end of the statement proper can be found.
+_TAIL_TOKEN = re.compile(r"'(?:[^']|'')*'?|\"(?:[^\"]|\"\")*\"?|--[^\n]*|/\*.*?(?:\*/|$)|;|\s+|[^'\";\s/-]+|.",
+                         re.DOTALL)
+_KEYWORDS = {"where", "join", "inner", "left", "right", "cross", "on", "using", "group", "order", "limit",
+             "natural", "set", "values", "select", "union", "except", "intersect", "having", "window", "as"}
+
+
+def _strip(sql: str) -> str:
+    """The statement with comments removed and string literals blanked, for keyword scanning."""
+    sql = re.sub(r"--[^\n]*|/\*.*?\*/", " ", sql, flags=re.DOTALL)
+    return re.sub(r"'(?:[^']|'')*'", "''", sql)
+
+
+def _aliases(sql: str) -> Dict[str, str]:
+    aliases = {}
+    for m in _SOURCE.finditer(_strip(sql)):
+        table, alias = (m.group(1), m.group(2)) if m.group(1) else (m.group(3), m.group(4))
+        aliases[table.lower()] = table
+        if alias and alias.lower() not in _KEYWORDS:
+            aliases[alias.lower()] = table
+    return aliases
+
+
+def _table_rows(conn: sqlite3.Connection, table: str, cache: Dict[str, int]) -> int:
+    if table not in cache:
+        try:
+            # The largest rowid bounds the row count and is a single b-tree descent, unlike COUNT(*).
+            cache[table] = conn.execute(f'SELECT MAX(rowid) FROM "{table}"').fetchone()[0] or 0
+        except sqlite3.Error:
+            cache[table] = 0  # a CTE or subquery name; its own loops are counted where they run
+    return cache[table]
+
+
+def _unique_lookup(conn: sqlite3.Connection, using: str) -> bool:
+    """Whether a SEARCH's ``USING`` clause is an equality match on every column of a unique key."""
+    if using.startswith("INTEGER PRIMARY KEY") or using.startswith("PRIMARY KEY"):
+        return "=" in using and not re.search(r"[<>]", using)
+    match = re.match(r"(?:COVERING )?INDEX (\w+) \((.*)\)$", using)
+    if match is None:
+        return False
+    index, constraints = match.groups()
+    unique = conn.execute("SELECT \"unique\" FROM pragma_index_list(?) WHERE name = ?",
+                          (_index_table(conn, index), index)).fetchone()
+    columns = conn.execute("SELECT COUNT(*) FROM pragma_index_info(?)", (index,)).fetchone()[0]
+    return bool(unique and unique[0]) and constraints.count("=?") >= columns
+
+
+def _index_table(conn: sqlite3.Connection, index: str) -> str:
+    row = conn.execute("SELECT tbl_name FROM sqlite_master WHERE type = 'index' AND name = ?", (index,)).fetchone()
+    return row[0] if row else ""
+
+
+def analyze(conn: sqlite3.Connection, sql: str, params: Union[Sequence, dict] = ()) -> QueryAnalysis:
+    """Classifies the plan's loops and estimates the rows the statement will visit."""
+    rows = conn.execute("EXPLAIN QUERY PLAN " + sql, params).fetchall()
+    children: Dict[int, List[tuple]] = {}
+    for node in rows:
+        children.setdefault(node[1], []).append(node)
+    analysis = QueryAnalysis(plan=[node[3] for node in rows])
+    aliases = _aliases(sql)
+    sizes: Dict[str, int] = {}
+
+    def cost(parent: int) -> int:
+        # Loops under one parent nest: each runs once per row of the loops before it.
+        total, outer = 0, 1
+        for node_id, _, _, detail in children.get(parent, []):
+            loop = _LOOP.match(detail)
+            if loop is None:
+                if detail.startswith("USE TEMP B-TREE"):
+                    analysis.temp_btrees += 1
+                subtree = cost(node_id)
+                total += outer * subtree if detail.startswith("CORRELATED") else subtree
+                continue
+            kind, name, alias, using = loop.groups()
+            table = aliases.get((alias or name).lower(), name)
+            table_rows = _table_rows(conn, table, sizes)
+            if kind == "SCAN":
+                (analysis.index_scans if using else analysis.full_scans).append(table)
+                factor = table_rows
+            else:
+                analysis.searches.append(table)
+                if using and re.search(r"[<>]", using):
+                    factor = max(1, table_rows // RANGE_FRACTION)
+                elif using and _unique_lookup(conn, using):
+                    factor = 1
+                else:
+                    factor = min(table_rows, EQUALITY_ROWS)
+            outer *= max(1, factor)
+            total += outer
+            total += cost(node_id)
+        return total
+
+    analysis.estimated_rows = cost(0)
+    return analysis
+
+
+def _statement_body(sql: str) -> str:
+    """``sql`` without trailing semicolons, comments and whitespace."""
+    end = 0
+    for m in _TAIL_TOKEN.finditer(sql):
+        token = m.group()
+        if not (token == ";" or token.isspace() or token.startswith("--") or token.startswith("/*")):
+            end = m.end()
+    return sql[:end]
+
+
+def _has_top_level_limit(sql: str) -> bool:
+    depth = 0
+    for token in re.findall(r"\(|\)|\w+", _strip(sql)):
+        if token == "(":
+            depth += 1
+        elif token == ")":
+            depth -= 1
+        elif depth == 0 and token.upper() == "LIMIT":
+            return True
+    return False
+
+
+def _is_select(sql: str) -> bool:
+    return re.match(r"\s*(?:SELECT|WITH|VALUES)\b", _strip(sql), re.IGNORECASE) is not None
+
+
+def _indexed_columns(conn: sqlite3.Connection, table: str) -> List[str]:
+    columns = []
+    for index in conn.execute(f'PRAGMA index_list("{table}")').fetchall():
+        info = conn.execute(f'PRAGMA index_info("{index[1]}")').fetchall()
+        if info and info[0][2] not in columns:
+            columns.append(info[0][2])
+    return columns
+
+
+def check(conn: sqlite3.Connection, sql: str, params: Union[Sequence, dict] = (),
+          policy: GuardrailPolicy = DEFAULT_POLICY, limit: bool = True) -> Checked:
+    """Analyzes ``sql`` and returns it ready to run (LIMIT added to SELECTs if ``limit``); raises ``QueryRejected``."""
+    analysis = analyze(conn, sql, params)
+    if analysis.estimated_rows > policy.max_estimated_rows:
+        hints = [f"{table} is indexed on {', '.join(columns)}"
+                 for table in dict.fromkeys(analysis.full_scans + analysis.index_scans)
+                 if (columns := _indexed_columns(conn, table))]
+        raise QueryRejected(
+            f"Rejected before execution: the plan ({'; '.join(analysis.plan)}) would visit about "
+            f"{analysis.estimated_rows:,} rows, over the limit of {policy.max_estimated_rows:,}. "
+            f"Filter on indexed columns{' (' + '; '.join(hints) + ')' if hints else ''}, avoid cross joins, "
+            f"or use the maintained person_balances / daily_transfer_totals tables."
+        )
+    if limit and _is_select(sql) and not _has_top_level_limit(sql):
+        # Trailing ``;`` and comments would end the statement before the LIMIT (or swallow it).
+        return Checked(f"{_statement_body(sql)}\nLIMIT {policy.max_result_rows}", analysis, policy.max_result_rows)
+    return Checked(sql, analysis)
+
+
+class Budget:
+    """VM steps used by the statement under ``budget``, and why it was stopped, if it was."""
+
+    def __init__(self, policy: GuardrailPolicy):
+        self.policy = policy
+        self.steps = 0
+        self.exceeded: Optional[str] = None
+        self.deadline = time.monotonic() + policy.timeout
+
+    def _tick(self) -> int:
+        self.steps += VM_STEP_GRANULARITY
+        if self.policy.max_vm_steps and self.steps > self.policy.max_vm_steps:
+            self.exceeded = f"{self.policy.max_vm_steps:,} VM steps"
+        elif time.monotonic() > self.deadline:
+            self.exceeded = f"{self.policy.timeout:g}s"
+        return 1 if self.exceeded else 0
+
+    @contextmanager
+    def paused(self):
+        """Time spent here (e.g. a generator waiting on its consumer) does not count against the timeout."""
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.deadline += time.monotonic() - started
+
+
+@contextmanager
+def budget(conn: sqlite3.Connection, policy: GuardrailPolicy = DEFAULT_POLICY) -> Iterator[Budget]:
+    """Interrupts statements run on ``conn`` inside the block once they exceed the policy's budget."""
+    spent = Budget(policy)
+    conn.set_progress_handler(spent._tick, VM_STEP_GRANULARITY)
+    try:
+        yield spent
+    except sqlite3.OperationalError as e:
+        if spent.exceeded:
+            raise QueryBudgetExceeded(
+                f"Query interrupted after {spent.exceeded}; it was scanning too much. "
+                f"Narrow it with indexed filters or an aggregate table."
+            ) from e
+        raise
+    finally:
+        conn.set_progress_handler(None, 0)
+
+
+def execute_guarded(conn: sqlite3.Connection, sql: str, params: Union[Sequence, dict] = (),
+                    policy: GuardrailPolicy = DEFAULT_POLICY) -> sqlite3.Cursor:
+    """Checks and runs a statement that completes in ``execute`` (writes); rows are not fetched here."""
+    checked = check(conn, sql, params, policy, limit=False)
+    with budget(conn, policy):
+        return conn.execute(checked.sql, params)
@@ -0,0 +1,188 @@
+"""
+Conversation memory with a bounded, compacting context window.
+
+Each turn's messages (``result.new_messages()``, or a synthetic exchange for
+answers that never reached the model) are kept and fed back to the agent as
+``message_history``. The last ``recent_turns`` turns stay verbatim; older
+turns are compacted once, when they fall out of that window: ``<think>``
+blocks are dropped and tool outputs cut to their summary lines. If the
+history still exceeds ``budget`` tokens, whole turns are dropped from the
+oldest end, so tool calls and their returns always stay paired.
+
+With a non-empty history pydantic-ai takes the system prompt from the
+history instead of the agent, so the memory holds it and puts it in front of
+whatever turns survive.
+
+Most questions stand on their own ("top 5 senders this month") and their
+answers do not depend on what was asked before; ``depends_on_history``
+picks out the follow-ups ("and for madhur?", "show them again") so caches
+key only those on the conversation.
+"""
+
+import dataclasses
+import hashlib
+import re
+from typing import List, NamedTuple, Sequence
+
+from pydantic_ai.messages import (
+    ModelMessage, ModelRequest, ModelResponse, SystemPromptPart, TextPart, ToolCallPart, ToolReturnPart,
+    UserPromptPart,
+)
+
+from .encoding import estimate_tokens
+from .response_parser import parse_response
+
+# --- Configuration ---
+DEFAULT_HISTORY_BUDGET = 2000
+DEFAULT_RECENT_TURNS = 2
+# Tool outputs in compacted turns keep their first lines (row count, stats) up to this many characters.
+TOOL_SUMMARY_CHARS = 240
+
+# Pronouns and connectives that point back at earlier turns.
+_FOLLOW_UP = re.compile(
+    r"^\s*(?:and|but|then|now|what about|how about|ok|okay)\b"
+    r"|\b(?:it|its|that|those|them|they|their|he|she|him|her|his|hers|this|these|there|same|again|"
+    r"too|also|previous|above|earlier|instead|else|another|other|others)\b",
+    re.IGNORECASE,
+)
+
+
+def is_follow_up(prompt: str) -> bool:
+    """Whether ``prompt`` reads as referring to earlier turns rather than standing alone."""
+    return _FOLLOW_UP.search(prompt) is not None
+
+
+def _part_text(part) -> str:
+    if isinstance(part, ToolCallPart):
+        return f"{part.tool_name} {part.args_as_json_str()}"
+    return str(getattr(part, "content", ""))
+
+
+def _tokens(messages: Sequence[ModelMessage]) -> int:
+    return sum(estimate_tokens(_part_text(part)) for message in messages for part in message.parts)
+
+
+def _summarize_tool_output(content) -> str:
+    text = str(content)
+    if len(text) <= TOOL_SUMMARY_CHARS:
+        return text
+    head = text[:TOOL_SUMMARY_CHARS].rsplit("\n", 1)[0]
+    return f"{head}\n… [{len(text) - len(head)} chars of tool output omitted]"
+
+
+def compact_messages(messages: Sequence[ModelMessage]) -> List[ModelMessage]:
+    """Drops ``<think>`` blocks and cuts tool outputs down to their summary lines."""
+    compacted = []
+    for message in messages:
+        parts = []
+        for part in message.parts:
+            if isinstance(part, TextPart):
+                answer = parse_response(part.content).answer
+                if answer:
+                    parts.append(dataclasses.replace(part, content=answer))
+            elif isinstance(part, ToolReturnPart):
+                parts.append(dataclasses.replace(part, content=_summarize_tool_output(part.content)))
+            else:
+                parts.append(part)
+        if parts:
+            compacted.append(dataclasses.replace(message, parts=parts))
+    return compacted
+
+
+class _Turn(NamedTuple):
+    messages: List[ModelMessage]
+    tokens: int
+    compacted: bool
+
+
+class ConversationMemory:
+    """Prior turns of one conversation, ready to pass as ``message_history``."""
+
+    def __init__(self, system_prompt: str, budget: int = DEFAULT_HISTORY_BUDGET,
+                 recent_turns: int = DEFAULT_RECENT_TURNS):
+        self.system_prompt = system_prompt
+        self.budget = budget
+        self.recent_turns = recent_turns
+        self._turns: List[_Turn] = []
+        self.compacted = 0
+        self.dropped = 0
+
+    def __len__(self) -> int:
+        return len(self._turns)
+
+    @property
+    def tokens(self) -> int:
+        return sum(turn.tokens for turn in self._turns)
+
+    def history(self) -> List[ModelMessage]:
+        """The compacted conversation, with the system prompt in front; empty before the first turn."""
+        messages = [message for turn in self._turns for message in turn.messages]
+        if not messages:
+            return []
+        first = messages[0]
+        system = SystemPromptPart(self.system_prompt)
+        if isinstance(first, ModelRequest):
+            messages[0] = dataclasses.replace(first, parts=[system, *first.parts])
+        else:
+            messages.insert(0, ModelRequest(parts=[system]))
+        return messages
+
+    def fingerprint(self) -> str:
+        """Stable digest of the history, for keying caches on conversation context; '' when empty."""
+        if not self._turns:
+            return ""
+        digest = hashlib.sha1()
+        for turn in self._turns:
+            for message in turn.messages:
+                for part in message.parts:
+                    digest.update(f"{part.part_kind}\x00{_part_text(part)}\x01".encode())
+        return digest.hexdigest()
+
+    def depends_on_history(self, prompt: str) -> bool:
+        """Whether the answer to ``prompt`` may depend on the turns so far."""
+        return bool(self._turns) and is_follow_up(prompt)
+
+    def cache_context(self, prompt: str) -> str:
+        """The history fingerprint if ``prompt`` depends on it, else ''; pass as the cache ``context``."""
+        return self.fingerprint() if self.depends_on_history(prompt) else ""
+
+    def add_run(self, messages: Sequence[ModelMessage]):
+        """Records an agent run's ``new_messages()``; the memory supplies the system prompt itself."""
+        kept = []
+        for message in messages:
+            if isinstance(message, ModelRequest):
+                parts = [p for p in message.parts if not isinstance(p, SystemPromptPart)]
+                if not parts:
+                    continue
+                message = dataclasses.replace(message, parts=parts)
+            kept.append(message)
+        self._append(kept)
+
+    def add_exchange(self, prompt: str, output: str):
+        """Records a turn answered without the model (fast path, saved SQL, response cache)."""
+        self._append([
+            ModelRequest(parts=[UserPromptPart(prompt)]),
+            ModelResponse(parts=[TextPart(output)]),
+        ])
+
+    def _append(self, messages: List[ModelMessage]):
+        self._turns.append(_Turn(messages, _tokens(messages), False))
+        # Compact each turn once, as it leaves the verbatim window.
+        for i in range(max(0, len(self._turns) - self.recent_turns)):
+            self._compact(i)
+        while self.tokens > self.budget and len(self._turns) > 1:
+            self._turns.pop(0)
+            self.dropped += 1
+        if self.tokens > self.budget:
+            self._compact(0)
+
+    def _compact(self, index: int):
+        turn = self._turns[index]
+        if turn.compacted:
+            return
+        messages = compact_messages(turn.messages)
+        self._turns[index] = _Turn(messages, _tokens(messages), True)
+        self.compacted += 1
+
+    def clear(self):
+        self._turns.clear()
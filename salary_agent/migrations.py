@@ -0,0 +1,202 @@
+"""
+Versioned schema migrations tracked in a ``schema_version`` table.
+
+Each migration runs once, inside its own ``BEGIN IMMEDIATE`` transaction, so
+the CLI and the Streamlit app can both start against the same database file
+without racing each other. Migration 1 is written with ``IF NOT EXISTS`` so
+databases created before migrations existed are adopted as-is.
+"""
+
+import sqlite3
+from typing import List, NamedTuple, Optional, Sequence
+
+
+class Migration(NamedTuple):
+    version: int
+    description: str
+    statements: Sequence[str]
+
+
+def _versioned_table_triggers(table: str) -> List[str]:
+    """Statements that keep ``table_versions`` in step with every change to ``table``."""
+    statements = [f"INSERT OR IGNORE INTO table_versions (name) VALUES ('{table}')"]
+    for event in ("INSERT", "UPDATE", "DELETE"):
+        statements.append(f'''
+            CREATE TRIGGER IF NOT EXISTS {table}_version_{event.lower()}
+            AFTER {event} ON {table}
+            BEGIN
+                UPDATE table_versions SET version = version + 1 WHERE name = '{table}';
+            END
+        ''')
+    return statements
+
+
+def _balance_delta(row: str, sign: str) -> List[str]:
+    """Upserts that add (``sign='+'``) or remove (``'-'``) transfer ``row`` (NEW/OLD) from the aggregates."""
+    count = "1" if sign == "+" else "-1"
+    amount = f"{sign}{row}.amount"
+    # last_activity only moves forward; a delete keeps the previous high-water mark.
+    last_activity = f"{row}.timestamp" if sign == "+" else "NULL"
+    statements = []
+    for person, total, counter in (("from_person", "sent_total", "sent_count"),
+                                   ("to_person", "received_total", "received_count")):
+        statements.append(f'''
+            INSERT INTO person_balances (name, {total}, {counter}, last_activity)
+            VALUES ({row}.{person}, {amount}, {count}, {last_activity})
+            ON CONFLICT (name) DO UPDATE SET
+                {total} = {total} + excluded.{total},
+                {counter} = {counter} + excluded.{counter},
+                last_activity = COALESCE(MAX(last_activity, excluded.last_activity),
+                                         last_activity, excluded.last_activity);
+        ''')
+    statements.append(f'''
+        INSERT INTO daily_transfer_totals (day, transfer_count, total_amount)
+        SELECT date({row}.timestamp), {count}, {amount} WHERE {row}.timestamp IS NOT NULL
+        ON CONFLICT (day) DO UPDATE SET
+            transfer_count = transfer_count + excluded.transfer_count,
+            total_amount = total_amount + excluded.total_amount;
+    ''')
+    return statements
+
+
+def _aggregate_triggers() -> List[str]:
+    bodies = {
+        "insert": _balance_delta("NEW", "+"),
+        "delete": _balance_delta("OLD", "-"),
+        "update": _balance_delta("OLD", "-") + _balance_delta("NEW", "+"),
+    }
+    return [
+        f"CREATE TRIGGER IF NOT EXISTS transfers_aggregates_{event} AFTER {event.upper()} ON transfers "
+        f"BEGIN {''.join(body)} END"
+        for event, body in bodies.items()
+    ]
+
+
+MIGRATIONS: List[Migration] = [
+    Migration(1, "persons, transfers and table_versions", [
+        '''
+        CREATE TABLE IF NOT EXISTS persons (
+            name TEXT PRIMARY KEY,
+            address TEXT NOT NULL UNIQUE
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS transfers (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            from_person TEXT NOT NULL,
+            to_person TEXT NOT NULL,
+            amount REAL NOT NULL,
+            token TEXT NOT NULL,
+            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (from_person) REFERENCES persons (name),
+            FOREIGN KEY (to_person) REFERENCES persons (name)
+        )
+        ''',
+        # Per-table change counters maintained by triggers, so in-process caches
+        # can tell cheaply (and across processes) whether a table changed.
+        '''
+        CREATE TABLE IF NOT EXISTS table_versions (
+            name TEXT PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 0
+        )
+        ''',
+        *_versioned_table_triggers("persons"),
+    ]),
+    # (to_person, amount) also serves plain to_person lookups, so no separate
+    # to_person index; sender queries get the same covering treatment.
+    Migration(2, "covering indexes for transfers lookups", [
+        "CREATE INDEX IF NOT EXISTS idx_transfers_from_person_amount ON transfers (from_person, amount)",
+        "CREATE INDEX IF NOT EXISTS idx_transfers_to_person_amount ON transfers (to_person, amount)",
+        "CREATE INDEX IF NOT EXISTS idx_transfers_timestamp ON transfers (timestamp)",
+        "ANALYZE transfers",
+    ]),
+    # Kept current by triggers, so every write path (including model-written SQL)
+    # maintains them and common analytics become primary-key lookups.
+    Migration(3, "person_balances and daily_transfer_totals aggregates", [
+        '''
+        CREATE TABLE IF NOT EXISTS person_balances (
+            name TEXT PRIMARY KEY,
+            sent_total REAL NOT NULL DEFAULT 0,
+            sent_count INTEGER NOT NULL DEFAULT 0,
+            received_total REAL NOT NULL DEFAULT 0,
+            received_count INTEGER NOT NULL DEFAULT 0,
+            last_activity DATETIME
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS daily_transfer_totals (
+            day TEXT PRIMARY KEY,
+            transfer_count INTEGER NOT NULL DEFAULT 0,
+            total_amount REAL NOT NULL DEFAULT 0
+        )
+        ''',
+        '''
+        INSERT INTO person_balances (name, sent_total, sent_count, received_total, received_count, last_activity)
+        SELECT name, SUM(sent_total), SUM(sent_count), SUM(received_total), SUM(received_count), MAX(last_activity)
+        FROM (
+            SELECT from_person AS name, SUM(amount) AS sent_total, COUNT(*) AS sent_count,
+                   0 AS received_total, 0 AS received_count, MAX(timestamp) AS last_activity
+            FROM transfers GROUP BY from_person
+            UNION ALL
+            SELECT to_person, 0, 0, SUM(amount), COUNT(*), MAX(timestamp)
+            FROM transfers GROUP BY to_person
+        )
+        GROUP BY name
+        ''',
+        '''
+        INSERT INTO daily_transfer_totals (day, transfer_count, total_amount)
+        SELECT date(timestamp), COUNT(*), SUM(amount)
+        FROM transfers WHERE timestamp IS NOT NULL
+        GROUP BY date(timestamp)
+        ''',
+        *_aggregate_triggers(),
+    ]),
+    Migration(4, "table_versions tracking for transfers", _versioned_table_triggers("transfers")),
+]
+
+LATEST_VERSION = MIGRATIONS[-1].version
+
+
+def current_version(conn: sqlite3.Connection) -> int:
+    """The highest applied migration, or 0 for a database that has never been migrated."""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            description TEXT NOT NULL,
+            applied_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    row = conn.execute("SELECT MAX(version) FROM schema_version").fetchone()
+    return row[0] or 0
+
+
+def migrate(conn: sqlite3.Connection, target: Optional[int] = None) -> List[Migration]:
+    """
+    Applies every pending migration up to ``target`` (default: latest), in order.
+    Returns the migrations that were applied by this call.
+    """
+    target = LATEST_VERSION if target is None else target
+    if conn.in_transaction:
+        conn.commit()
+    applied = []
+    for migration in MIGRATIONS:
+        if migration.version > target:
+            break
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Re-check under the write lock: another process may have just applied it.
+            if migration.version <= current_version(conn):
+                conn.rollback()
+                continue
+            for statement in migration.statements:
+                conn.execute(statement)
+            conn.execute(
+                "INSERT INTO schema_version (version, description) VALUES (?, ?)",
+                (migration.version, migration.description),
+            )
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        applied.append(migration)
+    return applied
@@ -0,0 +1,139 @@
+"""
+The agent's system prompt, built from the live database schema.
+
+The schema used to be hand-copied into each entry point's prompt and had
+drifted from the migrations. Here it is introspected once from
+``sqlite_master`` (tables, the indexes worth filtering on, which tables
+triggers maintain, approximate row counts) and cached per database file.
+
+The prompt is the first thing in every request, so it is laid out for
+provider-side prefix caching: fixed instructions first, then the schema,
+which only changes with a migration, and row counts last, rounded so they
+stay byte-identical across restarts until the data grows noticeably.
+"""
+
+import os
+import re
+import sqlite3
+import threading
+from typing import Dict, List, NamedTuple
+
+from .db import ConnectionPool
+
+# Bookkeeping tables the model has no reason to query.
+INTERNAL_TABLES = frozenset({"schema_version", "table_versions"})
+
+INSTRUCTIONS = '''
+YOU are a world-class Novel Salary Agent, an expert in managing Solana wallets and executing SQL queries.
+
+**Your Response Structure:**
+1.  **Think Step-by-Step:** First, analyze the user's request. Enclose your reasoning in <think> and </think> tags. Inside, explain which tool you will use. If using the SQL tool, write the exact SQL query you will execute.
+2.  **Provide a Final, Clean Answer:** After the </think> tag, give the user the final answer.
+
+**Available Tools:**
+- Simple tools cover common tasks (adding persons, wallet addresses, single transfers); each comes with its own description.
+- For per-person totals (sent, received, counts, net, last activity), use `get_balance_summary`; it is a single lookup instead of a SUM over all transfers.
+- For several transfers at once (e.g. a payroll run), call `transfer_usdt_batch` once with all rows instead of calling `transfer_usdt` repeatedly.
+- **For any other database questions, you MUST use the `execute_sql_query` tool.** This is your primary tool for custom data retrieval and analysis.
+
+**Example Query:** If the user asks "How many transfers has guru made?", you should think:
+"<think>The user wants to count transfers from 'guru'. I will use the `execute_sql_query` tool. The query is: `SELECT COUNT(*) FROM transfers WHERE from_person = 'guru';`</think>"
+Then, after the tool executes, you will present the result to the user.
+
+Important : for transfer_usdt tool which returns json, make sure to show the json response in a formatted way in output along with your response.
+'''.strip()
+
+
+class TableInfo(NamedTuple):
+    name: str
+    sql: str
+    indexes: List[str]
+    maintained_from: List[str]  # tables whose triggers write this one
+    rows: int
+
+
+def _clean_sql(sql: str) -> str:
+    """Drops ``IF NOT EXISTS`` and the migrations' indentation from stored DDL."""
+    sql = re.sub(r"\s+IF NOT EXISTS", "", sql.strip(), flags=re.IGNORECASE)
+    lines = [line.strip() for line in sql.splitlines()]
+    return "\n".join(line if i == 0 or line.startswith(")") else f"    {line}"
+                     for i, line in enumerate(lines) if line)
+
+
+def _estimate_rows(conn: sqlite3.Connection, table: str) -> int:
+    # The largest rowid bounds the row count in one b-tree descent; COUNT(*) would scan every table at startup.
+    try:
+        return conn.execute(f'SELECT MAX(rowid) FROM "{table}"').fetchone()[0] or 0
+    except sqlite3.OperationalError:
+        return conn.execute(f'SELECT COUNT(*) FROM "{table}"').fetchone()[0]  # WITHOUT ROWID
+
+
+def introspect_schema(conn: sqlite3.Connection) -> List[TableInfo]:
+    """User tables in creation order, with their indexes, trigger sources and approximate row counts."""
+    objects = conn.execute(
+        "SELECT type, name, tbl_name, sql FROM sqlite_master "
+        "WHERE sql IS NOT NULL AND name NOT LIKE 'sqlite_%' ORDER BY rowid"
+    ).fetchall()
+    tables = [(name, sql) for kind, name, _, sql in objects
+              if kind == "table" and name not in INTERNAL_TABLES]
+    indexes: Dict[str, List[str]] = {}
+    maintained: Dict[str, List[str]] = {}
+    for kind, name, table, sql in objects:
+        if kind == "index":
+            indexes.setdefault(table, []).append(_clean_sql(sql))
+        elif kind == "trigger":
+            for target in re.findall(r"\b(?:INSERT\s+(?:OR\s+\w+\s+)?INTO|UPDATE)\s+(\w+)", sql, re.IGNORECASE):
+                sources = maintained.setdefault(target, [])
+                if target != table and table not in sources:
+                    sources.append(table)
+    return [
+        TableInfo(name, _clean_sql(sql), indexes.get(name, []), maintained.get(name, []),
+                  _estimate_rows(conn, name))
+        for name, sql in tables
+    ]
+
+
+def _approx(rows: int) -> str:
+    # Two significant figures keep the prompt (and the provider's cached prefix) stable as rows trickle in.
+    if rows < 100:
+        return str(rows)
+    return f"~{round(rows, 2 - len(str(rows))):,}"
+
+
+def render_system_prompt(tables: List[TableInfo]) -> str:
+    """Instructions, then schema, then row counts: most stable first, for prefix caching."""
+    ddl = []
+    for table in tables:
+        if table.maintained_from:
+            ddl.append(f"-- Maintained automatically from {', '.join(table.maintained_from)}; read-only.")
+        ddl.append(f"{table.sql};")
+        ddl.extend(f"{index};" for index in table.indexes)
+    sizes = ", ".join(f"{table.name} {_approx(table.rows)}" for table in tables)
+    return "\n\n".join([
+        INSTRUCTIONS,
+        "**Database Schema for SQL Queries:**\n"
+        "You have access to the following tables. Use this schema to construct your queries for the "
+        "`execute_sql_query` tool, and prefer filters and sorts the indexes cover.",
+        "```sql\n" + "\n".join(ddl) + "\n```",
+        f"**Approximate row counts:** {sizes}.",
+    ])
+
+
+def build_system_prompt(conn: sqlite3.Connection) -> str:
+    return render_system_prompt(introspect_schema(conn))
+
+
+# --- Process-wide cache ---
+_prompts: Dict[str, str] = {}
+_prompts_lock = threading.Lock()
+
+
+def get_system_prompt(pool: ConnectionPool) -> str:
+    """The system prompt for ``pool``'s database, introspected on first use. Run migrations first."""
+    key = os.path.abspath(pool.db_file)
+    with _prompts_lock:
+        prompt = _prompts.get(key)
+        if prompt is None:
+            with pool.connection() as conn:
+                prompt = _prompts[key] = build_system_prompt(conn)
+        return prompt
@@ -0,0 +1,94 @@
+"""
+Process-wide registry of models for the IO Intelligence (OpenAI-compatible) API.
+
+Building an ``OpenAIProvider`` per agent (or per Streamlit rerun) throws away
+its HTTP client, so every request pays for a fresh TCP + TLS handshake.
+``get_model`` hands out one model per (model, base URL, key) for the whole
+process, backed by a keep-alive ``httpx.AsyncClient`` with tuned pool limits
+and timeouts (HTTP/2 when ``h2`` is installed).
+
+An httpx client's pooled connections belong to the event loop that opened
+them, so ``LoopBoundModel`` keeps one client per running loop: a single
+persistent loop (the CLI, the server) gets a single client, and code that
+still calls ``asyncio.run`` per message stays correct.
+"""
+
+import asyncio
+import importlib.util
+import threading
+import weakref
+from typing import Dict, Tuple
+
+import httpx
+from pydantic_ai.models import Model
+from pydantic_ai.models.openai import OpenAIModel
+from pydantic_ai.models.wrapper import WrapperModel
+from pydantic_ai.providers.openai import OpenAIProvider
+
+# --- Configuration ---
+HTTP2 = importlib.util.find_spec("h2") is not None
+HTTP_LIMITS = httpx.Limits(max_connections=32, max_keepalive_connections=16, keepalive_expiry=120.0)
+# Long reads for slow completions, but fail fast when the API is unreachable.
+HTTP_TIMEOUT = httpx.Timeout(120.0, connect=10.0, pool=30.0)
+
+
+def create_http_client() -> httpx.AsyncClient:
+    """A keep-alive client tuned for long-running model requests."""
+    return httpx.AsyncClient(http2=HTTP2, limits=HTTP_LIMITS, timeout=HTTP_TIMEOUT)
+
+
+class LoopBoundModel(WrapperModel):
+    """An ``OpenAIModel`` whose HTTP client is created once per event loop and then reused."""
+
+    def __init__(self, model_name: str, base_url: str, api_key: str):
+        # WrapperModel.__init__ would pin a single wrapped model; ours is resolved per loop.
+        self._model_name = model_name
+        self._base_url = base_url
+        self._api_key = api_key
+        self._models: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, OpenAIModel]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self._lock = threading.Lock()
+        self.clients_created = 0
+
+    @property
+    def wrapped(self) -> Model:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            model = self._models.get(loop)
+            if model is None:
+                provider = OpenAIProvider(base_url=self._base_url, api_key=self._api_key,
+                                          http_client=create_http_client())
+                model = self._models[loop] = OpenAIModel(self._model_name, provider=provider)
+                self.clients_created += 1
+        return model
+
+    @property
+    def model_name(self) -> str:
+        return self._model_name
+
+    @property
+    def system(self) -> str:
+        return "openai"
+
+    @property
+    def base_url(self) -> str:
+        return self._base_url
+
+    def __repr__(self) -> str:
+        # The dataclass repr would resolve ``wrapped``, which needs a running loop.
+        return f"LoopBoundModel({self._model_name!r}, base_url={self._base_url!r})"
+
+
+_models: Dict[Tuple[str, str, str], LoopBoundModel] = {}
+_models_lock = threading.Lock()
+
+
+def get_model(model_name: str, base_url: str, api_key: str) -> LoopBoundModel:
+    """Returns the process-wide model for this endpoint, creating it on first use."""
+    key = (model_name, base_url, api_key)
+    with _models_lock:
+        model = _models.get(key)
+        if model is None:
+            model = _models[key] = LoopBoundModel(model_name, base_url, api_key)
+        return model
@@ -0,0 +1,70 @@
+"""
+Typed, parameterized statements for the ``persons`` and ``transfers`` tables.
+
+Every statement is a constant with ``?`` placeholders, so each pooled
+connection compiles it once and then reuses it from the sqlite3 statement
+cache. The write hot path never formats SQL or re-parses it.
+"""
+
+import sqlite3
+from typing import Iterable, List, NamedTuple, Optional, Tuple
+
+# --- Persons ---
+SELECT_PERSONS = "SELECT name, address FROM persons ORDER BY name"
+SELECT_PERSON_NAMES = "SELECT name FROM persons"
+SELECT_ADDRESS = "SELECT address FROM persons WHERE name = ?"
+SELECT_PERSON_CONFLICT = "SELECT 1 FROM persons WHERE name = ? OR address = ?"
+INSERT_PERSON = "INSERT INTO persons (name, address) VALUES (?, ?)"
+
+# --- Transfers ---
+INSERT_TRANSFER = "INSERT INTO transfers (from_person, to_person, amount, token) VALUES (?, ?, ?, ?)"
+
+
+class Person(NamedTuple):
+    name: str
+    address: str
+
+
+class NewTransfer(NamedTuple):
+    from_person: str
+    to_person: str
+    amount: float
+    token: str
+
+
+def list_persons(conn: sqlite3.Connection) -> List[Person]:
+    return [Person(*row) for row in conn.execute(SELECT_PERSONS)]
+
+
+def person_names(conn: sqlite3.Connection) -> set:
+    return {name for (name,) in conn.execute(SELECT_PERSON_NAMES)}
+
+
+def get_address(conn: sqlite3.Connection, name: str) -> Optional[str]:
+    row = conn.execute(SELECT_ADDRESS, (name,)).fetchone()
+    return row[0] if row else None
+
+
+def insert_person(conn: sqlite3.Connection, name: str, address: str) -> bool:
+    """Inserts a person unless the name or address is already taken. Returns False if it was."""
+    if conn.execute(SELECT_PERSON_CONFLICT, (name, address)).fetchone():
+        return False
+    conn.execute(INSERT_PERSON, (name, address))
+    return True
+
+
+def insert_transfer(conn: sqlite3.Connection, transfer: NewTransfer) -> int:
+    """Inserts one transfer and returns its id."""
+    return conn.execute(INSERT_TRANSFER, transfer).lastrowid
+
+
+def insert_transfers(conn: sqlite3.Connection, transfers: Iterable[NewTransfer]) -> Tuple[int, int]:
+    """
+    Inserts many transfers with one ``executemany``.
+    Returns the (first_id, last_id) range; AUTOINCREMENT ids are contiguous
+    within a single writer's transaction.
+    """
+    cursor = conn.executemany(INSERT_TRANSFER, transfers)
+    count = cursor.rowcount
+    last_id = conn.execute("SELECT last_insert_rowid()").fetchone()[0]
+    return last_id - count + 1, last_id
@@ -0,0 +1,185 @@
+"""
+Response cache for repeated natural-language questions.
+
+Answers are keyed on the normalized prompt and stamped with the
+``table_versions`` counters of the tables the run actually read (worked out
+from its tool calls). A hit is only served while those counters are
+unchanged, so an answer about ``persons`` survives new transfers but not a
+new person. Runs that wrote anything, or used a tool we cannot classify, are
+never cached.
+"""
+
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, FrozenSet, Iterable, NamedTuple, Optional
+
+from .db import table_versions
+from .executor import DBExecutor
+from .router import normalize
+
+# --- Configuration ---
+DEFAULT_MAX_ENTRIES = 256
+DEFAULT_TTL = 3600.0
+
+PERSONS = frozenset({"persons"})
+TRANSFERS = frozenset({"transfers"})
+ALL_TABLES = PERSONS | TRANSFERS
+
+# Tables each read-only tool depends on. The aggregate tables are derived
+# from transfers, so they are tracked through its counter.
+TOOL_TABLES: Dict[str, FrozenSet[str]] = {
+    "list_persons_with_addresses": PERSONS,
+    "show_wallet_address": PERSONS,
+    "get_balance_summary": ALL_TABLES,
+    "fetch_more_results": ALL_TABLES,
+}
+WRITE_TOOLS = frozenset({"add_person", "transfer_usdt", "transfer_usdt_batch"})
+
+_SQL_TABLES = {
+    "persons": PERSONS,
+    "transfers": TRANSFERS,
+    "person_balances": TRANSFERS,
+    "daily_transfer_totals": TRANSFERS,
+}
+_SQL_TABLE_PATTERN = re.compile(r"\b(" + "|".join(_SQL_TABLES) + r")\b", re.IGNORECASE)
+
+
+def sql_dependencies(query: str) -> Optional[FrozenSet[str]]:
+    """Tables a SELECT reads, or None if the statement is not a plain SELECT."""
+    if not query.strip().upper().startswith("SELECT"):
+        return None
+    tables = frozenset()
+    for name in _SQL_TABLE_PATTERN.findall(query):
+        tables |= _SQL_TABLES[name.lower()]
+    return tables
+
+
+def run_dependencies(messages: Iterable) -> Optional[FrozenSet[str]]:
+    """
+    Tables read by the tool calls in an agent run's messages, or None if the
+    run wrote to the database or called a tool we cannot classify.
+    """
+    tables = frozenset()
+    for message in messages:
+        for part in getattr(message, "parts", ()):
+            if getattr(part, "part_kind", None) != "tool-call":
+                continue
+            if part.tool_name in WRITE_TOOLS:
+                return None
+            if part.tool_name == "execute_sql_query":
+                deps = sql_dependencies(str(part.args_as_dict().get("query", "")))
+            else:
+                deps = TOOL_TABLES.get(part.tool_name)
+            if deps is None:
+                return None
+            tables |= deps
+    return tables
+
+
+def cache_key(prompt: str, context: str = "") -> str:
+    """
+    ``context`` distinguishes the same prompt asked in different conversations (a history
+    fingerprint); leave it empty for standalone questions so every session shares the entry.
+    """
+    key = normalize(prompt).lower()
+    return f"{context}\x00{key}" if context else key
+
+
+class _Entry(NamedTuple):
+    output: str
+    versions: Dict[str, int]
+    expires_at: float
+
+
+@dataclass
+class ResponseCacheStats:
+    hits: int = 0
+    misses: int = 0
+    stores: int = 0
+    invalidations: int = 0
+    uncacheable: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class ResponseCache:
+    """LRU + TTL cache of agent answers, invalidated by data-version changes."""
+
+    def __init__(self, executor: DBExecutor, max_entries: int = DEFAULT_MAX_ENTRIES,
+                 ttl: float = DEFAULT_TTL):
+        self._executor = executor
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = ResponseCacheStats()
+
+    async def get(self, prompt: str, context: str = "") -> Optional[str]:
+        """The cached answer for ``prompt`` if its data has not changed since, else None."""
+        key = cache_key(prompt, context)
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is not None and entry.expires_at > time.monotonic():
+            current = await self._executor.read(table_versions) if entry.versions else {}
+            if all(current.get(table) == version for table, version in entry.versions.items()):
+                with self._lock:
+                    if key in self._entries:
+                        self._entries.move_to_end(key)
+                    self._stats.hits += 1
+                return entry.output
+        with self._lock:
+            if entry is not None:
+                self._entries.pop(key, None)
+                self._stats.invalidations += 1
+            self._stats.misses += 1
+        return None
+
+    def put(self, prompt: str, output: str, versions: Dict[str, int], context: str = ""):
+        key = cache_key(prompt, context)
+        with self._lock:
+            self._entries[key] = _Entry(output, versions, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._stats.stores += 1
+
+    async def run(self, prompt: str, run: Callable[[str], Awaitable], context: str = "") -> "CachedRun":
+        """
+        Answers from the cache, or awaits ``run(prompt)`` (e.g. ``agent.run``) and caches
+        the output if the run was read-only. Pass ``ConversationMemory.cache_context(prompt)``
+        as ``context``: the history fingerprint for follow-ups, '' for standalone questions.
+        """
+        cached = await self.get(prompt, context)
+        if cached is not None:
+            return CachedRun(cached, True, None)
+        # Stamp with the versions from *before* the run: a concurrent write during
+        # the run then makes the entry stale instead of silently hiding the change.
+        before = await self._executor.read(table_versions)
+        result = await run(prompt)
+        deps = run_dependencies(result.new_messages())
+        if deps is None:
+            with self._lock:
+                self._stats.uncacheable += 1
+        else:
+            self.put(prompt, result.output, {table: before.get(table, 0) for table in deps}, context)
+        return CachedRun(result.output, False, result)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> ResponseCacheStats:
+        with self._lock:
+            return ResponseCacheStats(**vars(self._stats))
+
+
+class CachedRun(NamedTuple):
+    output: str
+    cached: bool
+    result: Optional[object]
@@ -0,0 +1,151 @@
+"""
+Incremental parser separating ``<think>`` reasoning from the final answer.
+
+Both UIs used to run a ``re.DOTALL`` regex over the complete output after the
+fact; with streaming that would mean re-scanning the whole text for every
+token. ``ResponseParser`` is a small state machine fed chunk by chunk: text
+inside ``<think>…</think>`` goes to the thinking side, everything else to the
+answer, tags split across chunks are held back until they resolve, and a
+JSON answer is recognized while it is still arriving. Each character is
+looked at once.
+"""
+
+from typing import Callable, List, Optional
+
+THINK_OPEN = "<think>"
+THINK_CLOSE = "</think>"
+
+
+def _partial_tag(text: str, tag: str) -> int:
+    """Length of the longest suffix of ``text`` that is a proper prefix of ``tag``."""
+    for size in range(min(len(tag) - 1, len(text)), 0, -1):
+        if text.endswith(tag[:size]):
+            return size
+    return 0
+
+
+class _JsonTracker:
+    """Follows bracket depth (outside strings) to tell whether the answer is one JSON value."""
+
+    def __init__(self):
+        self.candidate: Optional[bool] = None  # None until the first non-blank character
+        self.complete = False
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+
+    def feed(self, text: str):
+        for char in text:
+            if self.candidate is False:
+                return
+            if self.candidate is None:
+                if char.isspace():
+                    continue
+                self.candidate = char in "{["
+                if not self.candidate:
+                    return
+            if self.complete:
+                if not char.isspace():
+                    # Something after the closing bracket: prose, not a JSON block.
+                    self.candidate = self.complete = False
+                continue
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char in "{[":
+                self._depth += 1
+            elif char in "}]":
+                self._depth -= 1
+                self.complete = self._depth == 0
+
+
+class ResponseParser:
+    """
+    Splits streamed agent output into thinking and answer text.
+
+    ``on_thinking`` and ``on_answer`` receive each piece as soon as it is known
+    to belong to that side; ``thinking`` and ``answer`` hold the text so far.
+    """
+
+    def __init__(self, on_thinking: Optional[Callable[[str], None]] = None,
+                 on_answer: Optional[Callable[[str], None]] = None):
+        self.on_thinking = on_thinking
+        self.on_answer = on_answer
+        self.in_think = False
+        self._thinking: List[str] = []
+        self._answer: List[str] = []
+        self._pending = ""
+        self._json = _JsonTracker()
+
+    def _emit(self, text: str):
+        if not text:
+            return
+        if self.in_think:
+            self._thinking.append(text)
+            if self.on_thinking:
+                self.on_thinking(text)
+        else:
+            self._answer.append(text)
+            self._json.feed(text)
+            if self.on_answer:
+                self.on_answer(text)
+
+    def feed(self, chunk: str) -> "ResponseParser":
+        text = self._pending + chunk
+        self._pending = ""
+        while text:
+            tag = THINK_CLOSE if self.in_think else THINK_OPEN
+            index = text.find(tag)
+            if index >= 0:
+                self._emit(text[:index])
+                if self.in_think and self._thinking:
+                    # Keep separate think blocks (one per model request) apart.
+                    self._emit("\n")
+                self.in_think = not self.in_think
+                text = text[index + len(tag):]
+                continue
+            # Hold back a trailing "<thi" until the next chunk says whether it is a tag.
+            held = _partial_tag(text, tag)
+            self._emit(text[:len(text) - held])
+            self._pending = text[len(text) - held:]
+            break
+        return self
+
+    def close(self) -> "ResponseParser":
+        """Flushes held-back text at the end of the stream."""
+        pending, self._pending = self._pending, ""
+        self._emit(pending)
+        return self
+
+    @property
+    def thinking(self) -> str:
+        if len(self._thinking) > 1:
+            self._thinking[:] = ["".join(self._thinking)]
+        return self._thinking[0].strip() if self._thinking else ""
+
+    @property
+    def answer(self) -> str:
+        if len(self._answer) > 1:
+            self._answer[:] = ["".join(self._answer)]
+        return self._answer[0].strip() if self._answer else ""
+
+    @property
+    def looks_like_json(self) -> bool:
+        """The answer so far starts a JSON object or array (use for highlighting while streaming)."""
+        return bool(self._json.candidate)
+
+    @property
+    def is_json(self) -> bool:
+        """The answer is exactly one complete JSON object or array."""
+        return bool(self._json.candidate and self._json.complete)
+
+
+def parse_response(raw_output: str) -> ResponseParser:
+    """Parses a complete agent output in one go."""
+    return ResponseParser().feed(raw_output).close()
@@ -0,0 +1,167 @@
+"""
+Streaming, capped SELECT results for ``execute_sql_query``.
+
+Rows are pulled with ``fetchmany`` on a reader thread and handed page by page
+to a ``ResultSink`` (the terminal or the Streamlit dataframe) as they arrive.
+Only the first ``row_cap`` rows are kept for the tool's reply; if there are
+more, a continuation token lets the model (or the user) fetch the next slice
+instead of materializing the whole table.
+"""
+
+import secrets
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Iterator, List, Optional, Sequence, Tuple, Union
+
+from .executor import DBExecutor
+from .guardrails import DEFAULT_POLICY, GuardrailPolicy, budget, check
+from .tracing import MAX_SQL_CHARS, span
+
+# --- Configuration ---
+DEFAULT_PAGE_SIZE = 100
+DEFAULT_ROW_CAP = 200
+CONTINUATION_TTL = 600.0
+MAX_CONTINUATIONS = 256
+
+# Bind values for a query: positional (``?``) or named (``:name``).
+Params = Union[Sequence, dict]
+
+
+@dataclass
+class QueryResult:
+    columns: List[str]
+    rows: List[tuple] = field(default_factory=list)
+    offset: int = 0
+    truncated: bool = False
+    continuation: Optional[str] = None
+    # SQLite does not report rows scanned per statement; VM instructions run are the closest measure.
+    vm_steps: int = 0
+    row_limit: Optional[int] = None  # the LIMIT the guardrails appended, if any
+
+
+class ResultSink:
+    """Receives a result incrementally. The base class ignores everything."""
+
+    def begin(self, columns: Sequence[str], offset: int):
+        pass
+
+    def add_rows(self, rows: List[tuple]):
+        pass
+
+    def end(self, result: QueryResult):
+        pass
+
+
+# The sink for the agent run in progress. Tool calls inherit it from the task
+# that started the run, so each UI only sees its own results.
+result_sink: ContextVar[Optional[ResultSink]] = ContextVar("result_sink", default=None)
+
+
+class ContinuationStore:
+    """Opaque tokens mapping to (query, params, next offset), with LRU and TTL eviction."""
+
+    def __init__(self, max_entries: int = MAX_CONTINUATIONS, ttl: float = CONTINUATION_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[str, Params, int, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def issue(self, query: str, offset: int, params: Params = ()) -> str:
+        token = secrets.token_urlsafe(6)
+        with self._lock:
+            self._entries[token] = (query, params, offset, time.monotonic() + self.ttl)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return token
+
+    def resolve(self, token: str) -> Optional[Tuple[str, Params, int]]:
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None:
+                return None
+            if entry[3] < time.monotonic():
+                del self._entries[token]
+                return None
+            self._entries.move_to_end(token)
+        return entry[0], entry[1], entry[2]
+
+
+continuations = ContinuationStore()
+
+
+def fetch_pages(conn: sqlite3.Connection, query: str, page_size: int, row_cap: int,
+                offset: int = 0, params: Params = (),
+                policy: GuardrailPolicy = DEFAULT_POLICY) -> Iterator[Tuple[str, object]]:
+    """
+    Yields ``("checked", Checked)``, ``("columns", names)``, then ``("rows", page)`` per page,
+    then ``("vm_steps", n)`` and ``("end", truncated)``. The query is checked by the guardrails
+    and runs under their budget; the first ``offset`` rows are skipped on the cursor.
+    """
+    checked = check(conn, query, params, policy)
+    yield "checked", checked
+    with budget(conn, policy) as spent:
+        cursor = conn.execute(checked.sql, params)
+        with spent.paused():
+            yield "columns", [description[0] for description in cursor.description or ()]
+        skip = offset
+        while skip > 0:
+            skipped = len(cursor.fetchmany(min(skip, 1000)))
+            if not skipped:
+                break
+            skip -= skipped
+        remaining = row_cap
+        truncated = False
+        while remaining > 0:
+            rows = cursor.fetchmany(min(page_size, remaining))
+            if not rows:
+                break
+            remaining -= len(rows)
+            # Time the consumer spends drawing a page is not the query's.
+            with spent.paused():
+                yield "rows", rows
+        else:
+            truncated = cursor.fetchone() is not None
+    yield "vm_steps", spent.steps
+    yield "end", truncated
+
+
+async def run_query(executor: DBExecutor, query: str, offset: int = 0,
+                    page_size: int = DEFAULT_PAGE_SIZE, row_cap: int = DEFAULT_ROW_CAP,
+                    sink: Optional[ResultSink] = None, params: Params = ()) -> QueryResult:
+    """Streams a SELECT into ``sink`` (default: the current ``result_sink``) and returns the capped result."""
+    sink = sink or result_sink.get() or ResultSink()
+    result = checked = None
+    with span("sql", sql=query[:MAX_SQL_CHARS], offset=offset) as s:
+        async for kind, value in executor.read_stream(fetch_pages, query, page_size, row_cap, offset, params):
+            if kind == "checked":
+                checked = value
+                s.set(plan="; ".join(value.analysis.plan), full_scans=len(value.analysis.full_scans),
+                      estimated_rows=value.analysis.estimated_rows, row_limit=value.row_limit)
+            elif kind == "columns":
+                result = QueryResult(columns=value, offset=offset, row_limit=checked.row_limit)
+                sink.begin(value, offset)
+            elif kind == "rows":
+                result.rows.extend(value)
+                sink.add_rows(value)
+            elif kind == "vm_steps":
+                result.vm_steps = value
+            else:
+                result.truncated = value
+        s.set(rows=len(result.rows), truncated=result.truncated, vm_steps=result.vm_steps)
+    if result.truncated:
+        result.continuation = continuations.issue(query, offset + len(result.rows), params)
+    sink.end(result)
+    return result
+
+
+async def continue_query(executor: DBExecutor, token: str, **kwargs) -> Optional[QueryResult]:
+    """The next slice for a continuation token, or None if it is unknown or expired."""
+    resolved = continuations.resolve(token)
+    if resolved is None:
+        return None
+    query, params, offset = resolved
+    return await run_query(executor, query, offset=offset, params=params, **kwargs)
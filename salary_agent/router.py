@@ -0,0 +1,138 @@
+"""
+Deterministic fast path for simple commands, in front of the LLM agent.
+
+"list persons", "what is the wallet address for guru?" or "transfer 150 usdt
+from shivam to madhur" need no reasoning, yet each costs at least two model
+round-trips. ``FastPathRouter`` matches such prompts with strict patterns and
+calls the existing tool directly; anything it is not sure about returns
+``None`` and goes to the agent as before.
+"""
+
+import re
+import threading
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+NAME = r"(?P<{}>[a-z][a-z0-9_]*)"
+AMOUNT = r"(?P<amount>\d+(?:\.\d+)?)"
+
+
+class Intent(NamedTuple):
+    name: str
+    tool: str
+    pattern: "re.Pattern[str]"
+
+
+def _intent(name: str, tool: str, pattern: str) -> Intent:
+    return Intent(name, tool, re.compile(pattern.format(
+        person=NAME.format("person"),
+        sender=NAME.format("from_person"),
+        receiver=NAME.format("to_person"),
+        amount=AMOUNT,
+    )))
+
+
+# Whole-prompt patterns only: a prompt that merely contains a command
+# ("list persons who received more than 50") must still reach the agent.
+DEFAULT_INTENTS: List[Intent] = [
+    _intent("list_persons", "list_persons_with_addresses",
+            r"(?:list|show)(?: me)?(?: all)?(?: the)? (?:persons|people|users)(?: with(?: their)? (?:wallet )?addresses)?"),
+    _intent("wallet_address", "show_wallet_address",
+            r"(?:what is|what's|show|show me|get) (?:the )?(?:wallet )?address (?:for|of) {person}"),
+    _intent("wallet_address", "show_wallet_address",
+            r"(?:show|get) {person}(?:'s)? (?:wallet )?address"),
+    _intent("add_person", "add_person",
+            r"add {person} with (?:wallet )?address (?P<address>[A-Za-z0-9]+)"),
+    _intent("transfer", "transfer_usdt",
+            r"(?:transfer|send|pay) {amount} (?:usdt )?from {sender} to {receiver}"),
+    _intent("balance", "get_balance_summary",
+            r"(?:show |get |what is |what's )?(?:the )?(?:balance|balance summary|summary) (?:for|of) {person}"),
+]
+
+_stats_lock = threading.Lock()
+
+_POLITE = re.compile(r"^(?:please\s+|can you\s+|could you\s+)+|(?:\s+please)?[\s?.!]*$", re.IGNORECASE)
+
+
+def normalize(prompt: str) -> str:
+    """Collapses whitespace and drops politeness and trailing punctuation."""
+    text = " ".join(prompt.split())
+    return _POLITE.sub("", text)
+
+
+@dataclass
+class RouteResult:
+    intent: str
+    tool: str
+    args: Dict[str, object]
+    output: str
+
+
+@dataclass
+class RouterStats:
+    routed: int = 0
+    fallbacks: int = 0
+    errors: int = 0
+    by_intent: Counter = field(default_factory=Counter)
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.routed + self.fallbacks
+        return self.routed / total if total else 0.0
+
+
+class FastPathRouter:
+    """Dispatches recognized commands straight to tool coroutines, bypassing the model."""
+
+    def __init__(self, tools: Dict[str, Callable[..., Awaitable[str]]],
+                 intents: Optional[List[Intent]] = None, stats: Optional[RouterStats] = None):
+        self.tools = tools
+        self.intents = [i for i in (intents or DEFAULT_INTENTS) if i.tool in tools]
+        # Pass a shared RouterStats to keep counting across router instances
+        # (Streamlit rebuilds the router on every rerun).
+        self._stats = stats if stats is not None else RouterStats()
+
+    def match(self, prompt: str) -> Optional[Tuple[Intent, Dict[str, object]]]:
+        text = normalize(prompt)
+        # Addresses are case-sensitive; everything else matches lowercased.
+        lowered = text.lower()
+        for intent in self.intents:
+            m = intent.pattern.fullmatch(lowered)
+            if m is None:
+                continue
+            args: Dict[str, object] = dict(m.groupdict())
+            if "address" in args:
+                args["address"] = text[m.start("address"):m.end("address")]
+            if "amount" in args:
+                args["amount"] = float(args["amount"])
+                if args["amount"] <= 0:
+                    return None
+            return intent, args
+        return None
+
+    async def route(self, prompt: str) -> Optional[RouteResult]:
+        """Runs the matching tool, or returns None so the caller falls back to the agent."""
+        matched = self.match(prompt)
+        if matched is None:
+            with _stats_lock:
+                self._stats.fallbacks += 1
+            return None
+        intent, args = matched
+        try:
+            output = await self.tools[intent.tool](**args)
+        except Exception:
+            # Let the agent handle anything the fast path trips over.
+            with _stats_lock:
+                self._stats.errors += 1
+                self._stats.fallbacks += 1
+            return None
+        with _stats_lock:
+            self._stats.routed += 1
+            self._stats.by_intent[intent.name] += 1
+        return RouteResult(intent.name, intent.tool, args, output)
+
+    def stats(self) -> RouterStats:
+        with _stats_lock:
+            return RouterStats(self._stats.routed, self._stats.fallbacks, self._stats.errors,
+                               Counter(self._stats.by_intent))
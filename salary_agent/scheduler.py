@@ -0,0 +1,91 @@
+"""
+Bounded concurrency for model calls shared by many sessions.
+
+The model endpoint, not SQLite, is the scarce resource when many teams use
+the agent at once. ``ModelScheduler`` lets at most ``max_concurrent`` runs
+talk to the model, queues up to ``max_waiting`` more in arrival order, and
+rejects the rest immediately with ``Overloaded`` so callers can back off
+instead of piling up unbounded work.
+"""
+
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, TypeVar
+
+T = TypeVar("T")
+
+# --- Configuration ---
+DEFAULT_MAX_CONCURRENT = 8
+DEFAULT_MAX_WAITING = 64
+
+
+class Overloaded(RuntimeError):
+    """Raised when the scheduler's wait queue is full."""
+
+    def __init__(self, retry_after: float):
+        super().__init__(f"Model scheduler is overloaded; retry in {retry_after:.0f}s.")
+        self.retry_after = retry_after
+
+
+@dataclass
+class SchedulerStats:
+    running: int = 0
+    waiting: int = 0
+    completed: int = 0
+    failed: int = 0
+    rejected: int = 0
+    wait_seconds: float = 0.0
+    run_seconds: float = 0.0
+
+    @property
+    def mean_run_seconds(self) -> float:
+        done = self.completed + self.failed
+        return self.run_seconds / done if done else 0.0
+
+
+class ModelScheduler:
+    """FIFO admission to at most ``max_concurrent`` simultaneous model runs."""
+
+    def __init__(self, max_concurrent: int = DEFAULT_MAX_CONCURRENT,
+                 max_waiting: int = DEFAULT_MAX_WAITING):
+        self.max_concurrent = max_concurrent
+        self.max_waiting = max_waiting
+        # asyncio.Semaphore wakes waiters in FIFO order.
+        self._slots = asyncio.Semaphore(max_concurrent)
+        self._stats = SchedulerStats()
+
+    def _retry_after(self) -> float:
+        # Roughly how long a full queue takes to drain at the current run time.
+        return max(1.0, self._stats.mean_run_seconds * self.max_waiting / self.max_concurrent)
+
+    async def run(self, fn: Callable[..., Awaitable[T]], *args, **kwargs) -> T:
+        """Awaits ``fn(*args, **kwargs)`` once a slot is free; raises ``Overloaded`` if too many are waiting."""
+        stats = self._stats
+        if self._slots.locked() and stats.waiting >= self.max_waiting:
+            stats.rejected += 1
+            raise Overloaded(self._retry_after())
+        queued_at = time.monotonic()
+        stats.waiting += 1
+        try:
+            await self._slots.acquire()
+        finally:
+            stats.waiting -= 1
+        started_at = time.monotonic()
+        stats.wait_seconds += started_at - queued_at
+        stats.running += 1
+        try:
+            result = await fn(*args, **kwargs)
+        except BaseException:
+            stats.failed += 1
+            raise
+        else:
+            stats.completed += 1
+            return result
+        finally:
+            stats.running -= 1
+            stats.run_seconds += time.monotonic() - started_at
+            self._slots.release()
+
+    def stats(self) -> SchedulerStats:
+        return SchedulerStats(**vars(self._stats))
@@ -0,0 +1,144 @@
+"""
+Per-session message queues for the multi-user agent server.
+
+Each session gets a bounded queue and one worker task, so a session's
+messages are answered one at a time and in order while different sessions
+proceed concurrently. A full queue rejects new messages with ``SessionBusy``
+(backpressure on a single chatty client) and the number of live sessions is
+capped; idle sessions are reaped after ``idle_ttl`` seconds.
+"""
+
+import asyncio
+import secrets
+import time
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+# --- Configuration ---
+DEFAULT_MAX_SESSIONS = 1000
+DEFAULT_MAX_PENDING = 4
+DEFAULT_IDLE_TTL = 1800.0
+
+
+class SessionBusy(RuntimeError):
+    """Raised when a session already has ``max_pending`` messages waiting."""
+
+
+class TooManySessions(RuntimeError):
+    """Raised when ``max_sessions`` sessions are open."""
+
+
+@dataclass
+class Session:
+    id: str
+    created_at: float = field(default_factory=time.monotonic)
+    last_active: float = field(default_factory=time.monotonic)
+    turns: int = 0
+    queue: "asyncio.Queue[Tuple[str, asyncio.Future]]" = field(default=None, repr=False)
+    worker: Optional[asyncio.Task] = field(default=None, repr=False)
+    # Per-session handler state (e.g. conversation memory); freed with the session.
+    state: Dict[str, object] = field(default_factory=dict, repr=False)
+
+    @property
+    def pending(self) -> int:
+        return self.queue.qsize()
+
+
+@dataclass
+class SessionStats:
+    open: int = 0
+    created: int = 0
+    reaped: int = 0
+    busy_rejections: int = 0
+    capacity_rejections: int = 0
+
+
+Handler = Callable[[Session, str], Awaitable[object]]
+
+
+class SessionManager:
+    """Creates sessions and answers their messages in order via ``handler(session, prompt)``."""
+
+    def __init__(self, handler: Handler, max_sessions: int = DEFAULT_MAX_SESSIONS,
+                 max_pending: int = DEFAULT_MAX_PENDING, idle_ttl: float = DEFAULT_IDLE_TTL):
+        self.handler = handler
+        self.max_sessions = max_sessions
+        self.max_pending = max_pending
+        self.idle_ttl = idle_ttl
+        self._sessions: Dict[str, Session] = {}
+        self._stats = SessionStats()
+
+    def create(self) -> Session:
+        if len(self._sessions) >= self.max_sessions:
+            self.reap_idle()
+            if len(self._sessions) >= self.max_sessions:
+                self._stats.capacity_rejections += 1
+                raise TooManySessions(f"{self.max_sessions} sessions are open.")
+        session = Session(id=secrets.token_urlsafe(12))
+        session.queue = asyncio.Queue(maxsize=self.max_pending)
+        session.worker = asyncio.create_task(self._work(session), name=f"session-{session.id}")
+        self._sessions[session.id] = session
+        self._stats.created += 1
+        return session
+
+    def get(self, session_id: str) -> Optional[Session]:
+        return self._sessions.get(session_id)
+
+    async def _work(self, session: Session):
+        while True:
+            prompt, future = await session.queue.get()
+            if future.done():
+                continue  # the caller went away while it was queued
+            try:
+                result = await self.handler(session, prompt)
+            except asyncio.CancelledError:
+                future.cancel()
+                raise
+            except Exception as e:
+                if not future.done():
+                    future.set_exception(e)
+            else:
+                if not future.done():
+                    future.set_result(result)
+            finally:
+                session.turns += 1
+                session.last_active = time.monotonic()
+
+    async def submit(self, session: Session, prompt: str):
+        """Queues ``prompt`` on the session and waits for its answer; raises ``SessionBusy`` if the queue is full."""
+        future = asyncio.get_running_loop().create_future()
+        try:
+            session.queue.put_nowait((prompt, future))
+        except asyncio.QueueFull:
+            self._stats.busy_rejections += 1
+            raise SessionBusy(f"Session {session.id} already has {self.max_pending} messages waiting.")
+        session.last_active = time.monotonic()
+        return await future
+
+    async def close(self, session_id: str) -> bool:
+        session = self._sessions.pop(session_id, None)
+        if session is None:
+            return False
+        session.worker.cancel()
+        await asyncio.gather(session.worker, return_exceptions=True)
+        return True
+
+    def reap_idle(self) -> int:
+        """Closes sessions with nothing queued that have been idle for ``idle_ttl``. Returns how many."""
+        cutoff = time.monotonic() - self.idle_ttl
+        idle = [s for s in self._sessions.values()
+                if s.last_active < cutoff and s.queue.empty()]
+        for session in idle:
+            del self._sessions[session.id]
+            session.worker.cancel()
+        self._stats.reaped += len(idle)
+        return len(idle)
+
+    async def close_all(self):
+        for session_id in list(self._sessions):
+            await self.close(session_id)
+
+    def stats(self) -> SessionStats:
+        stats = SessionStats(**vars(self._stats))
+        stats.open = len(self._sessions)
+        return stats
@@ -0,0 +1,256 @@
+"""
+Reusable SQL plans learned from the agent's own ``execute_sql_query`` calls.
+
+"total received by guru" and "total received by shivam" need the same SQL
+with a different name in it. After a run that answered with a successful
+SELECT, the question is reduced to a template ("total received by {person}")
+and the literals it shares with the SQL become bind parameters. A later
+question of the same shape runs the stored statement with its own values and
+never reaches the model.
+
+A plan is only kept when every value in the question maps to exactly one
+literal in a filter or ``LIMIT`` position of the SQL, so a query that ignored
+part of the question (or matched it with ``LIKE``) is never reused for a
+question it does not answer, and ``GROUP BY 1`` never becomes a bound constant.
+"""
+
+import re
+import sqlite3
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Collection, Dict, Iterable, List, NamedTuple, Optional
+
+from .directory import PersonsDirectory
+from .encoding import encode_result
+from .executor import DBExecutor
+from .results import QueryResult, run_query
+from .router import normalize
+
+# --- Configuration ---
+DEFAULT_MAX_PLANS = 256
+
+_QUESTION_TOKEN = re.compile(
+    r"(?P<date>\d{4}-\d{2}-\d{2})|(?P<number>\d+(?:\.\d+)?)|(?P<word>[a-z][a-z0-9_]*)"
+)
+# String literals, quoted identifiers, bare words, numbers, comments and parentheses;
+# only string literals and numbers are ever replaced.
+_SQL_TOKEN = re.compile(
+    r"'(?:[^']|'')*'|\"(?:[^\"]|\"\")*\"|[A-Za-z_][A-Za-z0-9_]*|\d+(?:\.\d+)?|--[^\n]*|/\*.*?\*/|[()]",
+    re.DOTALL,
+)
+# Keywords that start a clause, and the clauses whose literals are values a question can vary.
+_CLAUSES = {"select", "from", "join", "on", "where", "group", "having", "order", "limit", "offset",
+            "window", "over", "union", "except", "intersect", "values", "set", "returning"}
+_VALUE_CLAUSES = {"on", "where", "having", "limit", "offset"}
+
+
+class Template(NamedTuple):
+    key: str
+    values: List[object]
+
+
+def _number(text: str):
+    return float(text) if "." in text else int(text)
+
+
+def templatize(prompt: str, names: Collection[str]) -> Template:
+    """
+    Replaces person names, dates and numbers in ``prompt`` with ``{person}``,
+    ``{date}`` and ``{number}``, returning the template and the values in order.
+    """
+    values: List[object] = []
+
+    def replace(m: "re.Match[str]") -> str:
+        if m.group("date"):
+            values.append(m.group())
+            return "{date}"
+        if m.group("number"):
+            values.append(_number(m.group()))
+            return "{number}"
+        if m.group() in names:
+            values.append(m.group())
+            return "{person}"
+        return m.group()
+
+    key = _QUESTION_TOKEN.sub(replace, normalize(prompt).lower())
+    return Template(key, values)
+
+
+def parameterize(sql: str, values: List[object]) -> Optional[str]:
+    """
+    ``sql`` with the literal equal to each question value replaced by ``:p<index>``,
+    or None unless every value matches exactly one literal in a filter or LIMIT.
+    Literals elsewhere (select list, ``GROUP BY`` / ``ORDER BY`` ordinals) stay as written.
+    """
+    if not values or len({repr(v) for v in values}) != len(values):
+        return None
+    matches = [0] * len(values)
+    # The clause each open parenthesis level is in; a subquery starts its own.
+    clauses = ["select"]
+
+    def replace(m: "re.Match[str]") -> str:
+        token = m.group()
+        if token == "(":
+            clauses.append(clauses[-1])
+            return token
+        if token == ")":
+            if len(clauses) > 1:
+                clauses.pop()
+            return token
+        if token.lower() in _CLAUSES:
+            clauses[-1] = token.lower()
+            return token
+        if clauses[-1] not in _VALUE_CLAUSES:
+            return token
+        for i, value in enumerate(values):
+            if isinstance(value, str) and token.startswith("'"):
+                matched = token[1:-1].replace("''", "'").lower() == value
+            elif not isinstance(value, str) and token[0].isdigit():
+                matched = float(token) == value
+            else:
+                continue
+            if matched:
+                matches[i] += 1
+                return f":p{i}"
+        return token
+
+    parameterized = _SQL_TOKEN.sub(replace, sql)
+    return parameterized if all(count == 1 for count in matches) else None
+
+
+def binds(values: List[object]) -> Dict[str, object]:
+    return {f"p{i}": value for i, value in enumerate(values)}
+
+
+def last_successful_select(messages: Iterable) -> Optional[str]:
+    """
+    The last SELECT the run executed without a database error, or None if the run
+    used any other tool (its answer may rest on more than that one query).
+    """
+    queries: Dict[str, str] = {}
+    last = None
+    for message in messages:
+        for part in getattr(message, "parts", ()):
+            kind = getattr(part, "part_kind", None)
+            if kind == "tool-call":
+                if part.tool_name != "execute_sql_query":
+                    return None
+                queries[part.tool_call_id] = str(part.args_as_dict().get("query", ""))
+            elif kind == "tool-return" and part.tool_call_id in queries:
+                query = queries[part.tool_call_id]
+                if (query.strip().upper().startswith("SELECT")
+                        and not str(part.content).startswith("Database Error")):
+                    last = query
+    return last
+
+
+def _validate(conn: sqlite3.Connection, sql: str, params: Dict[str, object]):
+    # Compiles without running; also rejects anything that is not a single statement.
+    conn.execute("EXPLAIN " + sql, params).fetchall()
+
+
+class SqlPlan(NamedTuple):
+    template: str
+    sql: str
+
+
+class PlannedAnswer(NamedTuple):
+    plan: SqlPlan
+    params: Dict[str, object]
+    result: QueryResult
+
+    @property
+    def output(self) -> str:
+        """The rows as the agent's ``execute_sql_query`` tool would report them."""
+        return encode_result(self.result)
+
+    @property
+    def summary(self) -> str:
+        return (f"Answered with the saved SQL for “{self.plan.template}” "
+                f"({len(self.result.rows)}{'+' if self.result.truncated else ''} rows).")
+
+
+@dataclass
+class SqlPlanStats:
+    hits: int = 0
+    misses: int = 0
+    learned: int = 0
+    rejected: int = 0
+    failures: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class SqlPlanCache:
+    """Question template -> parameterized SELECT, learned from successful agent runs."""
+
+    def __init__(self, executor: DBExecutor, directory: PersonsDirectory,
+                 max_plans: int = DEFAULT_MAX_PLANS):
+        self._executor = executor
+        self._directory = directory
+        self.max_plans = max_plans
+        self._plans: "OrderedDict[str, SqlPlan]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = SqlPlanStats()
+
+    async def _template(self, prompt: str) -> Template:
+        names = {person.name for person in await self._directory.list()}
+        return templatize(prompt, names)
+
+    async def answer(self, prompt: str) -> Optional[PlannedAnswer]:
+        """Runs the stored SQL for the prompt's template, or returns None to fall back to the agent."""
+        template = await self._template(prompt)
+        with self._lock:
+            plan = self._plans.get(template.key) if template.values else None
+            if plan is None:
+                self._stats.misses += 1
+                return None
+            self._plans.move_to_end(template.key)
+        params = binds(template.values)
+        try:
+            result = await run_query(self._executor, plan.sql, params=params)
+        except sqlite3.Error:
+            # The schema moved on since the plan was learned; let the agent write a new one.
+            with self._lock:
+                self._plans.pop(template.key, None)
+                self._stats.failures += 1
+                self._stats.misses += 1
+            return None
+        with self._lock:
+            self._stats.hits += 1
+        return PlannedAnswer(plan, params, result)
+
+    async def learn(self, prompt: str, messages: Iterable) -> bool:
+        """Stores a plan from an agent run's messages. Returns whether one was kept."""
+        query = last_successful_select(messages)
+        if query is None:
+            return False
+        template = await self._template(prompt)
+        sql = parameterize(query, template.values)
+        if sql is not None:
+            try:
+                await self._executor.read(_validate, sql, binds(template.values))
+            except sqlite3.Error:
+                sql = None
+        with self._lock:
+            if sql is None:
+                self._stats.rejected += 1
+                return False
+            self._plans[template.key] = SqlPlan(template.key, sql)
+            self._plans.move_to_end(template.key)
+            while len(self._plans) > self.max_plans:
+                self._plans.popitem(last=False)
+            self._stats.learned += 1
+        return True
+
+    def plans(self) -> List[SqlPlan]:
+        with self._lock:
+            return list(self._plans.values())
+
+    def stats(self) -> SqlPlanStats:
+        with self._lock:
+            return SqlPlanStats(**vars(self._stats))
@@ -0,0 +1,43 @@
+"""
+Incremental delivery of the agent's text while a run is in progress.
+
+``Agent.run_stream`` treats the first text part of a response as the final
+answer, so a Qwen ``<think>`` preamble in front of tool calls would end the
+run before any tool executes. ``stream_run`` walks the run graph with
+``Agent.iter`` instead: every model request is streamed and its text deltas
+handed to ``on_text`` as they arrive, tool calls run as usual, and the
+finished ``AgentRunResult`` is returned just like ``Agent.run``.
+"""
+
+from typing import Callable
+
+from pydantic_ai import Agent
+from pydantic_ai.agent import AgentRunResult
+from pydantic_ai.messages import PartDeltaEvent, PartStartEvent, TextPart, TextPartDelta
+
+from .tracing import run_attributes, span
+
+
+async def stream_run(agent: Agent, prompt: str, on_text: Callable[[str], None], **kwargs) -> AgentRunResult:
+    """Runs ``agent`` on ``prompt``, calling ``on_text(chunk)`` for each piece of streamed text."""
+    streamed = False
+    with span("agent run", prompt=prompt, streamed=True) as s:
+        async with agent.iter(prompt, **kwargs) as run:
+            async for node in run:
+                if not Agent.is_model_request_node(node):
+                    continue
+                # Text from successive model requests (before and after tool calls) is kept apart.
+                separator = "\n\n" if streamed else ""
+                async with node.stream(run.ctx) as events:
+                    async for event in events:
+                        if isinstance(event, PartStartEvent) and isinstance(event.part, TextPart):
+                            chunk = event.part.content
+                        elif isinstance(event, PartDeltaEvent) and isinstance(event.delta, TextPartDelta):
+                            chunk = event.delta.content_delta
+                        else:
+                            continue
+                        if chunk:
+                            on_text(separator + chunk)
+                            separator, streamed = "", True
+        s.set(**run_attributes(run.result))
+    return run.result
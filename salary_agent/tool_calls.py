@@ -0,0 +1,127 @@
+"""
+Bounded, timed execution of the tool calls in an agent turn.
+
+pydantic-ai starts every tool call of a model response as its own task, so
+"show the wallet address for guru, madhur and shivam" already fans out, but
+without any limit (fifty lookups would take every reader thread, including
+other sessions') and with writes racing each other in arbitrary order.
+
+Tools wrapped with ``tool_call`` run under the ``ToolTurn`` of the current
+run: read-only calls share a fan-out semaphore, writes go one at a time in
+the order the model asked for them, and every call is timed. Outside a
+turn (e.g. the fast-path router calling a tool directly) the wrapper only
+records process-wide stats. Each call is also a "tool <name>" trace span.
+"""
+
+import asyncio
+import functools
+import threading
+import time
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple, Union
+
+from .tracing import span
+
+# --- Configuration ---
+# Matches DBExecutor's default reader pool, so one turn cannot queue behind itself.
+DEFAULT_FAN_OUT = 4
+
+
+@dataclass
+class ToolTiming:
+    name: str
+    read_only: bool
+    started: float
+    seconds: float
+    ok: bool
+
+
+@dataclass
+class ToolTurn:
+    """The tool calls of one agent run, with a fan-out limit for reads and FIFO writes."""
+
+    fan_out: int = DEFAULT_FAN_OUT
+    timings: List[ToolTiming] = field(default_factory=list)
+
+    def __post_init__(self):
+        self.reads = asyncio.Semaphore(self.fan_out)
+        self.writes = asyncio.Lock()
+
+    @property
+    def wall_seconds(self) -> float:
+        """Elapsed time from the first call starting to the last one finishing."""
+        if not self.timings:
+            return 0.0
+        return (max(t.started + t.seconds for t in self.timings)
+                - min(t.started for t in self.timings))
+
+    @property
+    def total_seconds(self) -> float:
+        """What the calls would have taken one after another."""
+        return sum(t.seconds for t in self.timings)
+
+    def summary(self) -> str:
+        calls = ", ".join(f"{t.name} {t.seconds * 1000:.1f} ms{'' if t.ok else ' (failed)'}"
+                          for t in self.timings)
+        return (f"{len(self.timings)} tool calls in {self.wall_seconds * 1000:.1f} ms "
+                f"({self.total_seconds * 1000:.1f} ms sequential): {calls}")
+
+
+current_turn: ContextVar[Optional[ToolTurn]] = ContextVar("current_turn", default=None)
+
+_stats: Dict[str, List[float]] = defaultdict(lambda: [0, 0.0])
+_stats_lock = threading.Lock()
+
+
+@asynccontextmanager
+async def tool_turn(fan_out: int = DEFAULT_FAN_OUT):
+    """Scopes the tool calls of the agent run awaited inside it to one ``ToolTurn``."""
+    turn = ToolTurn(fan_out)
+    token = current_turn.set(turn)
+    try:
+        yield turn
+    finally:
+        current_turn.reset(token)
+
+
+def tool_call(read_only: Union[bool, Callable[..., bool]]):
+    """
+    Wraps an async tool for bounded, timed execution. ``read_only`` may be a
+    predicate over the tool's arguments (``execute_sql_query`` is read-only only
+    for SELECTs). The signature and docstring are kept for the tool schema.
+    """
+    def decorate(fn):
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            reads = read_only(*args, **kwargs) if callable(read_only) else read_only
+            turn = current_turn.get()
+            gate = (turn.reads if reads else turn.writes) if turn is not None else None
+            if gate is not None:
+                await gate.acquire()
+            started = time.perf_counter()
+            ok = False
+            try:
+                with span(f"tool {fn.__name__}", tool=fn.__name__, read_only=reads):
+                    result = await fn(*args, **kwargs)
+                ok = True
+                return result
+            finally:
+                seconds = time.perf_counter() - started
+                if gate is not None:
+                    gate.release()
+                    turn.timings.append(ToolTiming(fn.__name__, reads, started, seconds, ok))
+                with _stats_lock:
+                    entry = _stats[fn.__name__]
+                    entry[0] += 1
+                    entry[1] += seconds
+        return wrapper
+    return decorate
+
+
+def tool_stats() -> Dict[str, Tuple[int, float]]:
+    """Process-wide ``{tool: (calls, mean seconds)}``."""
+    with _stats_lock:
+        return {name: (calls, total / calls) for name, (calls, total) in _stats.items() if calls}
@@ -0,0 +1,204 @@
+"""
+Structured spans for agent turns, model requests, tool calls, SQL and rendering.
+
+A slow answer can come from the model, from a query, or from drawing the
+result. ``span(name, **attributes)`` times a block and nests under the span
+that is current in its task (contextvars, so tool calls land under the run
+that made them). Every finished span goes to:
+
+* OpenTelemetry via ``opentelemetry-api``, a no-op until an SDK or
+  ``logfire.configure()`` installs a tracer provider;
+* a JSONL file, one span per line, when ``SALARY_AGENT_TRACE_FILE`` is set
+  or ``configure_tracing(path)`` is called;
+* in-process aggregates, summarized by ``hotspots()`` and ``slow_queries()``.
+
+Span names are kept low-cardinality ("tool execute_sql_query", "sql") so
+they aggregate; the specifics go in attributes.
+"""
+
+import importlib.util
+import json
+import os
+import secrets
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import asynccontextmanager, contextmanager, nullcontext
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Deque, Dict, Iterator, List, Optional, TextIO
+
+from pydantic_ai.models.wrapper import WrapperModel
+
+# --- Configuration ---
+OTEL = importlib.util.find_spec("opentelemetry") is not None
+TRACE_FILE_ENV = "SALARY_AGENT_TRACE_FILE"
+# Durations kept per span name for percentiles.
+RECENT_DURATIONS = 512
+# Longest SQL text recorded on a span or used as a slow-query key.
+MAX_SQL_CHARS = 500
+
+if OTEL:
+    from opentelemetry import trace as otel_trace
+    _tracer = otel_trace.get_tracer("salary_agent")
+else:
+    _tracer = None
+
+
+@dataclass
+class Span:
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: Optional[str]
+    started_at: float  # wall clock, for the trace file
+    attributes: Dict[str, object] = field(default_factory=dict)
+    seconds: float = 0.0
+    error: Optional[str] = None
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+
+@dataclass
+class SpanSummary:
+    name: str
+    calls: int
+    errors: int
+    total_seconds: float
+    max_seconds: float
+    p95_seconds: float
+
+    @property
+    def mean_seconds(self) -> float:
+        return self.total_seconds / self.calls if self.calls else 0.0
+
+
+class _Aggregate:
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.recent: Deque[float] = deque(maxlen=RECENT_DURATIONS)
+
+    def add(self, seconds: float, failed: bool):
+        self.calls += 1
+        self.errors += failed
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        self.recent.append(seconds)
+
+    def summary(self, name: str) -> SpanSummary:
+        recent = sorted(self.recent)
+        p95 = recent[min(len(recent) - 1, int(len(recent) * 0.95))] if recent else 0.0
+        return SpanSummary(name, self.calls, self.errors, self.total, self.max, p95)
+
+
+current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+_lock = threading.Lock()
+_by_name: Dict[str, _Aggregate] = defaultdict(_Aggregate)
+_by_sql: Dict[str, _Aggregate] = defaultdict(_Aggregate)
+_trace_path: Optional[str] = os.environ.get(TRACE_FILE_ENV) or None
+_trace_file: Optional[TextIO] = None
+
+
+def configure_tracing(path: Optional[str]):
+    """Writes finished spans to ``path`` as JSONL (appending), or stops writing them with None."""
+    global _trace_path, _trace_file
+    with _lock:
+        if _trace_file is not None:
+            _trace_file.close()
+        _trace_path, _trace_file = path, None
+
+
+def _otel_value(value):
+    return value if isinstance(value, (str, bool, int, float)) else str(value)
+
+
+def _record(span: Span):
+    global _trace_file
+    line = None
+    if _trace_path:
+        line = json.dumps({
+            "trace_id": span.trace_id, "span_id": span.span_id, "parent_id": span.parent_id,
+            "name": span.name, "start": span.started_at, "duration_ms": round(span.seconds * 1000, 3),
+            "error": span.error, "attributes": span.attributes,
+        }, default=str)
+    with _lock:
+        _by_name[span.name].add(span.seconds, span.error is not None)
+        sql = span.attributes.get("sql")
+        if sql:
+            _by_sql[" ".join(str(sql).split())[:MAX_SQL_CHARS]].add(span.seconds, span.error is not None)
+        if line is not None:
+            if _trace_file is None:
+                _trace_file = open(_trace_path, "a", buffering=1, encoding="utf-8")
+            _trace_file.write(line + "\n")
+
+
+@contextmanager
+def span(name: str, **attributes) -> Iterator[Span]:
+    """Times the block as a child of the current span; add attributes on the way with ``Span.set``."""
+    parent = current_span.get()
+    current = Span(
+        name=name,
+        trace_id=parent.trace_id if parent else secrets.token_hex(16),
+        span_id=secrets.token_hex(8),
+        parent_id=parent.span_id if parent else None,
+        started_at=time.time(),
+        attributes={k: v for k, v in attributes.items() if v is not None},
+    )
+    token = current_span.set(current)
+    started = time.perf_counter()
+    with (_tracer.start_as_current_span(name) if _tracer else nullcontext()) as otel_span:
+        try:
+            yield current
+        except BaseException as e:
+            current.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            current.seconds = time.perf_counter() - started
+            current_span.reset(token)
+            if otel_span is not None:
+                otel_span.set_attributes({k: _otel_value(v) for k, v in current.attributes.items()})
+            _record(current)
+
+
+class TracedModel(WrapperModel):
+    """Puts a "model request" span, with token usage, around every request to the wrapped model."""
+
+    async def request(self, *args, **kwargs):
+        with span("model request", model=self.model_name, streamed=False) as s:
+            response = await super().request(*args, **kwargs)
+            s.set(input_tokens=response.usage.request_tokens, output_tokens=response.usage.response_tokens)
+            return response
+
+    @asynccontextmanager
+    async def request_stream(self, *args, **kwargs):
+        with span("model request", model=self.model_name, streamed=True) as s:
+            async with super().request_stream(*args, **kwargs) as stream:
+                yield stream
+            usage = stream.usage()
+            s.set(input_tokens=usage.request_tokens, output_tokens=usage.response_tokens)
+
+
+def run_attributes(result) -> Dict[str, object]:
+    """Span attributes summarizing a finished ``AgentRunResult``."""
+    usage = result.usage()
+    return {"model_requests": usage.requests, "input_tokens": usage.request_tokens,
+            "output_tokens": usage.response_tokens, "output_chars": len(str(result.output))}
+
+
+def hotspots(limit: int = 10) -> List[SpanSummary]:
+    """Span names by total time spent, highest first."""
+    with _lock:
+        summaries = [aggregate.summary(name) for name, aggregate in _by_name.items()]
+    return sorted(summaries, key=lambda s: s.total_seconds, reverse=True)[:limit]
+
+
+def slow_queries(limit: int = 5) -> List[SpanSummary]:
+    """SQL statements by total time spent, highest first; ``name`` is the SQL text."""
+    with _lock:
+        summaries = [aggregate.summary(sql) for sql, aggregate in _by_sql.items()]
+    return sorted(summaries, key=lambda s: s.total_seconds, reverse=True)[:limit]
@@ -0,0 +1,92 @@
+"""
+Bulk USDT transfers recorded in a single transaction.
+
+A payroll run used to be one ``transfer_usdt`` tool round-trip per row, each
+with its own INSERT and commit. ``record_transfers`` validates a whole batch
+against ``persons`` in one pass and writes it with a single ``executemany``.
+"""
+
+import math
+import sqlite3
+from typing import List, Optional, Sequence, Tuple, Union
+
+from pydantic import BaseModel
+
+from . import repository
+from .executor import DBExecutor
+from .repository import NewTransfer
+
+# Rejection reasons beyond this are counted but not listed, to keep the summary compact.
+MAX_REPORTED_ERRORS = 10
+
+
+class TransferRequest(BaseModel):
+    from_person: str
+    to_person: str
+    amount: float
+
+
+class BatchTransferSummary(BaseModel):
+    recorded: int
+    rejected: int
+    total_amount: float
+    token: str
+    first_id: Optional[int] = None
+    last_id: Optional[int] = None
+    errors: List[str] = []
+
+
+TransferRow = Union[TransferRequest, Tuple[str, str, float]]
+
+
+def _validate(rows: Sequence[TransferRow], known: set, token: str) -> Tuple[List[NewTransfer], List[str], int]:
+    valid, errors, rejected = [], [], 0
+    for i, row in enumerate(rows):
+        if isinstance(row, TransferRequest):
+            sender, receiver, amount = row.from_person, row.to_person, row.amount
+        else:
+            sender, receiver, amount = row
+        sender, receiver = sender.lower(), receiver.lower()
+
+        if sender not in known:
+            reason = f"unknown sender '{sender}'"
+        elif receiver not in known:
+            reason = f"unknown receiver '{receiver}'"
+        elif sender == receiver:
+            reason = "sender and receiver are the same"
+        elif not math.isfinite(amount) or amount <= 0:
+            reason = f"invalid amount {amount}"
+        else:
+            valid.append(NewTransfer(sender, receiver, float(amount), token))
+            continue
+
+        rejected += 1
+        if len(errors) < MAX_REPORTED_ERRORS:
+            errors.append(f"row {i}: {reason}")
+    return valid, errors, rejected
+
+
+def record_transfers(conn: sqlite3.Connection, rows: Sequence[TransferRow], token: str) -> BatchTransferSummary:
+    """
+    Validates ``rows`` and inserts them all in the current transaction.
+    The batch is all-or-nothing: if any row is rejected, nothing is written.
+    """
+    valid, errors, rejected = _validate(rows, repository.person_names(conn), token)
+    if rejected or not valid:
+        return BatchTransferSummary(recorded=0, rejected=rejected, total_amount=0.0,
+                                    token=token, errors=errors)
+
+    first_id, last_id = repository.insert_transfers(conn, valid)
+    return BatchTransferSummary(
+        recorded=len(valid),
+        rejected=0,
+        total_amount=sum(t.amount for t in valid),
+        token=token,
+        first_id=first_id,
+        last_id=last_id,
+    )
+
+
+async def transfer_batch(executor: DBExecutor, rows: Sequence[TransferRow], token: str) -> BatchTransferSummary:
+    """Awaitable ``record_transfers`` on the writer thread, committed as one transaction."""
+    return await executor.write(record_transfers, rows, token)
@@ -0,0 +1,22 @@
+import pytest
+
+from salary_agent.db import ConnectionPool, init_db
+from salary_agent.executor import DBExecutor
+
+
+@pytest.fixture
+def db_file(tmp_path):
+    path = str(tmp_path / "salary_agent.db")
+    pool = ConnectionPool(path)
+    init_db(pool)
+    pool.close()
+    return path
+
+
+@pytest.fixture
+def executor(db_file):
+    pool = ConnectionPool(db_file)
+    executor = DBExecutor(pool)
+    yield executor
+    executor.shutdown()
+    pool.close()
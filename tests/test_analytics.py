@@ -0,0 +1,96 @@
+import asyncio
+import math
+
+import pytest
+
+pytest.importorskip("pyarrow")
+
+from benchmarks.synthetic import build_database  # noqa: E402
+from salary_agent.analytics import AnalyticsEngine, ColumnarStore, UnsupportedQuery, execute, parse_aggregate  # noqa: E402
+from salary_agent.db import ConnectionPool  # noqa: E402
+from salary_agent.executor import DBExecutor  # noqa: E402
+
+QUERIES = [
+    "SELECT COUNT(*) FROM transfers",
+    "SELECT SUM(amount), AVG(amount), MIN(amount), MAX(amount) FROM transfers WHERE to_person = 'shivam'",
+    "SELECT from_person, SUM(amount) AS total FROM transfers GROUP BY from_person ORDER BY total DESC LIMIT 5",
+    "SELECT to_person, COUNT(*) c FROM transfers t WHERE t.amount > 250 GROUP BY t.to_person "
+    "ORDER BY c DESC, to_person LIMIT 10",
+    "SELECT date(timestamp) AS day, COUNT(*), SUM(amount) FROM transfers GROUP BY day ORDER BY day DESC LIMIT 7",
+    "SELECT strftime('%Y-%m', timestamp) month, COUNT(DISTINCT from_person) FROM transfers GROUP BY month",
+    "SELECT COUNT(*) FROM transfers WHERE timestamp IS NULL",
+    "SELECT from_person, COUNT(*) FROM transfers WHERE from_person IN ('guru', 'madhur') GROUP BY from_person",
+    "SELECT COUNT(*) FROM transfers WHERE amount BETWEEN 10 AND 20.5",
+    "SELECT SUM(amount) FROM transfers WHERE from_person = 'nobody'",
+]
+
+
+def _same(a, b) -> bool:
+    return len(a) == len(b) and all(
+        math.isclose(u, v, rel_tol=1e-9) if isinstance(u, float) and isinstance(v, float) else u == v
+        for x, y in zip(a, b) for u, v in zip(x, y)
+    )
+
+
+@pytest.fixture
+def conn(tmp_path):
+    conn = build_database(str(tmp_path / "analytics.db"), transfers=3_000, persons=20)
+    conn.execute("INSERT INTO transfers (from_person, to_person, amount, token, timestamp) "
+                 "VALUES ('guru', 'madhur', 5, 'USDT', NULL)")
+    conn.commit()
+    yield conn
+    conn.close()
+
+
+@pytest.mark.parametrize("sql", QUERIES)
+def test_execute_matches_sqlite(conn, tmp_path, sql):
+    table = ColumnarStore(str(tmp_path / "columnar")).sync(conn)
+    cursor = conn.execute(sql)
+    expected = cursor.fetchall()
+    columns, rows = execute(table, parse_aggregate(sql))
+    assert columns == [d[0] for d in cursor.description]
+    assert _same(rows, expected)
+
+
+@pytest.mark.parametrize("sql", [
+    "SELECT id FROM transfers LIMIT 3",
+    "SELECT COUNT(*) FROM transfers t JOIN persons p ON p.name = t.from_person",
+    "SELECT COUNT(*) FROM transfers WHERE amount > 100 OR amount < 2",
+    "SELECT COUNT(*) FROM persons",
+    "SELECT from_person, COUNT(*) FROM transfers GROUP BY 0",
+    "SELECT from_person, COUNT(*) FROM transfers GROUP BY 3",
+])
+def test_unsupported_shapes(sql):
+    with pytest.raises(UnsupportedQuery):
+        parse_aggregate(sql)
+
+
+def test_sync_appends_new_rows_and_rebuilds_on_update(conn, tmp_path):
+    store = ColumnarStore(str(tmp_path / "columnar"))
+    store.sync(conn)
+    conn.execute("INSERT INTO transfers (from_person, to_person, amount, token, timestamp) "
+                 "VALUES ('guru', 'madhur', 1, 'USDT', '2026-01-01 00:00:00')")
+    conn.commit()
+    assert store.sync(conn).num_rows == conn.execute("SELECT COUNT(*) FROM transfers").fetchone()[0]
+    assert (store.appends, store.rebuilds) == (1, 1)
+
+    conn.execute("UPDATE transfers SET amount = 2 WHERE id = 1")
+    conn.commit()
+    _, rows = execute(store.sync(conn), parse_aggregate("SELECT SUM(amount) FROM transfers"))
+    assert store.rebuilds == 2
+    assert _same(rows, conn.execute("SELECT SUM(amount) FROM transfers").fetchall())
+
+
+def test_engine_leaves_index_searches_to_sqlite(conn, tmp_path):
+    pool = ConnectionPool(conn.execute("PRAGMA database_list").fetchone()[2])
+    executor = DBExecutor(pool)
+    engine = AnalyticsEngine(executor, str(tmp_path / "columnar"))
+    try:
+        served = asyncio.run(engine.run("SELECT COUNT(*) FROM transfers"))
+        declined = asyncio.run(engine.run("SELECT COUNT(*) FROM transfers WHERE id = 1"))
+    finally:
+        executor.shutdown()
+        pool.close()
+    assert served.rows == conn.execute("SELECT COUNT(*) FROM transfers").fetchall()
+    assert declined is None
+    assert (engine.stats().served, engine.stats().fallbacks) == (1, 1)
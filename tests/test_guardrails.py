@@ -0,0 +1,63 @@
+import sqlite3
+
+import pytest
+
+from benchmarks.synthetic import build_database
+from salary_agent.guardrails import GuardrailPolicy, QueryBudgetExceeded, QueryRejected, check, execute_guarded
+
+POLICY = GuardrailPolicy(max_estimated_rows=100_000, max_result_rows=50)
+
+
+@pytest.fixture
+def conn(tmp_path):
+    conn = build_database(str(tmp_path / "guardrails.db"), transfers=2_000, persons=20)
+    yield conn
+    conn.close()
+
+
+@pytest.mark.parametrize("sql", [
+    "SELECT * FROM transfers;",
+    "SELECT * FROM transfers ; -- top rows",
+    "SELECT * FROM transfers -- top rows\n;\n",
+    "SELECT * FROM transfers /* all of them */ ;",
+    "SELECT '--;' AS marker, * FROM transfers;",
+])
+def test_limit_appended_after_trailing_semicolon_and_comments(conn, sql):
+    checked = check(conn, sql, policy=POLICY)
+    assert checked.row_limit == 50
+    assert checked.sql.endswith("\nLIMIT 50")
+    assert len(conn.execute(checked.sql).fetchall()) == 50
+
+
+def test_existing_limit_is_kept(conn):
+    sql = "SELECT * FROM transfers ORDER BY id LIMIT 5"
+    checked = check(conn, sql, policy=POLICY)
+    assert checked.sql == sql and checked.row_limit is None
+
+
+def test_limit_inside_subquery_does_not_count(conn):
+    checked = check(conn, "SELECT * FROM transfers WHERE id IN (SELECT id FROM transfers LIMIT 500)", policy=POLICY)
+    assert checked.row_limit == 50
+
+
+def test_cross_join_is_rejected_with_index_hints(conn):
+    with pytest.raises(QueryRejected, match="indexed on"):
+        check(conn, "SELECT COUNT(*) FROM transfers a, transfers b", policy=POLICY)
+
+
+def test_indexed_lookup_is_allowed(conn):
+    checked = check(conn, "SELECT * FROM transfers WHERE id = ?", (1,), policy=POLICY)
+    assert checked.analysis.searches == ["transfers"]
+    assert not checked.analysis.full_scans
+
+
+def test_execute_guarded_runs_writes_without_limit(conn):
+    execute_guarded(conn, "UPDATE transfers SET amount = amount WHERE id = ?", (1,), POLICY)
+    assert conn.total_changes >= 1
+
+
+def test_budget_interrupts_long_statement(conn):
+    policy = GuardrailPolicy(max_vm_steps=10_000)
+    with pytest.raises(QueryBudgetExceeded):
+        execute_guarded(conn, "UPDATE transfers SET amount = amount", policy=policy)
+    assert isinstance(QueryBudgetExceeded("x"), sqlite3.OperationalError)
@@ -0,0 +1,90 @@
+import sqlite3
+
+import pytest
+
+from benchmarks.synthetic import build_database
+from salary_agent.db import table_versions
+from salary_agent.migrations import LATEST_VERSION, MIGRATIONS, current_version, migrate
+
+BALANCES = '''
+    SELECT name, SUM(sent_total), SUM(sent_count), SUM(received_total), SUM(received_count)
+    FROM (
+        SELECT from_person AS name, SUM(amount) AS sent_total, COUNT(*) AS sent_count,
+               0 AS received_total, 0 AS received_count
+        FROM transfers GROUP BY from_person
+        UNION ALL
+        SELECT to_person, 0, 0, SUM(amount), COUNT(*) FROM transfers GROUP BY to_person
+    )
+    GROUP BY name ORDER BY name
+'''
+DAILY = "SELECT date(timestamp), COUNT(*), SUM(amount) FROM transfers GROUP BY 1 ORDER BY 1"
+
+
+def _aggregates(conn):
+    balances = conn.execute(
+        "SELECT name, sent_total, sent_count, received_total, received_count FROM person_balances "
+        "WHERE sent_count + received_count > 0 ORDER BY name"
+    ).fetchall()
+    daily = conn.execute(
+        "SELECT day, transfer_count, total_amount FROM daily_transfer_totals WHERE transfer_count > 0 ORDER BY day"
+    ).fetchall()
+    return balances, daily
+
+
+def _rounded(rows):
+    return [tuple(round(v, 6) if isinstance(v, float) else v for v in row) for row in rows]
+
+
+def _assert_aggregates_match(conn):
+    balances, daily = _aggregates(conn)
+    assert _rounded(balances) == _rounded(conn.execute(BALANCES).fetchall())
+    assert _rounded(daily) == _rounded(conn.execute(DAILY).fetchall())
+
+
+@pytest.fixture
+def conn(tmp_path):
+    conn = sqlite3.connect(str(tmp_path / "migrations.db"))
+    yield conn
+    conn.close()
+
+
+def test_migrate_fresh_database_to_latest(conn):
+    applied = migrate(conn)
+    assert [m.version for m in applied] == [m.version for m in MIGRATIONS]
+    assert current_version(conn) == LATEST_VERSION
+    tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    assert {"persons", "transfers", "person_balances", "daily_transfer_totals", "table_versions"} <= tables
+
+
+def test_migrate_is_idempotent(conn):
+    migrate(conn)
+    assert migrate(conn) == []
+    assert conn.execute("SELECT COUNT(*) FROM schema_version").fetchone()[0] == len(MIGRATIONS)
+
+
+def test_migrate_stops_at_target(conn):
+    assert [m.version for m in migrate(conn, target=2)] == [1, 2]
+    assert current_version(conn) == 2
+    assert [m.version for m in migrate(conn)] == [m.version for m in MIGRATIONS if m.version > 2]
+
+
+def test_upgrade_backfills_aggregates(tmp_path):
+    conn = build_database(str(tmp_path / "old.db"), transfers=1_000, persons=10, schema_version=2)
+    migrate(conn)
+    _assert_aggregates_match(conn)
+    conn.close()
+
+
+def test_triggers_keep_aggregates_and_versions_current(tmp_path):
+    conn = build_database(str(tmp_path / "live.db"), transfers=500, persons=10)
+    before = table_versions(conn)
+    conn.execute("INSERT INTO transfers (from_person, to_person, amount, token, timestamp) "
+                 "VALUES ('guru', 'madhur', 10, 'USDT', '2026-02-01 09:00:00')")
+    conn.execute("UPDATE transfers SET amount = amount * 2, to_person = 'shivam' WHERE id % 7 = 0")
+    conn.execute("DELETE FROM transfers WHERE id % 11 = 0")
+    conn.commit()
+    _assert_aggregates_match(conn)
+    after = table_versions(conn)
+    assert after["transfers"] > before["transfers"]
+    assert after.get("persons") == before.get("persons")
+    conn.close()
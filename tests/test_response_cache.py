@@ -0,0 +1,91 @@
+import asyncio
+import sqlite3
+
+from pydantic_ai.messages import ModelResponse, ToolCallPart
+
+from salary_agent.memory import ConversationMemory, is_follow_up
+from salary_agent.response_cache import ResponseCache, cache_key, run_dependencies
+
+
+class FakeRun:
+    """Stands in for ``agent.run``: answers with a canned SQL tool call and counts its calls."""
+
+    def __init__(self, query="SELECT name FROM persons"):
+        self.query = query
+        self.calls = 0
+
+    async def __call__(self, prompt):
+        self.calls += 1
+        return FakeResult(f"answer {self.calls}", [
+            ModelResponse(parts=[ToolCallPart("execute_sql_query", {"query": self.query})]),
+        ])
+
+
+class FakeResult:
+    def __init__(self, output, messages):
+        self.output = output
+        self._messages = messages
+
+    def new_messages(self):
+        return self._messages
+
+
+def test_cache_key_normalizes_prompt():
+    assert cache_key("Show all persons?") == cache_key("  show all persons ")
+    assert cache_key("show all persons", "abc") != cache_key("show all persons")
+
+
+def test_run_dependencies():
+    read = [ModelResponse(parts=[ToolCallPart("execute_sql_query", {"query": "SELECT * FROM person_balances"})])]
+    write = [ModelResponse(parts=[ToolCallPart("add_person", {"name": "x", "address": "y"})])]
+    assert run_dependencies(read) == {"transfers"}
+    assert run_dependencies(write) is None
+
+
+def test_same_question_twice_in_one_session_is_a_hit(executor):
+    cache, run = ResponseCache(executor), FakeRun()
+    memory = ConversationMemory("system")
+
+    async def ask(prompt):
+        response = await cache.run(prompt, run, memory.cache_context(prompt))
+        memory.add_exchange(prompt, response.output)
+        return response
+
+    async def session():
+        first = await ask("show all persons")
+        await ask("how many transfers were made today")
+        return first, await ask("show all persons")
+
+    first, again = asyncio.run(session())
+    assert not first.cached and again.cached
+    assert again.output == first.output
+    assert run.calls == 2
+    assert cache.stats().hits == 1
+
+
+def test_follow_up_is_keyed_on_history(executor):
+    cache, run = ResponseCache(executor), FakeRun()
+    memory = ConversationMemory("system")
+    assert is_follow_up("and what about madhur?")
+    assert not is_follow_up("show all persons")
+    assert memory.cache_context("and what about madhur?") == ""  # nothing to refer back to yet
+
+    async def session():
+        await cache.run("what about madhur", run, memory.cache_context("what about madhur"))
+        memory.add_exchange("show guru's address", "addr-guru")
+        context = memory.cache_context("what about madhur")
+        assert context
+        return await cache.run("what about madhur", run, context)
+
+    assert not asyncio.run(session()).cached
+    assert run.calls == 2
+
+
+def test_write_invalidates_entry(executor, db_file):
+    cache, run = ResponseCache(executor), FakeRun()
+    asyncio.run(cache.run("show all persons", run))
+    with sqlite3.connect(db_file) as conn:
+        conn.execute("INSERT INTO persons (name, address) VALUES ('zoe', 'addr-zoe')")
+    assert not asyncio.run(cache.run("show all persons", run)).cached
+    assert cache.stats().invalidations == 1
+    assert asyncio.run(cache.run("show all persons", run)).cached
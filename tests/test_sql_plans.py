@@ -0,0 +1,101 @@
+import asyncio
+import sqlite3
+
+from pydantic_ai.messages import ModelRequest, ModelResponse, ToolCallPart, ToolReturnPart
+
+from salary_agent.directory import PersonsDirectory
+from salary_agent.sql_plans import SqlPlanCache, last_successful_select, parameterize, templatize
+
+NAMES = {"guru", "madhur"}
+
+
+def _run(query, content="1 rows"):
+    return [
+        ModelResponse(parts=[ToolCallPart("execute_sql_query", {"query": query}, "call-1")]),
+        ModelRequest(parts=[ToolReturnPart("execute_sql_query", content, "call-1")]),
+    ]
+
+
+def _seed(db_file):
+    with sqlite3.connect(db_file) as conn:
+        conn.executemany("INSERT INTO persons (name, address) VALUES (?, ?)",
+                         [("guru", "addr-guru"), ("madhur", "addr-madhur")])
+        conn.executemany("INSERT INTO transfers (from_person, to_person, amount, token) VALUES (?, ?, ?, 'USDT')",
+                         [("guru", "madhur", 12.5), ("madhur", "guru", 40), ("guru", "madhur", 7.5)])
+
+
+def test_templatize():
+    template = templatize("Total received by Guru since 2025-01-01 over 10?", NAMES)
+    assert template.key == "total received by {person} since {date} over {number}"
+    assert template.values == ["guru", "2025-01-01", 10]
+
+
+def test_parameterize_requires_every_value():
+    sql = "SELECT SUM(amount) FROM transfers WHERE to_person = 'guru' AND amount > 10"
+    assert parameterize(sql, ["guru", 10]) == \
+        "SELECT SUM(amount) FROM transfers WHERE to_person = :p0 AND amount > :p1"
+    assert parameterize("SELECT SUM(amount) FROM transfers", ["guru"]) is None
+    assert parameterize(sql, ["guru", "guru"]) is None
+
+
+def test_parameterize_binds_only_filter_and_limit_values():
+    sql = "SELECT from_person, SUM(amount) FROM transfers GROUP BY 1 ORDER BY 2 DESC LIMIT 1"
+    assert parameterize(sql, [1]) == \
+        "SELECT from_person, SUM(amount) FROM transfers GROUP BY 1 ORDER BY 2 DESC LIMIT :p0"
+    # One value, two literals: which of them the question meant is unknown.
+    assert parameterize("SELECT * FROM transfers WHERE amount > 5 AND id > 5", [5]) is None
+    assert parameterize("SELECT 'guru' AS name, SUM(amount) FROM transfers", ["guru"]) is None
+
+
+def test_last_successful_select_skips_errors_and_other_tools():
+    assert last_successful_select(_run("SELECT 1")) == "SELECT 1"
+    assert last_successful_select(_run("SELECT 1", "Database Error: no such table")) is None
+    other = [ModelResponse(parts=[ToolCallPart("show_wallet_address", {"name": "guru"}, "call-2")])]
+    assert last_successful_select(_run("SELECT 1") + other) is None
+
+
+def test_learned_plan_answers_same_shape_with_rows(executor, db_file):
+    _seed(db_file)
+    plans = SqlPlanCache(executor, PersonsDirectory(executor))
+
+    async def scenario():
+        learned = await plans.learn(
+            "total received by madhur",
+            _run("SELECT to_person, SUM(amount) AS total FROM transfers WHERE to_person = 'madhur'"),
+        )
+        return learned, await plans.answer("Total received by guru?"), await plans.answer("who is guru")
+
+    learned, planned, missed = asyncio.run(scenario())
+    assert learned and missed is None
+    assert planned.params == {"p0": "guru"}
+    assert planned.result.rows == [("guru", 40.0)]
+    assert "guru" in planned.output and "40" in planned.output
+    assert "total received by {person}" in planned.summary
+    assert plans.stats().hits == 1
+
+
+def test_ordinal_plan_answers_with_top_n(executor, db_file):
+    _seed(db_file)
+    with sqlite3.connect(db_file) as conn:
+        conn.execute("INSERT INTO persons (name, address) VALUES ('shivam', 'addr-shivam')")
+        conn.execute("INSERT INTO transfers (from_person, to_person, amount, token) VALUES ('shivam', 'guru', 1, 'USDT')")
+    plans = SqlPlanCache(executor, PersonsDirectory(executor))
+
+    async def scenario():
+        await plans.learn("top 1 senders by total", _run(
+            "SELECT from_person, SUM(amount) FROM transfers GROUP BY 1 ORDER BY 2 DESC LIMIT 1"
+        ))
+        return await plans.answer("top 3 senders by total")
+
+    planned = asyncio.run(scenario())
+    assert planned.result.rows == [("madhur", 40.0), ("guru", 20.0), ("shivam", 1.0)]
+
+
+def test_unparameterizable_run_is_not_learned(executor, db_file):
+    _seed(db_file)
+    plans = SqlPlanCache(executor, PersonsDirectory(executor))
+    learned = asyncio.run(plans.learn(
+        "total received by madhur", _run("SELECT SUM(amount) FROM transfers WHERE to_person LIKE 'mad%'"),
+    ))
+    assert not learned
+    assert plans.stats().rejected == 1